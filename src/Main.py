@@ -8,6 +8,7 @@ You may use, modify, and distribute this file under the terms of the MIT License
 See the LICENSE file for details.
 """
 import sys
+import multiprocessing
 
 from PySide6.QtCore import QTranslator
 from PySide6.QtWidgets import QApplication
@@ -30,4 +31,6 @@ def main():
 
 if __name__ == "__main__":
 
+    # the group worker processes are spawned from the frozen executable too
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
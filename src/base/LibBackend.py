@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import queue
+
+from base.MsgBase import MsgBase
+
+from utils.RoomSnapshot import RoomSnapshot
+
+
+class LibBackendFallback(Exception):
+
+    """
+        Raised by a backend when it can not finish an operation by itself
+        (e.g. the server response is not understood), the caller should
+        retry the operation with the browser backend.
+    """
+    pass
+
+
+class LibBackend(MsgBase):
+
+    def __init__(
+        self,
+        input_queue: queue.Queue,
+        output_queue: queue.Queue
+    ):
+
+        super().__init__(input_queue, output_queue)
+
+
+    def login(
+        self,
+        username: str,
+        password: str,
+        max_attempts: int = 5,
+        auto_captcha: bool = True
+    ) -> bool:
+
+        pass
+
+
+    def logout(
+        self,
+        username: str
+    ) -> bool:
+
+        pass
+
+
+    def resumeSession(
+        self,
+        username: str,
+        cookies: list,
+        check_url: str
+    ) -> bool:
+
+        pass
+
+
+    def sessionCookies(
+        self
+    ) -> list:
+
+        pass
+
+
+    def dropSession(
+        self
+    ):
+
+        pass
+
+
+    def canReserve(
+        self,
+        date: str
+    ) -> bool:
+
+        pass
+
+
+    def canCheckin(
+        self
+    ) -> bool:
+
+        pass
+
+
+    def canRenew(
+        self
+    ) -> dict:
+
+        pass
+
+
+    def postRenewCheck(
+        self,
+        record: dict
+    ) -> bool:
+
+        pass
+
+
+    def reserve(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        pass
+
+
+    def prepareReserve(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        pass
+
+
+    def commitReserve(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        pass
+
+
+    def roomSnapshot(
+        self,
+        reserve_info: dict
+    ) -> RoomSnapshot:
+
+        pass
+
+
+    def checkin(
+        self,
+        username: str
+    ) -> bool:
+
+        pass
+
+
+    def renew(
+        self,
+        username: str,
+        record: dict,
+        reserve_info: dict
+    ) -> bool:
+
+        pass
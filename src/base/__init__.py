@@ -5,4 +5,5 @@
     Here are the classes and modules in this package:
     - MsgBase: Base class for messages.\
     - LibOperator: Base class for library operators.
+    - LibBackend: Base class for library backends.
 """
\ No newline at end of file
@@ -96,6 +96,19 @@ class ALAddTimerTaskWidget(QDialog, Ui_ALAddTimerTaskDialog):
         self.TimerConfigLayout.addWidget(self.RelativeTimerWidget)
         self.RelativeTimerWidget.setVisible(False)
 
+        self.PrearmWidget = QWidget()
+        self.PrearmLayout = QHBoxLayout(self.PrearmWidget)
+        self.PrearmLayout.addWidget(QLabel("提前准备："))
+        self.PrearmLeadSpinBox = QSpinBox()
+        self.PrearmLeadSpinBox.setMinimum(0)
+        self.PrearmLeadSpinBox.setMaximum(600)
+        self.PrearmLeadSpinBox.setSuffix("秒")
+        self.PrearmLeadSpinBox.setToolTip(
+            "在执行时间之前提前登录所有用户并打开预约选座页面, 到达执行时间时同时提交预约, 0 表示不提前准备"
+        )
+        self.PrearmLayout.addWidget(self.PrearmLeadSpinBox)
+        self.TimerConfigLayout.addWidget(self.PrearmWidget)
+
 
     def connectSignals(
         self
@@ -134,6 +147,7 @@ class ALAddTimerTaskWidget(QDialog, Ui_ALAddTimerTaskDialog):
             "time_type": self.TimerTypeComboBox.currentText(),
             "execute_time": execute_time,
             "silent": silent,
+            "prearm_lead": self.PrearmLeadSpinBox.value(),
             "add_time": added_time,
             "status": TimerTaskStatus.PENDING,
             "executed": False
@@ -23,12 +23,12 @@ from PySide6.QtGui import (
 
 from gui.Ui_ALConfigWidget import Ui_ALConfigWidget
 from gui.ALSeatMapWidget import ALSeatMapWidget
-from gui.ALSeatMapTable import seats_maps
 from gui.ALUserTreeWidget import TreeItemType
 from gui.ALUserTreeWidget import ALUserTreeWidget
 
 from utils.ConfigReader import ConfigReader
 from utils.ConfigWriter import ConfigWriter
+from utils.SeatTopology import SeatTopology
 
 
 class ALConfigWidget(QWidget, Ui_ALConfigWidget):
@@ -269,6 +269,68 @@ class ALConfigWidget(QWidget, Ui_ALConfigWidget):
             },
             "mode": {
                 "run_mode": 1
+            },
+            "runner": {
+                "engine": "thread",
+                "max_workers": 1,
+                "prearm_workers": 0,
+                "shard_size": 0,
+                "max_sessions": 8,
+                "max_restarts": 2
+            },
+            "driver_pool": {
+                "enabled": False,
+                "size": 1,
+                "max_uses": 20
+            },
+            "backend": {
+                "type": "selenium",
+                "fallback": True,
+                "timeout": 5,
+                "endpoints": {
+                    "map": "/map",
+                    "history": "/history?type=SEAT",
+                    "logout": "/logout",
+                    "room_seats": "/mapBook/getSeatsByRoom",
+                    "start_times": "/freeBook/ajaxGetTime",
+                    "end_times": "/freeBook/ajaxGetEndTime",
+                    "reserve": "/selfRes",
+                    "checkin": ""
+                }
+            },
+            "clock": {
+                "sync": True,
+                "samples": 8
+            },
+            "session_cache": {
+                "enabled": False,
+                "path": "",
+                "check_url": "/"
+            },
+            "ocr": {
+                "threads": 0,
+                "top_k": 3,
+                "min_confidence": 0.6,
+                "preprocess": [],
+                "variants": False
+            },
+            "history_store": {
+                "enabled": False,
+                "path": ""
+            },
+            "seat_fallback": {
+                "enabled": False,
+                "radius": 3,
+                "max_attempts": 3
+            },
+            "group_seats": {
+                "enabled": False,
+                "max_size": 4
+            },
+            "room_link": {
+                "enabled": True,
+                "map_url": "/map",
+                "timeout": 5
             }
         }
 
@@ -321,6 +383,13 @@ class ALConfigWidget(QWidget, Ui_ALConfigWidget):
         if self.AutoRenewalCheckBox.isChecked():
             run_mode |= 0x04
         run_config["mode"]["run_mode"] = run_mode
+        # sections which are not editable in the widget are kept as loaded
+        for key in (
+            "runner", "driver_pool", "backend", "clock", "session_cache", "ocr",
+            "history_store", "seat_fallback", "group_seats", "room_link"
+        ):
+            if key in self.__config_data["run"]:
+                run_config[key] = self.__config_data["run"][key]
         return run_config
 
 
@@ -810,14 +879,13 @@ class ALConfigWidget(QWidget, Ui_ALConfigWidget):
 
         floor = self.FloorComboBox.currentText()
         room = self.RoomComboBox.currentText()
-        floor_idx = self.__floor_rmap[floor]
         room_idx = self.__room_rmap[room]
         if self.__seat_map_widget is None:
             self.__seat_map_widget = ALSeatMapWidget(
                 self,
                 floor,
                 room,
-                seats_maps[floor_idx][room_idx]
+                SeatTopology.forRoom(room_idx)
             )
             self.__seat_map_widget.seatMapWidgetClosed.connect(self.onSeatMapWidgetClosed)
         self.__seat_map_widget.show()
@@ -11,12 +11,13 @@ import os
 import sys
 import time
 import queue
+import threading
 
 from PySide6.QtCore import (
     Qt, Signal, Slot, QDir, QFileInfo, QTimer, QUrl,
 )
 from PySide6.QtWidgets import (
-    QMainWindow, QMenu, QSystemTrayIcon
+    QMainWindow, QMenu, QSystemTrayIcon, QLabel
 )
 from PySide6.QtGui import (
     QTextCursor, QCloseEvent, QFont, QIcon, QDesktopServices
@@ -30,8 +31,12 @@ from gui.ALMainWorkers import TimerTaskWorker, AutoLibWorker
 
 from gui import AutoLibraryResource
 
+from operators.DriverPool import DriverPool
+
 from utils.ConfigReader import ConfigReader
 from utils.ConfigWriter import ConfigWriter
+from utils.OcrService import OcrService
+from utils.ServerClock import ServerClock
 
 
 class ALMainWindow(QMainWindow, Ui_ALMainWindow):
@@ -63,12 +68,16 @@ class ALMainWindow(QMainWindow, Ui_ALMainWindow):
         self.__auto_lib_thread = None
         self.__current_timer_task_thread = None
         self.__is_running_timer_task = False
+        self.__driver_pool = None
 
         self.modifyUi()
         self.setupTray()
         self.connectSignals()
         self.startMsgPolling()
         self.startTimerTaskPolling()
+        self.setupDriverPool()
+        self.setupServerClock()
+        self.setupOcrService()
 
 
     def modifyUi(
@@ -78,6 +87,8 @@ class ALMainWindow(QMainWindow, Ui_ALMainWindow):
         self.icon = QIcon(":/res/icon/icons/AutoLibrary_32x32.ico")
         self.setWindowIcon(self.icon)
         self.MessageIOTextEdit.setFont(QFont("Courier New", 10))
+        self.ClockOffsetLabel = QLabel("服务器时间: 未校准")
+        self.StatusBar.addPermanentWidget(self.ClockOffsetLabel)
         self.ManualAction.triggered.connect(self.onManualActionTriggered)
         self.AboutAction.triggered.connect(self.onAboutActionTriggered)
 
@@ -154,6 +165,97 @@ class ALMainWindow(QMainWindow, Ui_ALMainWindow):
             self.showNormal()
 
 
+    def setupDriverPool(
+        self
+    ):
+
+        # the pool is rebuilt whenever the run config may have changed
+        if self.__driver_pool:
+            self.__driver_pool.close()
+            self.__driver_pool = None
+        if not os.path.exists(self.__config_paths["run"]):
+            return
+        run_config = ConfigReader(self.__config_paths["run"]).getConfigs()
+        if not run_config.get("driver_pool", {}).get("enabled", False):
+            return
+        self.__driver_pool = DriverPool(
+            self.__input_queue,
+            self.__output_queue,
+            run_config
+        )
+        self.showTrace("浏览器驱动池已启用, 正在后台预热浏览器驱动......")
+        self.__driver_pool.warmUp()
+
+
+    def setupOcrService(
+        self
+    ):
+
+        ocr_config = {}
+        if os.path.exists(self.__config_paths["run"]):
+            ocr_config = ConfigReader(self.__config_paths["run"]).getConfigs().get("ocr", {})
+        OcrService.configure(
+            ocr_config.get("threads", 0),
+            ocr_config.get("top_k", 3),
+            ocr_config.get("min_confidence", 0.6),
+            ocr_config.get("preprocess", []),
+            ocr_config.get("variants", False)
+        )
+        # load the model now, so the first captcha of a timer task does not wait for it
+        OcrService.warmUp()
+
+
+    def setupServerClock(
+        self
+    ):
+
+        if not os.path.exists(self.__config_paths["run"]):
+            return
+        run_config = ConfigReader(self.__config_paths["run"]).getConfigs()
+        clock_config = run_config.get("clock", {})
+        if not clock_config.get("sync", True):
+            return
+        host_url = run_config.get("library", {}).get("host_url")
+        if not host_url:
+            return
+        # sampling takes about one second, keep it off the ui thread
+        threading.Thread(
+            target=self.syncServerClock,
+            args=(host_url, clock_config.get("samples", 8)),
+            daemon=True
+        ).start()
+
+
+    def syncServerClock(
+        self,
+        host_url: str,
+        samples: int
+    ):
+
+        if not ServerClock.sync(host_url, samples):
+            self.showTrace("服务器时间校准失败, 将使用本地时间")
+            return
+        status = ServerClock.status()
+        self.showTrace(
+            f"服务器时间校准完成, 服务器时间比本地时间{"快" if status["offset"] >= 0 else "慢"} "\
+            f"{abs(status["offset"]):.3f} 秒 (误差 ±{status["error"]:.3f} 秒, "\
+            f"网络抖动 {status["jitter"]*1000:.0f} 毫秒)"
+        )
+
+
+    def updateClockOffsetLabel(
+        self
+    ):
+
+        status = ServerClock.status()
+        if not status["synced"]:
+            return
+        self.ClockOffsetLabel.setText(
+            f"服务器时间: {ServerClock.now().strftime("%H:%M:%S")} "\
+            f"(偏差 {status["offset"]:+.3f} 秒 ±{status["error"]:.3f})"
+        )
+
+
     def connectSignals(
         self
     ):
@@ -184,6 +286,9 @@ class ALMainWindow(QMainWindow, Ui_ALMainWindow):
         if self.__alConfigWidget:
             self.__alConfigWidget.close()
             # the config widget is already deleted in the 'self.onConfigWidgetClosed'
+        if self.__driver_pool:
+            self.__driver_pool.close()
+            self.__driver_pool = None
         super().closeEvent(event)
 
 
@@ -207,6 +312,7 @@ class ALMainWindow(QMainWindow, Ui_ALMainWindow):
 
         self.__msg_queue_timer = QTimer()
         self.__msg_queue_timer.timeout.connect(self.pollMsgQueue)
+        self.__msg_queue_timer.timeout.connect(self.updateClockOffsetLabel)
         self.__msg_queue_timer.start(100)
 
 
@@ -244,7 +350,8 @@ class ALMainWindow(QMainWindow, Ui_ALMainWindow):
                     timer_task,
                     self.__input_queue,
                     self.__output_queue,
-                    self.__config_paths
+                    self.__config_paths,
+                    self.__driver_pool
                 )
                 self.__current_timer_task_thread.finishedSignal_TimerWorker.connect(self.onTimerTaskFinished)
                 self.__current_timer_task_thread.start()
@@ -316,6 +423,9 @@ class ALMainWindow(QMainWindow, Ui_ALMainWindow):
             self.__alConfigWidget = None
         self.setControlButtons(True, None, None)
         self.__config_paths = config_paths
+        self.setupDriverPool()
+        self.setupServerClock()
+        self.setupOcrService()
 
     @Slot(dict)
     def onTimerTaskIsReady(
@@ -390,7 +500,8 @@ class ALMainWindow(QMainWindow, Ui_ALMainWindow):
             self.__auto_lib_thread = AutoLibWorker(
                 self.__input_queue,
                 self.__output_queue,
-                self.__config_paths
+                self.__config_paths,
+                self.__driver_pool
             )
             self.__auto_lib_thread.finishedSignal.connect(self.onStopButtonClicked)
             self.__auto_lib_thread.finishedWithErrorSignal.connect(self.onStopButtonClicked)
@@ -10,14 +10,21 @@ See the LICENSE file for details.
 import os
 import time
 import queue
+import asyncio
+
+from datetime import datetime
 
 from PySide6.QtCore import (
     Slot, Signal, QThread
 )
 
 from base.MsgBase import MsgBase
-from operators.AutoLib import AutoLib
+from operators.AutoLibRunner import AutoLibRunner
+from operators.AutoLibAsync import AutoLibAsync
+from operators.AutoLibSupervisor import AutoLibSupervisor
+from operators.DriverPool import DriverPool
 from utils.ConfigReader import ConfigReader
+from utils.ServerClock import ServerClock
 
 
 class AutoLibWorker(QThread, MsgBase):
@@ -29,19 +36,22 @@ class AutoLibWorker(QThread, MsgBase):
         self,
         input_queue: queue.Queue,
         output_queue: queue.Queue,
-        config_paths: dict
+        config_paths: dict,
+        driver_pool: DriverPool = None
     ):
 
         super().__init__(input_queue = input_queue, output_queue = output_queue)
 
         self.__config_paths = config_paths
+        self.__driver_pool = driver_pool
 
 
     def checkTimeAvailable(
         self,
     ) -> bool:
 
-        current_time = time.strftime("%H:%M", time.localtime())
+        # a pre-armed task is checked against the time it fires at
+        current_time = (self.prearmTime() or ServerClock.now()).strftime("%H:%M")
         if current_time >= "23:30" or current_time <= "07:30":
             self._showTrace(
                 "当前时间不在图书馆开放时间内, 请在 07:30 - 23:30 之间尝试"
@@ -90,11 +100,75 @@ class AutoLibWorker(QThread, MsgBase):
         return True
 
 
+    def prearmTime(
+        self
+    ) -> datetime:
+
+        """
+            Returns the time to fire the pre-armed reservations at, None if not pre-armed.
+        """
+        return None
+
+
+    def runGroups(
+        self,
+        groups: list
+    ) -> dict:
+
+        fire_time = self.prearmTime()
+        if fire_time is not None:
+            if self.__run_config["mode"].get("run_mode", 0)&0x1:
+                runner = AutoLibRunner(
+                    self._input_queue,
+                    self._output_queue,
+                    self.__run_config,
+                    self.__driver_pool
+                )
+                return runner.runPrearmed(groups, fire_time)
+            self._showTrace("未启用自动预约, 等待定时任务执行时间......")
+            while (remaining := (fire_time - ServerClock.now()).total_seconds()) > 0:
+                time.sleep(min(remaining, 0.5))
+        engine = self.__run_config.get("runner", {}).get("engine", "thread")
+        if engine == "async" and self.__run_config.get("backend", {}).get("type", "selenium") != "http":
+            # the async engine only drives http sessions, the browsers keep 'max_workers'
+            self._showTrace("异步引擎需要 HTTP 后端, 当前后端不是 HTTP, 改为使用多线程引擎运行")
+            engine = "thread"
+        if engine == "async":
+            # the event loop lives in this thread only for the duration of the run
+            users = []
+            for group in groups:
+                if not group["enabled"]:
+                    self._showTrace(f"任务组 {group["name"]} 已跳过")
+                    continue
+                users.extend(group.get("users", []))
+            engine = AutoLibAsync(
+                self._input_queue,
+                self._output_queue,
+                self.__run_config,
+                self.__driver_pool
+            )
+            return asyncio.run(engine.runUsers(users))
+        if engine == "process":
+            # the driver pool lives in this process, so it is not shared with the group processes
+            supervisor = AutoLibSupervisor(
+                self._input_queue,
+                self._output_queue,
+                self.__run_config
+            )
+            return supervisor.run(groups)
+        runner = AutoLibRunner(
+            self._input_queue,
+            self._output_queue,
+            self.__run_config,
+            self.__driver_pool
+        )
+        return runner.run(groups)
+
+
     def run(
         self
     ):
 
-        auto_lib = None
         self._showTrace("AutoLibrary 开始运行")
         if not self.checkTimeAvailable()\
         or not self.checkConfigPaths():
@@ -104,26 +178,13 @@ class AutoLibWorker(QThread, MsgBase):
             try:
                 if not self.loadConfigs():
                     raise Exception("配置文件加载失败")
-                auto_lib = AutoLib(
-                    self._input_queue,
-                    self._output_queue,
-                    self.__run_config
-                )
-                groups = self.__user_config.get("groups")
-                for group in groups:
-                    if not group["enabled"]:
-                        self._showTrace(f"任务组 {group["name"]} 已跳过")
-                        continue
-                    self._showTrace(f"正在运行任务组 {group["name"]}")
-                    auto_lib.run(
-                        { "users": group.get("users", []) }
-                    )
+                summary = self.runGroups(self.__user_config.get("groups"))
+                if summary["error"]:
+                    raise Exception("部分任务组运行失败")
             except Exception as e:
                 self._showTrace(f"AutoLibrary 运行时发生异常 : {e}")
                 self.finishedWithErrorSignal.emit()
                 return
-        if auto_lib:
-            auto_lib.close()
         self._showTrace("AutoLibrary 运行结束")
         self.finishedSignal.emit()
 
@@ -137,20 +198,36 @@ class TimerTaskWorker(AutoLibWorker):
         timer_task: dict,
         input_queue: queue.Queue,
         output_queue: queue.Queue,
-        config_paths: dict
+        config_paths: dict,
+        driver_pool: DriverPool = None
     ):
 
-        super().__init__(input_queue, output_queue, config_paths)
+        super().__init__(input_queue, output_queue, config_paths, driver_pool)
 
         self.__timer_task = timer_task
         self.finishedSignal.connect(self.onTimerTaskIsFinished)
         self.finishedWithErrorSignal.connect(self.onTimerTaskIsError)
 
+    def prearmTime(
+        self
+    ) -> datetime:
+
+        if self.__timer_task.get("prearm_lead", 0) > 0:
+            return self.__timer_task["execute_time"]
+        return None
+
+
     def run(
         self
     ):
 
-        self._showTrace(f"定时任务 {self.__timer_task['name']} 开始运行")
+        if self.prearmTime() is not None:
+            self._showTrace(
+                f"定时任务 {self.__timer_task['name']} 开始提前准备, "\
+                f"将在 {self.__timer_task["execute_time"].strftime("%H:%M:%S")} 提交预约"
+            )
+        else:
+            self._showTrace(f"定时任务 {self.__timer_task['name']} 开始运行")
         super().run()
 
     @Slot(dict)
@@ -20,6 +20,8 @@ from PySide6.QtGui import (
 )
 from gui.ALSeatFrame import ALSeatFrame
 
+from utils.SeatTopology import SeatTopology
+
 
 class ALSeatMapWidget(QWidget):
 
@@ -30,14 +32,14 @@ class ALSeatMapWidget(QWidget):
         parent: QWidget = None,
         floor: str = "",
         room: str = "",
-        seats_data: dict = {},
+        seat_topology: SeatTopology = None,
     ):
 
         super().__init__(parent)
 
         self.__floor = floor
         self.__room = room
-        self.__seats_data = seats_data
+        self.__seat_topology = seat_topology
         self.__selected_seats = []
         self.__seat_frames = {}
         self.setupUi()
@@ -48,11 +50,7 @@ class ALSeatMapWidget(QWidget):
         seat_number: str
     ) -> str:
 
-        if seat_number and not seat_number[-1].isdigit():
-            digits = seat_number[:-1]
-            letter = seat_number[-1]
-            return digits.zfill(3) + letter
-        return seat_number.zfill(3)
+        return SeatTopology.displaySeat(seat_number)
 
 
     def setupUi(
@@ -178,12 +176,17 @@ class ALSeatMapWidget(QWidget):
         self
     ):
 
-        rows = self.__seats_data.strip().split("\n")
-        for row_idx, row in enumerate(rows):
-            col_idx = 0
-            seats_number = [seat.strip() for seat in row.split(",")]
-            for seat_number in seats_number:
-                if seat_number:
+        if self.__seat_topology is None:
+            return
+        cells = {
+            self.__seat_topology.cellAt(index): self.__seat_topology.seatAt(index)
+            for index in range(len(self.__seat_topology))
+        }
+        row_count, col_count = self.__seat_topology.shape()
+        for row_idx in range(row_count):
+            for col_idx in range(col_count):
+                if (row_idx, col_idx) in cells:
+                    seat_number = self.formatSeatNumber(cells[(row_idx, col_idx)])
                     seat_widget = ALSeatFrame(seat_number)
                     seat_widget.clicked.connect(self.onSeatClicked)
                     self.SeatsContainerLayout.addWidget(seat_widget, row_idx, col_idx)
@@ -193,7 +196,6 @@ class ALSeatMapWidget(QWidget):
                     spacer.setFixedSize(20, 30)
                     spacer.setStyleSheet("background-color: transparent; border: none;")
                     self.SeatsContainerLayout.addWidget(spacer, row_idx, col_idx)
-                col_idx += 1
         self.SeatsContainerLayout.setSpacing(20)
         self.SeatsContainerLayout.setContentsMargins(20, 20, 20, 20)
         self.SeatsContainerWidget.adjustSize()
@@ -32,6 +32,7 @@ from gui.ALAddTimerTaskDialog import ALAddTimerTaskWidget, TimerTaskStatus
 
 from utils.ConfigReader import ConfigReader
 from utils.ConfigWriter import ConfigWriter
+from utils.ServerClock import ServerClock
 
 
 class SortPolicy(Enum):
@@ -73,6 +74,8 @@ class TimerTaskItemWidget(QWidget):
         self.TaskInfoLayout.addWidget(TaskNameLabel)
 
         ExecuteTimeStr = self.__timer_task["execute_time"].strftime("%Y-%m-%d %H:%M:%S")
+        if self.__timer_task.get("prearm_lead", 0) > 0:
+            ExecuteTimeStr += f" (提前 {self.__timer_task["prearm_lead"]} 秒准备)"
         ExecuteTimeLabel = QLabel(f"执行时间: {ExecuteTimeStr}")
         ExecuteTimeLabel.setStyleSheet("color: gray;")
         ExecuteTimeLabel.setFixedHeight(20)
@@ -220,6 +223,7 @@ class ALTimerTaskWidget(QWidget, Ui_ALTimerTaskWidget):
                     task["add_time"] = datetime.strptime(task["add_time"], "%Y-%m-%d %H:%M:%S")
                     task["execute_time"] = datetime.strptime(task["execute_time"], "%Y-%m-%d %H:%M:%S")
                     task["status"] = TimerTaskStatus(task["status"])
+                    task.setdefault("prearm_lead", 0)
                 return timer_tasks["timer_tasks"]
             raise Exception("定时任务配置文件格式错误")
         except Exception as e:
@@ -421,9 +425,12 @@ class ALTimerTaskWidget(QWidget, Ui_ALTimerTaskWidget):
 
         need_update = False
 
-        now = datetime.now()
+        # the tasks are scheduled on the server clock
+        now = ServerClock.now()
         for timer_task in self.__timer_tasks:
-            if timer_task["execute_time"] > now:
+            # a pre-armed task is handed out ahead of its execute time
+            prearm_lead = timedelta(seconds = timer_task.get("prearm_lead", 0))
+            if timer_task["execute_time"] - prearm_lead > now:
                 continue
             if timer_task["status"] is not TimerTaskStatus.PENDING:
                 continue
@@ -8,23 +8,23 @@ You may use, modify, and distribute this file under the terms of the MIT License
 See the LICENSE file for details.
 """
 import os
+import sys
 import queue
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.edge.service import Service
-
 from base.MsgBase import MsgBase
-from operators.LibChecker import LibChecker
-from operators.LibLogin import LibLogin
-from operators.LibLogout import LibLogout
-from operators.LibReserve import LibReserve
-from operators.LibCheckin import LibCheckin
-from operators.LibRenew import LibRenew
+from base.LibBackend import LibBackend, LibBackendFallback
+from operators.LibSeleniumBackend import LibSeleniumBackend
+from operators.LibHttpBackend import LibHttpBackend
+from operators.DriverPool import DriverPool
 
 from utils.ConfigReader import ConfigReader
+from utils.DriverFactory import DriverFactory
+from utils.OcrService import OcrService
+from utils.PageReadiness import PageReadiness
+from utils.ReserveHistoryStore import ReserveHistoryStore
+from utils.RoomCache import RoomCache
+from utils.SeatGroup import SeatGroup
+from utils.SessionCache import SessionCache
 
 
 class AutoLib(MsgBase):
@@ -33,84 +33,91 @@ class AutoLib(MsgBase):
         self,
         input_queue: queue.Queue,
         output_queue: queue.Queue,
-        run_config: dict
+        run_config: dict,
+        driver_pool: DriverPool = None,
+        room_cache: RoomCache = None
     ):
         super().__init__(input_queue, output_queue)
 
         self.__run_config = run_config
         self.__user_config = None
         self.__driver = None
-        if not self.__initBrowserDriver():
+        self.__driver_pool = driver_pool
+        # shared by the AutoLibs of the same run
+        self.__room_cache = room_cache or RoomCache()
+        self.__driver_broken = False
+        self.__selenium_backend = None
+        self.__http_backend = None
+        self.__armed = None
+        self.__armed_result = 1
+        # username -> SeatGroup of the users reserving together
+        self.__seat_groups = {}
+        self.__login_page = PageReadiness()\
+            .title("首页")\
+            .present("[name='username']", "用户名输入框")\
+            .present("[name='password']", "密码输入框")\
+            .present("[name='answer']", "验证码输入框")\
+            .present("#loadImgId", "验证码图片")
+        backend_config = self.__run_config.get("backend", {})
+        self.__backend_fallback = backend_config.get("fallback", True)
+        self.__session_cache = None
+        self.__initSessionCache()
+        self.__history_store = ReserveHistoryStore.fromConfig(self.__run_config)
+        ocr_config = self.__run_config.get("ocr", {})
+        OcrService.configure(
+            ocr_config.get("threads", 0),
+            ocr_config.get("top_k", 3),
+            ocr_config.get("min_confidence", 0.6),
+            ocr_config.get("preprocess", []),
+            ocr_config.get("variants", False)
+        )
+        if backend_config.get("type", "selenium") == "http":
+            # the browser is only started when the http backend falls back
+            self.__http_backend = LibHttpBackend(
+                self._input_queue, self._output_queue, self.__run_config,
+                self.__history_store
+            )
+            self._showTrace("使用 HTTP 后端")
+            return
+        if not self.__initSeleniumBackend():
             raise Exception("浏览器驱动初始化失败")
-        else:
-            if not self.__initDriverUrl():
-                raise Exception("浏览器驱动URL初始化失败")
-            self.__initLibOperators()
+
+
+    def __initSeleniumBackend(
+        self
+    ) -> bool:
+
+        if not self.__initBrowserDriver():
+            return False
+        if not self.__initDriverUrl():
+            self.close(broken=True)
+            self._showTrace("浏览器驱动URL初始化失败")
+            return False
+        self.__initLibOperators()
+        return True
 
 
     def __initBrowserDriver(
         self
     ) -> bool:
 
+        if self.__driver_pool:
+            self.__driver = self.__driver_pool.acquire()
+            if self.__driver:
+                return True
+            self._showTrace("未能从浏览器驱动池获取浏览器驱动, 尝试直接初始化......")
+            self.__driver_pool = None
         self._showTrace("正在初始化浏览器驱动......")
-        edge_options = webdriver.EdgeOptions()
-
         web_driver_config = self.__run_config.get("web_driver", None)
-        if not web_driver_config:
-            self._showTrace("未配置浏览器驱动参数 !")
-            return False
-        if web_driver_config.get("headless"):
-            edge_options.add_argument("--headless")
-            edge_options.add_argument("--disable-gpu")
-            edge_options.add_argument("--no-sandbox")
-            edge_options.add_argument("--disable-dev-shm-usage")
-
-        # must be 1920x1080, otherwise the page will cause some elements not accessible
-        edge_options.add_argument("--window-size=1920,1080")
-        edge_options.add_argument("--remote-allow-origins=*")
-
-        # omit ssl errors and verbose log level
-        edge_options.add_argument("--ignore-certificate-errors")
-        edge_options.add_argument("--ignore-ssl-errors")
-        edge_options.add_argument("--log-level=OFF")
-        edge_options.add_argument("--silent")
-
-        edge_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        edge_options.add_experimental_option("useAutomationExtension", False)
-        edge_options.add_argument("--disable-blink-features=AutomationControlled")
-        edge_options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "\
-            "AppleWebKit/537.36 (KHTML, like Gecko) "\
-            "Chrome/120.0.0.0 "\
-            "Safari/537.36 "\
-            "Edg/120.0.0.0"
-        )
-
-        # init browser driver
-        self.__driver_path = web_driver_config.get("driver_path")
-        self.__driver_type = web_driver_config.get("driver_type")
-        self.__driver_path = os.path.abspath(self.__driver_path)
         try:
-            service = None
-            if self.__driver_path:
-                service = Service(executable_path=self.__driver_path)
-            match self.__driver_type.lower():
-                case "edge":
-                    self.__driver = webdriver.Edge(service=service, options=edge_options)
-                case "chrome":
-                    self.__driver = webdriver.Chrome(service=service, options=edge_options)
-                case "firefox":
-                    self.__driver = webdriver.Firefox(service=service, options=edge_options)
-                case _:
-                    raise Exception(f"不支持的浏览器驱动类型: {self.__driver_type}")
-            self.__driver.implicitly_wait(1)
-            self.__driver.execute_script(
-                "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
-            )
+            self.__driver = DriverFactory.createDriver(web_driver_config)
         except Exception as e:
             self._showTrace(f"浏览器驱动初始化失败: {e}")
             return False
-        self._showTrace(f"浏览器驱动已初始化, 类型: {self.__driver_type}, 路径: {self.__driver_path}")
+        self._showTrace(
+            f"浏览器驱动已初始化, 类型: {web_driver_config.get("driver_type")}, "\
+            f"路径: {os.path.abspath(web_driver_config.get("driver_path"))}"
+        )
         return True
 
 
@@ -121,12 +128,11 @@ class AutoLib(MsgBase):
         if not self.__driver:
             self._showTrace(f"浏览器驱动未初始化, 请先初始化浏览器驱动 !")
             return
-        self.__lib_checker = LibChecker(self._input_queue, self._output_queue, self.__driver)
-        self.__lib_login = LibLogin(self._input_queue, self._output_queue, self.__driver)
-        self.__lib_logout = LibLogout(self._input_queue, self._output_queue, self.__driver)
-        self.__lib_reserve = LibReserve(self._input_queue, self._output_queue, self.__driver)
-        self.__lib_checkin = LibCheckin(self._input_queue, self._output_queue, self.__driver)
-        self.__lib_renew = LibRenew(self._input_queue, self._output_queue, self.__driver)
+        self.__selenium_backend = LibSeleniumBackend(
+            self._input_queue, self._output_queue, self.__driver,
+            self.__history_store, self.__run_config.get("seat_fallback", {}),
+            self.__room_cache, self.__run_config.get("room_link", {})
+        )
 
 
     def __waitResponseLoad(
@@ -134,26 +140,11 @@ class AutoLib(MsgBase):
     ) -> bool:
 
         # wait for page load
-        try:
-            WebDriverWait(self.__driver, 2).until( # title contains "首页"
-                EC.title_contains("首页")
-            )
-            WebDriverWait(self.__driver, 2).until( # username field presence
-                EC.presence_of_element_located((By.NAME, "username"))
-            )
-            WebDriverWait(self.__driver, 2).until( # password field presence
-                EC.presence_of_element_located((By.NAME, "password"))
-            )
-            WebDriverWait(self.__driver, 2).until( # captcha field presence
-                EC.presence_of_element_located((By.NAME, "answer"))
-            )
-            WebDriverWait(self.__driver, 2).until( # captcha image presence
-                EC.presence_of_element_located((By.ID, "loadImgId"))
-            )
-            return True
-        except:
-            self._showTrace(f"登录页面加载失败 !")
+        missing = self.__login_page.wait(self.__driver, 2)
+        if missing:
+            self._showTrace(f"登录页面加载失败 ! : 未找到 {", ".join(missing)}")
             return False
+        return True
 
 
     def __initDriverUrl(
@@ -165,14 +156,159 @@ class AutoLib(MsgBase):
             self._showError("未配置图书馆参数 !")
             return False
         url = lib_config.get("host_url") + lib_config.get("login_url")
+        # the driver from the pool is already parked on the login page
+        if self.__driver.current_url == url and self.__waitResponseLoad():
+            return True
         self.__driver.get(url)
         if not self.__waitResponseLoad():
             return False
         return True
 
 
+    def __initSessionCache(
+        self
+    ):
+
+        cache_config = self.__run_config.get("session_cache", {})
+        if not cache_config.get("enabled", False):
+            return
+        cache_path = cache_config.get("path", "")
+        if not cache_path:
+            cache_path = os.path.join(os.path.dirname(sys.executable), "session_cache.json")
+        lib_config = self.__run_config.get("library", {})
+        self.__session_host = lib_config.get("host_url", "")
+        self.__session_check_url = self.__session_host + cache_config.get("check_url", "/")
+        self.__session_cache = SessionCache(cache_path)
+
+
+    def __login(
+        self,
+        backend: LibBackend,
+        username: str,
+        password: str,
+        login_config: dict
+    ) -> bool:
+
+        if self.__session_cache:
+            cookies = self.__session_cache.load(self.__session_host, username)
+            if cookies:
+                self._showTrace(f"正在复用用户 {username} 的登录会话......")
+                if backend.resumeSession(username, cookies, self.__session_check_url):
+                    self._showTrace(f"用户 {username} 登录会话有效, 跳过登录")
+                    return True
+                self._showTrace(f"用户 {username} 登录会话已过期, 重新登录")
+                self.__session_cache.remove(self.__session_host, username)
+                backend.dropSession()
+                # the check page is left in the browser, go back to the login page
+                if backend is self.__selenium_backend and not self.__initDriverUrl():
+                    return False
+        if not backend.login(
+            username,
+            password,
+            login_config.get("max_attempt", 3),
+            login_config.get("auto_captcha", True),
+        ):
+            return False
+        if self.__session_cache:
+            self.__session_cache.save(self.__session_host, username, backend.sessionCookies())
+        return True
+
+
+    def __logout(
+        self,
+        backend: LibBackend,
+        username: str
+    ) -> bool:
+
+        """
+            Returns False if the browser can not be brought back to the login page.
+        """
+        if self.__session_cache:
+            # keep the session on the server for the next run, only forget it here
+            self.__session_cache.save(self.__session_host, username, backend.sessionCookies())
+            backend.dropSession()
+            self._showTrace(f"用户 {username} 登录会话已保存")
+            if backend is self.__selenium_backend:
+                return self.__initDriverUrl()
+            return True
+        if not backend.logout(
+            username
+        ) and backend is self.__selenium_backend:
+            # if logout is failed, we must make sure the host to be reloaded
+            # otherwise, the next login may fail
+            return self.__initDriverUrl()
+        return True
+
+
+    def __initSeatGroups(
+        self,
+        users: list
+    ):
+
+        """
+            Group the enabled users reserving the same room on the same date,
+            in their order, by at most 'max_size' users.
+        """
+        self.__seat_groups = {}
+        group_config = self.__run_config.get("group_seats", {})
+        if not group_config.get("enabled", False):
+            return
+        if not self.__run_config["mode"].get("run_mode", 0)&0x1:
+            return
+        max_size = min(max(2, group_config.get("max_size", 4)), 4)
+        rooms = {}
+        for user in users:
+            reserve_info = user.get("reserve_info", {})
+            if not user["enabled"] or not reserve_info.get("room"):
+                continue
+            key = (reserve_info.get("date"), reserve_info.get("floor"), reserve_info["room"])
+            rooms.setdefault(key, []).append(user)
+        for (_, _, room), room_users in rooms.items():
+            for begin in range(0, len(room_users), max_size):
+                members = room_users[begin:begin + max_size]
+                if len(members) < 2:
+                    continue
+                group = SeatGroup(
+                    [user["username"] for user in members], room,
+                    members[0]["reserve_info"].get("seat_id")
+                )
+                for user in members:
+                    self.__seat_groups[user["username"]] = group
+                self._showTrace(f"用户 {", ".join(group.usernames())} 将预约相邻的座位")
+
+
+    def __reserve(
+        self,
+        backend: LibBackend,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        group = self.__seat_groups.get(username)
+        if group is None:
+            return backend.reserve(username, reserve_info)
+        if not backend.prepareReserve(username, reserve_info):
+            group.release(username)
+            return False
+        seat_id = group.assign(username, backend.roomSnapshot(reserve_info))
+        if seat_id is None:
+            self._showTrace(
+                f"未能为用户 {username} 所在的小组找到相邻的空闲座位, 使用原定座位 {reserve_info["seat_id"]}"
+            )
+            return backend.commitReserve(username, reserve_info)
+        self._showTrace(f"小组座位分配: 用户 {username} 预约座位 {seat_id}")
+        # the seat of the user in the config is left as it is
+        reserved = backend.commitReserve(username, {**reserve_info, "seat_id": seat_id})
+        if reserved:
+            group.confirm(username)
+        else:
+            group.release(username)
+        return reserved
+
+
     def __run(
         self,
+        backend: LibBackend,
         username: str,
         password: str,
         login_config: dict,
@@ -184,12 +320,7 @@ class AutoLib(MsgBase):
         result = 2
 
         # login
-        if not self.__lib_login.login(
-            username,
-            password,
-            login_config.get("max_attempt", 3),
-            login_config.get("auto_captcha", True),
-        ):
+        if not self.__login(backend, username, password, login_config):
             return 1
         """
             Here, we collect the run mode from the run config.
@@ -202,8 +333,8 @@ class AutoLib(MsgBase):
         }
         # reserve
         if run_mode["auto_reserve"]:
-            if self.__lib_checker.canReserve(reserve_info.get("date")):
-                if self.__lib_reserve.reserve(username, reserve_info):
+            if backend.canReserve(reserve_info.get("date")):
+                if self.__reserve(backend, username, reserve_info):
                     result = 0
                 else:
                     result = 1
@@ -212,8 +343,8 @@ class AutoLib(MsgBase):
                 result = 2
         # checkin
         if run_mode["auto_checkin"] and result == 2:
-            if self.__lib_checker.canCheckin():
-                if self.__lib_checkin.checkin(username):
+            if backend.canCheckin():
+                if backend.checkin(username):
                     result = 0
                 else:
                     result = 1
@@ -222,9 +353,9 @@ class AutoLib(MsgBase):
                 result = 2
         # renewal
         if run_mode["auto_renewal"] and result == 2:
-            if record := self.__lib_checker.canRenew():
-                if self.__lib_renew.renew(username, record, reserve_info):
-                    if self.__lib_checker.postRenewCheck(record):
+            if record := backend.canRenew():
+                if backend.renew(username, record, reserve_info):
+                    if backend.postRenewCheck(record):
                         result = 0
                     else:
                         result = 1
@@ -234,27 +365,166 @@ class AutoLib(MsgBase):
                 self._showTrace(f"用户 {username} 无法续约，已跳过")
                 result = 2
         # logout
-        if not self.__lib_logout.logout(
-            username
-        ):
-            # if logout is failed, we must make sure the host to be reloaded
-            # otherwise, the next login may fail
-            if not self.__initDriverUrl():
+        if not self.__logout(backend, username):
+            return -1
+        return result
+
+
+    def __runUser(
+        self,
+        user: dict
+    ) -> int:
+
+        run_args = {
+            "username": user["username"],
+            "password": user["password"],
+            "login_config": self.__run_config["login"],
+            "run_mode_config": self.__run_config["mode"],
+            "reserve_info": user["reserve_info"],
+        }
+        # the renewal is only done by the browser, start there rather than log in twice
+        renew_on_browser = self.__backend_fallback and\
+            self.__run_config["mode"].get("run_mode", 0)&0x4
+        if self.__http_backend and not renew_on_browser:
+            try:
+                return self.__run(self.__http_backend, **run_args)
+            except LibBackendFallback as e:
+                self._showTrace(f"HTTP 后端无法完成用户 {user["username"]} 的操作 : {e}")
+            except Exception as e:
+                self._showTrace(f"HTTP 后端请求发生异常 : {e}")
+            # the http session may be left logged in, drop it before the browser takes over
+            self.__http_backend.logout(user["username"])
+            if not self.__backend_fallback:
+                return 1
+            self._showTrace("正在切换至浏览器继续处理......")
+        if self.__http_backend and not self.__selenium_backend and not self.__initSeleniumBackend():
+            return -1
+        return self.__run(self.__selenium_backend, **run_args)
+
+
+    def __prearm(
+        self,
+        backend: LibBackend,
+        user: dict
+    ) -> int:
+
+        """
+            Log the user in and park the backend right before the seat selection.
+
+            Returns -1 if armed, otherwise the result of the user.
+        """
+        username = user["username"]
+        reserve_info = user["reserve_info"]
+        login_config = self.__run_config["login"]
+        if not self.__login(backend, username, user["password"], login_config):
+            return 1
+        if not backend.canReserve(reserve_info.get("date")):
+            self.__logout(backend, username)
+            if self.__run_config["mode"].get("run_mode", 0) & ~0x1:
+                # nothing to arm, the check-in or renewal runs as usual when fired
+                self.__armed = {"user": user, "backend": None, "prepared": False}
+                self._showTrace(f"用户 {username} 无法预约, 将在预约开始时按运行模式处理")
                 return -1
+            self._showTrace(f"用户 {username} 无法预约，已跳过")
+            return 2
+        # the date may not be open yet, then the whole reservation is done when fired
+        prepared = backend.prepareReserve(username, reserve_info)
+        self.__armed = {"user": user, "backend": backend, "prepared": prepared}
+        self._showTrace(
+            f"用户 {username} 已登录{"并停留在预约选座页面" if prepared else ""}, 等待预约开始......"
+        )
+        return -1
+
+
+    def prearm(
+        self,
+        user: dict
+    ) -> bool:
+
+        """
+            Prepare the reservation of the user ahead of time, call 'fire' to submit it.
+
+            Returns True if the user is armed.
+        """
+        self.__armed = None
+        self.__armed_result = 1
+        if self.__http_backend:
+            try:
+                self.__armed_result = self.__prearm(self.__http_backend, user)
+                return self.__armed is not None
+            except Exception as e:
+                self._showTrace(f"HTTP 后端无法预先准备用户 {user["username"]} 的预约 : {e}")
+                self.__http_backend.logout(user["username"])
+                if not self.__backend_fallback:
+                    return False
+            if not self.__selenium_backend and not self.__initSeleniumBackend():
+                return False
+        self.__armed_result = self.__prearm(self.__selenium_backend, user)
+        return self.__armed is not None
+
+
+    def fire(
+        self
+    ) -> int:
+
+        """
+            Submit the reservation prepared by 'prearm', returns the result of the user.
+        """
+        armed, self.__armed = self.__armed, None
+        if armed is None:
+            return self.__armed_result
+        backend, user = armed["backend"], armed["user"]
+        if backend is None:
+            return self.__runUser(user)
+        username = user["username"]
+        reserve_info = user["reserve_info"]
+        try:
+            if armed["prepared"]:
+                reserved = backend.commitReserve(username, reserve_info)
+            else:
+                reserved = backend.reserve(username, reserve_info)
+        except Exception as e:
+            if backend is not self.__http_backend:
+                raise
+            self._showTrace(f"HTTP 后端无法完成用户 {username} 的预约 : {e}")
+            self.__http_backend.logout(username)
+            if not self.__backend_fallback:
+                return 1
+            if not self.__selenium_backend and not self.__initSeleniumBackend():
+                return -1
+            return self.__run(
+                self.__selenium_backend,
+                username=username,
+                password=user["password"],
+                login_config=self.__run_config["login"],
+                run_mode_config={"run_mode": 0x1},
+                reserve_info=reserve_info
+            )
+        result = 0 if reserved else 1
+        if not self.__logout(backend, username):
+            return -1
         return result
 
 
     def run(
         self,
-        user_config: dict
-    ):
+        user_config: dict,
+        on_result: callable = None,
+        on_start: callable = None
+    ) -> dict:
 
+        """
+            Run the users in order, 'on_start' is called with (index) before an
+            enabled user is processed and 'on_result' with (index, result) after
+            each user is processed.
+        """
         self.__user_config = user_config
 
         user_counter = {"current": 0, "success": 0, "failed": 0, "passed": 0}
         users = self.__user_config["users"]
         self._showTrace(f"共发现 {len(users)} 个用户")
-        for user in users:
+        self.__initSeatGroups(users)
+        for index, user in enumerate(users):
             user_counter["current"] += 1
             self._showTrace(
                 f"正在处理第 {user_counter["current"]}/{len(users)} 个用户: {user["username"]}......"
@@ -262,15 +532,16 @@ class AutoLib(MsgBase):
             if not user["enabled"]:
                 self._showTrace(f"用户 {user["username"]} 已跳过")
                 user_counter["passed"] += 1
+                if on_result:
+                    on_result(index, 2)
                 continue
-            r = self.__run(
-                username=user["username"],
-                password=user["password"],
-                login_config=self.__run_config["login"],
-                run_mode_config=self.__run_config["mode"],
-                reserve_info=user["reserve_info"],
-            )
+            if on_start:
+                on_start(index)
+            r = self.__runUser(user)
+            if on_result:
+                on_result(index, r)
             if r == -1:
+                self.__driver_broken = True
                 self._showTrace(
                     f"用户 {user["username"]} 处理过程中页面发生异常，无法继续操作, 任务已终止 !"
                 )
@@ -286,18 +557,29 @@ class AutoLib(MsgBase):
             f"失败 {user_counter["failed"]} 个用户, "\
             f"跳过 {user_counter["passed"]} 个用户"
         )
-        return
+        return user_counter
 
 
     def close(
-        self
+        self,
+        broken: bool = False
     ) -> bool:
 
+        if self.__http_backend:
+            self.__http_backend.close()
         if self.__driver:
+            if self.__driver_pool:
+                self.__driver_pool.release(
+                    self.__driver,
+                    broken or self.__driver_broken
+                )
+                self.__driver = None
+                self._showTrace(f"浏览器驱动已归还至浏览器驱动池")
+                return True
             self.__driver.quit()
             self.__driver = None
             self._showTrace(f"浏览器驱动已关闭")
             return True
-        else:
+        elif not self.__http_backend:
             self._showTrace(f"浏览器驱动未初始化, 无需关闭")
-            return False
\ No newline at end of file
+        return False
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import copy
+import queue
+import asyncio
+import functools
+
+from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+
+from base.MsgBase import MsgBase
+from base.LibBackend import LibBackend, LibBackendFallback
+from operators.AutoLib import AutoLib
+from operators.LibHttpBackend import LibHttpBackend
+from operators.DriverPool import DriverPool
+
+
+class SessionState(Enum):
+
+    LOGIN = 0
+    CHECK = 1
+    ACTION = 2
+    LOGOUT = 3
+    DONE = 4
+
+
+class AutoLibAsync(MsgBase):
+
+    MODE_NAMES = {
+        "reserve": "预约",
+        "checkin": "签到",
+        "renew": "续约"
+    }
+
+    def __init__(
+        self,
+        input_queue: queue.Queue,
+        output_queue: queue.Queue,
+        run_config: dict,
+        driver_pool: DriverPool = None
+    ):
+
+        super().__init__(input_queue, output_queue)
+
+        self.__run_config = run_config
+        self.__driver_pool = driver_pool
+        runner_config = self.__run_config.get("runner", {})
+        # 'max_sessions' is the number of user sessions in flight at the same time,
+        # each of them holds one http backend (one keep-alive connection pool)
+        self.__max_sessions = max(1, int(runner_config.get("max_sessions", 8)))
+        backend_config = self.__run_config.get("backend", {})
+        if backend_config.get("type", "selenium") != "http":
+            # the sessions are http only, the browser runs go through AutoLibRunner
+            raise ValueError("异步引擎需要 HTTP 后端, 请将 backend 项的 type 设置为 http")
+        self.__fallback = backend_config.get("fallback", True)
+        self.__executor = None
+
+
+    async def __call(
+        self,
+        func,
+        *args
+    ):
+
+        # the backend requests block, so they are run off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.__executor, functools.partial(func, *args)
+        )
+
+
+    def __runModes(
+        self
+    ) -> list:
+
+        run_mode = self.__run_config["mode"].get("run_mode", 0)
+        modes = []
+        if run_mode&0x1:
+            modes.append("reserve")
+        if run_mode&0x2:
+            modes.append("checkin")
+        if run_mode&0x4:
+            modes.append("renew")
+        return modes
+
+
+    def __checkMode(
+        self,
+        backend: LibBackend,
+        mode: str,
+        reserve_info: dict
+    ):
+
+        # returns the argument of the action, or None if the action can not be done
+        if mode == "reserve":
+            return True if backend.canReserve(reserve_info.get("date")) else None
+        if mode == "checkin":
+            return True if backend.canCheckin() else None
+        record = backend.canRenew()
+        if record is not None:
+            # the http backend can not renew, hand the user to the browser before any action
+            raise LibBackendFallback("续约暂不支持 HTTP 方式")
+        return None
+
+
+    def __doMode(
+        self,
+        backend: LibBackend,
+        mode: str,
+        username: str,
+        reserve_info: dict,
+        argument
+    ) -> int:
+
+        if mode == "reserve":
+            return 0 if backend.reserve(username, reserve_info) else 1
+        if mode == "checkin":
+            return 0 if backend.checkin(username) else 1
+        if not backend.renew(username, argument, reserve_info):
+            return 1
+        return 0 if backend.postRenewCheck(argument) else 1
+
+
+    async def __runSession(
+        self,
+        user: dict,
+        backends: asyncio.Queue
+    ) -> int:
+
+        """
+            Drive one user through login -> check -> action -> logout.
+
+            Returns the same result as AutoLib, or None if the user has to be
+            handled by the browser.
+        """
+        username = user["username"]
+        reserve_info = user["reserve_info"]
+        login_config = self.__run_config["login"]
+        modes = self.__runModes()
+        backend = await backends.get()
+        state = SessionState.LOGIN
+        result = 2
+        mode = argument = None
+        try:
+            while state != SessionState.DONE:
+                if state == SessionState.LOGIN:
+                    if await self.__call(
+                        backend.login,
+                        username,
+                        user["password"],
+                        login_config.get("max_attempt", 3),
+                        login_config.get("auto_captcha", True)
+                    ):
+                        state = SessionState.CHECK
+                    else:
+                        result = 1
+                        state = SessionState.DONE
+                elif state == SessionState.CHECK:
+                    # the next run mode is only tried when the previous one is passed
+                    if result != 2 or not modes:
+                        state = SessionState.LOGOUT
+                        continue
+                    mode = modes.pop(0)
+                    argument = await self.__call(self.__checkMode, backend, mode, reserve_info)
+                    if argument is None:
+                        self._showTrace(f"用户 {username} 无法{self.MODE_NAMES[mode]}，已跳过")
+                    else:
+                        state = SessionState.ACTION
+                elif state == SessionState.ACTION:
+                    result = await self.__call(
+                        self.__doMode, backend, mode, username, reserve_info, argument
+                    )
+                    state = SessionState.CHECK
+                elif state == SessionState.LOGOUT:
+                    await self.__call(backend.logout, username)
+                    state = SessionState.DONE
+        except Exception as e:
+            if isinstance(e, LibBackendFallback):
+                self._showTrace(f"HTTP 后端无法完成用户 {username} 的操作 : {e}")
+            else:
+                self._showTrace(f"用户 {username} 处理时发生异常 : {e}")
+            await self.__call(backend.logout, username)
+            # only a user nothing was done for is run again by the browser,
+            # an action may have gone through before it failed
+            if isinstance(e, LibBackendFallback) and state in (SessionState.LOGIN, SessionState.CHECK):
+                return None
+            return 1
+        finally:
+            backends.put_nowait(backend)
+        return result
+
+
+    async def __runSessions(
+        self,
+        users: list
+    ) -> list:
+
+        # the results of the users over 'max_sessions' http backends
+        sessions = min(self.__max_sessions, len(users))
+        self._showTrace(f"共 {len(users)} 个用户, 同时运行 {sessions} 个会话")
+        self.__executor = ThreadPoolExecutor(max_workers=sessions)
+        backends = asyncio.Queue()
+        try:
+            for _ in range(sessions):
+                backends.put_nowait(await self.__call(
+                    LibHttpBackend, self._input_queue, self._output_queue, self.__run_config
+                ))
+            results = await asyncio.gather(*(
+                self.__runSession(user, backends) for user in users
+            ))
+        finally:
+            while not backends.empty():
+                backends.get_nowait().close()
+            self.__executor.shutdown(wait=False)
+            self.__executor = None
+        return results
+
+
+    def __runOnBrowser(
+        self,
+        users: list
+    ) -> dict:
+
+        run_config = copy.deepcopy(self.__run_config)
+        run_config.setdefault("backend", {})["type"] = "selenium"
+        auto_lib = AutoLib(
+            self._input_queue,
+            self._output_queue,
+            run_config,
+            self.__driver_pool
+        )
+        try:
+            return auto_lib.run({ "users": users })
+        finally:
+            auto_lib.close()
+
+
+    async def runUsers(
+        self,
+        users: list
+    ) -> dict:
+
+        summary = {"total": len(users), "success": 0, "failed": 0, "passed": 0, "error": False}
+        enabled_users = [user for user in users if user["enabled"]]
+        summary["passed"] = len(users) - len(enabled_users)
+        if not enabled_users:
+            self._showTrace("没有需要运行的用户")
+            return summary
+        results = await self.__runSessions(enabled_users)
+        fallback_users = []
+        for user, result in zip(enabled_users, results):
+            if result == 0:
+                summary["success"] += 1
+            elif result == 2:
+                summary["passed"] += 1
+            elif result is None and self.__fallback:
+                fallback_users.append(user)
+            else:
+                summary["failed"] += 1
+        if fallback_users:
+            self._showTrace(f"{len(fallback_users)} 个用户正在切换至浏览器继续处理......")
+            try:
+                counter = await asyncio.to_thread(self.__runOnBrowser, fallback_users)
+                summary["success"] += counter["success"]
+                summary["failed"] += counter["failed"]
+                summary["passed"] += counter["passed"]
+            except Exception as e:
+                self._showTrace(f"浏览器处理时发生异常 : {e}")
+                summary["failed"] += len(fallback_users)
+                summary["error"] = True
+        self._showTrace(f"全部用户处理完成, 共计 {summary["total"]} 个用户, "\
+            f"成功 {summary["success"]} 个用户, "\
+            f"失败 {summary["failed"]} 个用户, "\
+            f"跳过 {summary["passed"]} 个用户"
+        )
+        return summary
@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import time
+import queue
+import threading
+
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from base.MsgBase import MsgBase
+from operators.AutoLib import AutoLib
+from operators.DriverPool import DriverPool
+
+from utils.RoomCache import RoomCache
+from utils.ServerClock import ServerClock
+
+
+class AutoLibRunner(MsgBase):
+
+    def __init__(
+        self,
+        input_queue: queue.Queue,
+        output_queue: queue.Queue,
+        run_config: dict,
+        driver_pool: DriverPool = None
+    ):
+
+        super().__init__(input_queue, output_queue)
+
+        self.__run_config = run_config
+        self.__driver_pool = driver_pool
+        runner_config = self.__run_config.get("runner", {})
+        # 'max_workers' is the number of browser drivers running at the same time,
+        # 'shard_size' splits a large group into several jobs (0 - never split),
+        # 'prearm_workers' is the number of users armed together (0 - all of them)
+        self.__max_workers = max(1, int(runner_config.get("max_workers", 1)))
+        self.__shard_size = max(0, int(runner_config.get("shard_size", 0)))
+        self.__prearm_workers = max(0, int(runner_config.get("prearm_workers", 0)))
+        self.__summary_lock = threading.Lock()
+
+
+    def __splitJobs(
+        self,
+        groups: list
+    ) -> list:
+
+        jobs = []
+        for group in groups:
+            if not group["enabled"]:
+                self._showTrace(f"任务组 {group["name"]} 已跳过")
+                continue
+            users = group.get("users", [])
+            if self.__shard_size == 0 or len(users) <= self.__shard_size:
+                jobs.append({ "name": group["name"], "users": users })
+                continue
+            for begin in range(0, len(users), self.__shard_size):
+                jobs.append({
+                    "name": f"{group["name"]}-{begin//self.__shard_size + 1}",
+                    "users": users[begin:begin + self.__shard_size]
+                })
+        return jobs
+
+
+    def __mergeSummary(
+        self,
+        summary: dict,
+        counter: dict
+    ):
+
+        with self.__summary_lock:
+            summary["total"] += counter["current"]
+            summary["success"] += counter["success"]
+            summary["failed"] += counter["failed"]
+            summary["passed"] += counter["passed"]
+
+
+    def __failedCounter(
+        self,
+        users: list
+    ) -> dict:
+
+        enabled = sum(1 for user in users if user["enabled"])
+        return {
+            "current": len(users),
+            "success": 0,
+            "failed": enabled,
+            "passed": len(users) - enabled
+        }
+
+
+    def __runJobs(
+        self,
+        jobs: queue.Queue,
+        summary: dict,
+        room_cache: RoomCache
+    ):
+
+        # each worker thread owns one AutoLib (one browser driver),
+        # and keeps it for all the jobs it takes from the queue
+        auto_lib = None
+        try:
+            while True:
+                try:
+                    job = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    if auto_lib is None:
+                        auto_lib = AutoLib(
+                            self._input_queue,
+                            self._output_queue,
+                            self.__run_config,
+                            self.__driver_pool,
+                            room_cache
+                        )
+                    self._showTrace(f"正在运行任务组 {job["name"]}")
+                    counter = auto_lib.run({ "users": job["users"] })
+                except Exception as e:
+                    self._showTrace(f"任务组 {job["name"]} 运行时发生异常 : {e}")
+                    with self.__summary_lock:
+                        summary["error"] = True
+                    self.__mergeSummary(summary, self.__failedCounter(job["users"]))
+                    # the driver may be broken, start a new one for the next job
+                    if auto_lib:
+                        auto_lib.close(broken=True)
+                        auto_lib = None
+                    continue
+                self.__mergeSummary(summary, counter)
+        finally:
+            if auto_lib:
+                auto_lib.close()
+
+
+    def run(
+        self,
+        groups: list
+    ) -> dict:
+
+        summary = {"total": 0, "success": 0, "failed": 0, "passed": 0, "error": False}
+        jobs = self.__splitJobs(groups)
+        if not jobs:
+            self._showTrace("没有需要运行的任务组")
+            return summary
+        job_queue = queue.Queue()
+        for job in jobs:
+            job_queue.put(job)
+        workers = min(self.__max_workers, len(jobs))
+        self._showTrace(f"共 {len(jobs)} 个任务, 使用 {workers} 个浏览器驱动并行运行")
+        # the users of the run share what they learn about the rooms
+        room_cache = RoomCache()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self.__runJobs, job_queue, summary, room_cache)
+                for _ in range(workers)
+            ]
+            for future in futures:
+                future.result()
+        self._showTrace(f"全部任务处理完成, 共计 {summary["total"]} 个用户, "\
+            f"成功 {summary["success"]} 个用户, "\
+            f"失败 {summary["failed"]} 个用户, "\
+            f"跳过 {summary["passed"]} 个用户"
+        )
+        return summary
+
+
+    def __prearmUser(
+        self,
+        user: dict,
+        fire_event: threading.Event,
+        summary: dict,
+        room_cache: RoomCache
+    ):
+
+        # every armed user keeps its own AutoLib (browser driver) until fired
+        auto_lib = None
+        result = 1
+        try:
+            auto_lib = AutoLib(
+                self._input_queue,
+                self._output_queue,
+                self.__run_config,
+                self.__driver_pool,
+                room_cache
+            )
+            auto_lib.prearm(user)
+            fire_event.wait()
+            result = auto_lib.fire()
+        except Exception as e:
+            self._showTrace(f"用户 {user["username"]} 预约时发生异常 : {e}")
+            with self.__summary_lock:
+                summary["error"] = True
+            result = -1
+        finally:
+            if auto_lib:
+                auto_lib.close(broken=result == -1)
+        self.__mergeSummary(summary, {
+            "current": 1,
+            "success": int(result == 0),
+            "failed": int(result in (1, -1)),
+            "passed": int(result == 2)
+        })
+
+
+    def runPrearmed(
+        self,
+        groups: list,
+        fire_time: datetime
+    ) -> dict:
+
+        """
+            Log all the users in before 'fire_time', and submit all the
+            reservations at the same moment of 'fire_time'.
+        """
+        summary = {"total": 0, "success": 0, "failed": 0, "passed": 0, "error": False}
+        users = []
+        for job in self.__splitJobs(groups):
+            for user in job["users"]:
+                if user["enabled"]:
+                    users.append(user)
+                else:
+                    self.__mergeSummary(summary, self.__failedCounter([user]))
+        if not users:
+            self._showTrace("没有需要运行的用户")
+            return summary
+        # every armed user holds a browser driver, at most 'prearm_workers' of them and
+        # no more than the pool keeps, the others run as usual after the armed ones are fired
+        prearm_workers = self.__prearm_workers or len(users)
+        if self.__driver_pool:
+            prearm_workers = min(prearm_workers, self.__driver_pool.size())
+        users, unarmed = users[:prearm_workers], users[prearm_workers:]
+        self._showTrace(
+            f"共 {len(users)} 个用户, 将在 {fire_time.strftime("%H:%M:%S")} 同时提交预约"
+        )
+        if unarmed:
+            self._showTrace(
+                f"同时预先准备的用户数量上限为 {prearm_workers}, 以下用户将在提交后依次运行: "\
+                f"{", ".join(user["username"] for user in unarmed)}"
+            )
+        fire_event = threading.Event()
+        room_cache = RoomCache()
+        with ThreadPoolExecutor(max_workers=len(users)) as executor:
+            futures = [
+                executor.submit(self.__prearmUser, user, fire_event, summary, room_cache)
+                for user in users
+            ]
+            # sleep coarsely first, then in short steps, and only spin on the
+            # last 2 milliseconds, the fire time is on the server clock
+            while (remaining := (fire_time - ServerClock.now()).total_seconds()) > 0.002:
+                time.sleep(min(remaining - 0.05, 0.5) if remaining > 0.05 else 0.001)
+            while ServerClock.now() < fire_time:
+                pass
+            self._showTrace("预约开始, 正在提交全部用户的预约......")
+            fire_event.set()
+            for future in futures:
+                future.result()
+        if unarmed:
+            job_queue = queue.Queue()
+            for user in unarmed:
+                job_queue.put({ "name": user["username"], "users": [user] })
+            workers = min(self.__max_workers, len(unarmed))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(self.__runJobs, job_queue, summary, room_cache)
+                    for _ in range(workers)
+                ]
+                for future in futures:
+                    future.result()
+        self._showTrace(f"全部任务处理完成, 共计 {summary["total"]} 个用户, "\
+            f"成功 {summary["success"]} 个用户, "\
+            f"失败 {summary["failed"]} 个用户, "\
+            f"跳过 {summary["passed"]} 个用户"
+        )
+        return summary
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import sys
+import time
+import queue
+import multiprocessing
+
+from base.MsgBase import MsgBase
+from operators.AutoLib import AutoLib
+
+
+class AutoLibSupervisor(MsgBase):
+
+    def __init__(
+        self,
+        input_queue: queue.Queue,
+        output_queue: queue.Queue,
+        run_config: dict
+    ):
+
+        super().__init__(input_queue, output_queue)
+
+        self.__run_config = run_config
+        runner_config = self.__run_config.get("runner", {})
+        # 'max_workers' is the number of group processes running at the same time,
+        # 'max_restarts' is how many times a crashed group process is restarted
+        self.__max_workers = max(1, int(runner_config.get("max_workers", 1)))
+        self.__max_restarts = max(0, int(runner_config.get("max_restarts", 2)))
+        # spawn a clean interpreter, forking a process with Qt threads is not safe
+        self.__context = multiprocessing.get_context("spawn")
+
+    @staticmethod
+    def _workerMain(
+        job_name: str,
+        users: list,
+        offset: int,
+        run_config: dict,
+        msg_queue: multiprocessing.Queue
+    ):
+
+        """
+            Entry of a group process, the log lines (str), the start and the result
+            of each user (dict) are put into 'msg_queue'.
+        """
+        terminated = False
+
+        def onResult(
+            index: int,
+            result: int
+        ):
+
+            nonlocal terminated
+            terminated = terminated or result == -1
+            msg_queue.put({ "job": job_name, "index": offset + index, "result": result })
+
+        def onStart(
+            index: int
+        ):
+
+            msg_queue.put({ "job": job_name, "index": offset + index, "started": True })
+
+        # the user input is not forwarded to the group processes
+        auto_lib = AutoLib(queue.Queue(), msg_queue, run_config)
+        try:
+            auto_lib.run({ "users": users }, onResult, onStart)
+        finally:
+            auto_lib.close(broken=terminated)
+        if terminated:
+            sys.exit(2)
+
+
+    def __startWorker(
+        self,
+        job: dict,
+        msg_queue: multiprocessing.Queue
+    ):
+
+        job["started"] = None
+        job["process"] = self.__context.Process(
+            target=AutoLibSupervisor._workerMain,
+            args=(
+                job["name"],
+                job["users"][job["next"]:],
+                job["next"],
+                self.__run_config,
+                msg_queue
+            ),
+            name=f"AutoLib-{job["name"]}",
+            daemon=True
+        )
+        job["process"].start()
+        self._showTrace(
+            f"任务组 {job["name"]} 已在进程 {job["process"].pid} 中启动, "\
+            f"从第 {job["next"] + 1} 个用户开始"
+        )
+
+
+    def __handleMessage(
+        self,
+        jobs: dict,
+        summary: dict,
+        msg
+    ):
+
+        if isinstance(msg, str):
+            self._output_queue.put(msg)
+            return
+        job = jobs[msg["job"]]
+        if msg.get("started"):
+            # the user in process, blamed if the worker dies before its result
+            job["started"] = msg["index"]
+            return
+        job["started"] = None
+        job["next"] = msg["index"] + 1
+        result = msg["result"]
+        if result == 0:
+            summary["success"] += 1
+        elif result == 2:
+            summary["passed"] += 1
+        else:
+            summary["failed"] += 1
+
+
+    def __drainMessages(
+        self,
+        msg_queue: multiprocessing.Queue,
+        jobs: dict,
+        summary: dict,
+        timeout: float
+    ):
+
+        try:
+            msg = msg_queue.get(timeout=timeout)
+            while True:
+                self.__handleMessage(jobs, summary, msg)
+                msg = msg_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+
+    def __recoverWorker(
+        self,
+        job: dict,
+        summary: dict
+    ) -> bool:
+
+        """
+            Handle an exited group process, returns True if the process is restarted.
+        """
+        exitcode = job["process"].exitcode
+        job["process"] = None
+        if exitcode != 2 and job["next"] >= len(job["users"]):
+            return False
+        summary["error"] = True
+        # exit code 2 means the worker has reported the broken user by itself, else the
+        # user in process when the worker died is counted as failed and skipped, and
+        # a worker dying before it started any user is restarted at the same user
+        if exitcode == 2:
+            crashed_user = job["users"][job["next"] - 1]
+        elif job["started"] is not None:
+            crashed_user = job["users"][job["started"]]
+            summary["failed"] += 1
+            job["next"] = job["started"] + 1
+        else:
+            crashed_user = None
+        job["started"] = None
+        if crashed_user:
+            self._showTrace(
+                f"任务组 {job["name"]} 的进程异常退出 (退出码 {exitcode}), "\
+                f"用户 {crashed_user["username"]} 处理失败"
+            )
+        else:
+            self._showTrace(
+                f"任务组 {job["name"]} 的进程在处理用户前异常退出 (退出码 {exitcode})"
+            )
+        if job["next"] >= len(job["users"]):
+            return False
+        if job["restarts"] >= self.__max_restarts:
+            remaining = job["users"][job["next"]:]
+            summary["failed"] += sum(1 for user in remaining if user["enabled"])
+            summary["passed"] += sum(1 for user in remaining if not user["enabled"])
+            job["next"] = len(job["users"])
+            self._showTrace(
+                f"任务组 {job["name"]} 已重启 {job["restarts"]} 次, "\
+                f"剩余 {len(remaining)} 个用户不再处理"
+            )
+            return False
+        job["restarts"] += 1
+        return True
+
+
+    def run(
+        self,
+        groups: list
+    ) -> dict:
+
+        summary = {"total": 0, "success": 0, "failed": 0, "passed": 0, "error": False}
+        jobs = {}
+        for group in groups:
+            if not group["enabled"]:
+                self._showTrace(f"任务组 {group["name"]} 已跳过")
+                continue
+            users = group.get("users", [])
+            summary["total"] += len(users)
+            jobs[group["name"]] = {
+                "name": group["name"],
+                "users": users,
+                "next": 0,
+                "restarts": 0,
+                "started": None,
+                "process": None
+            }
+        if not jobs:
+            self._showTrace("没有需要运行的任务组")
+            return summary
+        self._showTrace(
+            f"共 {len(jobs)} 个任务组, 使用 {min(self.__max_workers, len(jobs))} 个进程并行运行"
+        )
+        msg_queue = self.__context.Queue()
+        pending = list(jobs.values())
+        running = []
+        while pending or running:
+            while pending and len(running) < self.__max_workers:
+                job = pending.pop(0)
+                self.__startWorker(job, msg_queue)
+                running.append(job)
+            self.__drainMessages(msg_queue, jobs, summary, 0.2)
+            for job in [job for job in running if not job["process"].is_alive()]:
+                job["process"].join()
+                # the last messages of the exited process may still be in the queue
+                self.__drainMessages(msg_queue, jobs, summary, 0.5)
+                running.remove(job)
+                if job["process"].exitcode == 0:
+                    job["process"] = None
+                    self._showTrace(f"任务组 {job["name"]} 运行完成")
+                elif self.__recoverWorker(job, summary):
+                    time.sleep(1)
+                    self.__startWorker(job, msg_queue)
+                    running.append(job)
+        self.__drainMessages(msg_queue, jobs, summary, 0.1)
+        self._showTrace(f"全部任务处理完成, 共计 {summary["total"]} 个用户, "\
+            f"成功 {summary["success"]} 个用户, "\
+            f"失败 {summary["failed"]} 个用户, "\
+            f"跳过 {summary["passed"]} 个用户"
+        )
+        return summary
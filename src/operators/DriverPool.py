@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import queue
+import threading
+
+from base.MsgBase import MsgBase
+
+from utils.DriverFactory import DriverFactory
+
+
+class DriverPool(MsgBase):
+
+    def __init__(
+        self,
+        input_queue: queue.Queue,
+        output_queue: queue.Queue,
+        run_config: dict
+    ):
+
+        super().__init__(input_queue, output_queue)
+
+        self.__run_config = run_config
+        pool_config = self.__run_config.get("driver_pool", {})
+        # 'size' is the number of idle drivers kept warm,
+        # 'max_uses' is the number of runs before a driver is recycled
+        self.__size = max(1, int(pool_config.get("size", 1)))
+        self.__max_uses = max(1, int(pool_config.get("max_uses", 20)))
+        lib_config = self.__run_config.get("library", {})
+        self.__login_url = lib_config.get("host_url", "") + lib_config.get("login_url", "")
+        self.__idle_drivers = [] # [{"driver": driver, "uses": int}, ...]
+        self.__busy_drivers = {} # id(driver) -> {"driver": driver, "uses": int}
+        self.__lock = threading.Lock()
+        self.__closed = False
+
+
+    def __createDriver(
+        self
+    ) -> dict:
+
+        try:
+            driver = DriverFactory.createDriver(self.__run_config.get("web_driver", None))
+        except Exception as e:
+            self._showTrace(f"浏览器驱动池创建浏览器驱动失败: {e}")
+            return None
+        entry = { "driver": driver, "uses": 0 }
+        if not self.__parkDriver(entry):
+            self.__quitDriver(entry)
+            return None
+        return entry
+
+
+    def __parkDriver(
+        self,
+        entry: dict
+    ) -> bool:
+
+        # park the driver on the login page, so the next run can login immediately
+        try:
+            entry["driver"].get(self.__login_url)
+            return True
+        except Exception as e:
+            self._showTrace(f"浏览器驱动加载登录页面失败: {e}")
+            return False
+
+
+    def __isHealthy(
+        self,
+        entry: dict
+    ) -> bool:
+
+        try:
+            # any command raises if the browser or the driver process is gone
+            current_url = entry["driver"].current_url
+        except Exception:
+            return False
+        if current_url != self.__login_url:
+            return self.__parkDriver(entry)
+        return True
+
+
+    def __quitDriver(
+        self,
+        entry: dict
+    ):
+
+        try:
+            entry["driver"].quit()
+        except Exception:
+            pass
+
+
+    def __fillPool(
+        self
+    ):
+
+        while True:
+            with self.__lock:
+                if self.__closed or len(self.__idle_drivers) >= self.__size:
+                    return
+            entry = self.__createDriver()
+            if entry is None:
+                return
+            with self.__lock:
+                if self.__closed or len(self.__idle_drivers) >= self.__size:
+                    self.__quitDriver(entry)
+                    return
+                self.__idle_drivers.append(entry)
+            self._showTrace(f"浏览器驱动池已预热 {len(self.__idle_drivers)}/{self.__size} 个浏览器驱动")
+
+
+    def size(
+        self
+    ) -> int:
+
+        return self.__size
+
+
+    def warmUp(
+        self
+    ):
+
+        threading.Thread(target=self.__fillPool, daemon=True).start()
+
+
+    def acquire(
+        self
+    ) -> any:
+
+        while True:
+            with self.__lock:
+                if self.__closed:
+                    return None
+                entry = self.__idle_drivers.pop(0) if self.__idle_drivers else None
+            if entry is None:
+                self._showTrace("浏览器驱动池中没有空闲的浏览器驱动, 正在创建新的浏览器驱动......")
+                entry = self.__createDriver()
+                if entry is None:
+                    return None
+            elif not self.__isHealthy(entry):
+                self._showTrace("浏览器驱动池中的浏览器驱动已失效, 已回收")
+                self.__quitDriver(entry)
+                continue
+            with self.__lock:
+                self.__busy_drivers[id(entry["driver"])] = entry
+            return entry["driver"]
+
+
+    def release(
+        self,
+        driver: any,
+        broken: bool = False
+    ):
+
+        with self.__lock:
+            entry = self.__busy_drivers.pop(id(driver), None)
+        if entry is None:
+            return
+        entry["uses"] += 1
+        recycle = broken or entry["uses"] >= self.__max_uses
+        if recycle:
+            self._showTrace(f"浏览器驱动已使用 {entry["uses"]} 次或已崩溃, 已回收")
+        if recycle or not self.__isHealthy(entry):
+            self.__quitDriver(entry)
+            self.warmUp()
+            return
+        with self.__lock:
+            if not self.__closed and len(self.__idle_drivers) < self.__size:
+                self.__idle_drivers.append(entry)
+                return
+        self.__quitDriver(entry)
+
+
+    def close(
+        self
+    ):
+
+        with self.__lock:
+            self.__closed = True
+            idle_drivers, self.__idle_drivers = self.__idle_drivers, []
+        for entry in idle_drivers:
+            self.__quitDriver(entry)
+        # the busy drivers are quitted when they are released
+        self._showTrace("浏览器驱动池已关闭")
@@ -7,17 +7,21 @@ This software is provided "as is", without any warranty of any kind.
 You may use, modify, and distribute this file under the terms of the MIT License.
 See the LICENSE file for details.
 """
-import re
-import time
 import queue
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 from base.LibOperator import LibOperator
 
+from utils.PageReadiness import PageReadiness
+
+from utils.ReserveHistoryStore import ReserveHistoryStore
+from utils.ReserveRecordParser import ReserveRecordParser
+from utils.ServerClock import ServerClock
+
 
 class LibChecker(LibOperator):
 
@@ -25,12 +29,21 @@ class LibChecker(LibOperator):
         self,
         input_queue: queue.Queue,
         output_queue: queue.Queue,
-        driver: any
+        driver: any,
+        history_store: ReserveHistoryStore = None
     ):
 
         super().__init__(input_queue, output_queue)
 
         self.__driver = driver
+        self.__history_store = history_store
+        self.__username = None
+        # date -> records, the snapshots taken since the user logged in
+        self.__record_cache = {}
+        self.__cache_hits = 0
+        self.__cache_misses = 0
+        self.__record_list = PageReadiness()\
+            .present(".myReserveList > dl", "预约记录")
 
 
     def _waitResponseLoad(
@@ -67,118 +80,33 @@ class LibChecker(LibOperator):
         return True
 
 
-    def __decodeReserveTime(
-        self,
-        time_element
-    ) -> dict:
-
-        time_str = time_element.text.strip()
-        today = datetime.now().date()
-        if "明天" in time_str:
-            target_date = today + timedelta(days=1)
-            date = target_date.strftime("%Y-%m-%d")
-        elif "今天" in time_str:
-            target_date = today
-            date = target_date.strftime("%Y-%m-%d")
-        elif "昨天" in time_str:
-            target_date = today - timedelta(days=1)
-            date = target_date.strftime("%Y-%m-%d")
-        else:
-            date_match = re.search(r"(\d{4}-\d{1,2}-\d{1,2})", time_str)
-            if date_match:
-                date = date_match.group(1)
-            else:
-                date = ""
-        time_match = re.search(r"(\d{1,2}:\d{2}) -- (\d{1,2}:\d{2})", time_str)
-        if time_match:
-            begin_time = time_match.group(1)
-            end_time = time_match.group(2)
-        else:
-            begin_time = ""
-            end_time = ""
-        return {
-            "date": date,
-            "time": {
-                "begin": begin_time,
-                "end": end_time
-            }
-        }
-
-
-    def __decodeReserveInfo(
-        self,
-        info_elements
-    ) -> str:
-
-        location = ""
-        status = ""
-        for info in info_elements:
-            if "已预约" in info.text:
-                status = "已预约"
-            elif "使用中" in info.text:
-                status = "使用中"
-            elif "已完成" in info.text:
-                status = "已完成"
-            elif "已结束使用" in info.text:
-                status = "已结束使用"
-            elif "已取消" in info.text:
-                status = "已取消"
-            elif "失约" in info.text:
-                status = "失约"
-            elif "图书馆" in info.text:
-                location = info.text.strip()
-        return {
-            "location": location,
-            "status": status,
-        }
-
-
-    def __decodeReserveRecord(
-        self,
-        reservation
-    ) -> dict:
-
-        try:
-            time_element = reservation.find_element(
-                By.CSS_SELECTOR, "dt"
-            )
-            info_elements = reservation.find_elements(
-                By.CSS_SELECTOR, "a"
-            )
-        except:
-            return {
-                "date": "",
-                "time": {"begin": "", "end": ""},
-                "info": {"location": "", "status": ""}
-            }
-        time = self.__decodeReserveTime(time_element)
-        info = self.__decodeReserveInfo(info_elements)
-        return {
-            "date": time["date"],
-            "time": time["time"],
-            "info": info
-        }
-
-
-    def __loadReserveRecords(
+    def __snapshotReserveRecords(
         self
-    ) -> list:
+    ) -> tuple:
+
+        """
+            Returns (html, count) of the record list in one call,
+            'count' is the number of 'dl' elements in the list.
+        """
         try:
-            # check if there's any reservation on the date
-            WebDriverWait(self.__driver, 2).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".myReserveList > dl"))
-            )
-            reservations = self.__driver.find_elements(
-                By.CSS_SELECTOR, ".myReserveList > dl:not(#moreBlock)"
+            missing = self.__record_list.wait(self.__driver, 5)
+            if missing:
+                raise Exception(f"未找到 {", ".join(missing)}")
+            snapshot = self.__driver.execute_script(
+                "const list = document.querySelector('.myReserveList');"
+                "return list ? [list.outerHTML, list.querySelectorAll(':scope > dl').length] : null;"
             )
-            return reservations
-        except:
-            self._showTrace("加载预约记录失败 !")
-            return None
+            if snapshot is None:
+                raise Exception("未找到预约记录列表")
+            return snapshot[0], snapshot[1]
+        except Exception as e:
+            self._showTrace(f"加载预约记录失败 ! : {e}")
+            return None, 0
 
 
     def __showMoreReserveRecords(
-        self
+        self,
+        count: int
     ) -> bool:
 
         # load new reservations if still not sure
@@ -192,66 +120,181 @@ class LibChecker(LibOperator):
         try:
             more_btn = self.__driver.find_element(By.ID, "moreBtn")
             if more_btn.is_displayed() and more_btn.is_enabled():
-                # self.__driver.execute_script("arguments[0].scrollIntoView(true);", more_btn)
-                # self.__driver.execute_script("arguments[0].click();", more_btn)
-                print("点击了更多预约记录按钮")
                 more_btn.click()
-                return True
             else:
                 self._showTrace("用户无法加载更多预约记录")
                 return False
         except:
             self._showTrace("加载更多预约记录失败 !")
             return False
+        # wait for the new records appended to the list
+        return not PageReadiness()\
+            .present(f".myReserveList > dl:nth-of-type({count + 1})", "更多预约记录")\
+            .wait(self.__driver, 2)
 
 
-    def __getReserveRecord(
+    @staticmethod
+    def _isSnapshotComplete(
+        records: list,
+        wanted_date: str
+    ) -> bool:
+
+        # every query is about an active record of the date, once one is found
+        # or the records reach back before the date, older records are not needed
+        if ReserveRecordParser.coversDate(records, wanted_date):
+            return True
+        return any(
+            ReserveRecordParser.findRecord(records, wanted_date, status)[0] is not None
+            for status in ("已预约", "使用中")
+        )
+
+
+    def _loadReserveRecords(
+        self,
+        wanted_date: str
+    ) -> list:
+
+        """
+            Take one snapshot of the reservation history which covers the wanted date,
+            returns the parsed records from the latest to the earliest, or None if failed.
+        """
+        max_check_times = 6 # we only check (4*(6-1)=)20 reservations, the last time cant be checked
+
+        if not self.__navigateToReserveRecordPage():
+            return None
+        records = None
+        for _ in range(max_check_times):
+            html, count = self.__snapshotReserveRecords()
+            if html is None:
+                return records
+            records = ReserveRecordParser.parseRecords(html)
+            if records is None:
+                self._showTrace("加载预约记录失败 !")
+                return None
+            if self._isSnapshotComplete(records, wanted_date):
+                break
+            if self._reachesStoredHistory(records, wanted_date):
+                break
+            if not self.__showMoreReserveRecords(count):
+                break
+        return records
+
+
+    def _reachesStoredHistory(
+        self,
+        records: list,
+        wanted_date: str
+    ) -> bool:
+
+        # the rest of the history is already in the local store, and none of it is of the wanted date
+        if self.__history_store is None or self.__username is None:
+            return False
+        wanted_date = datetime.strptime(wanted_date, "%Y-%m-%d").strftime("%Y-%m-%d")
+        return any(
+            self.__history_store.isFinalStored(self.__username, record) and
+            ReserveHistoryStore.recordKey(record)[0] < wanted_date
+            for record in records
+        )
+
+
+    def __syncHistory(
+        self,
+        records: list
+    ) -> list:
+
+        """
+            Save the snapshot into the local store and complete it with the older stored records,
+            only the finished ones, the status of the others may be out of date.
+        """
+        if self.__history_store is None or self.__username is None:
+            return records
+        try:
+            new_count = self.__history_store.sync(self.__username, records)
+            known = {ReserveHistoryStore.recordKey(record) for record in records} - {None}
+            if not known:
+                return records
+            # the stored records not in the snapshot, on and before its earliest date
+            oldest = min(key[0] for key in known)
+            stored = self.__history_store.records(self.__username, oldest)
+        except Exception as e:
+            self._showTrace(f"同步本地预约记录失败 ! : {e}")
+            return records
+        self._showTrace(f"已同步本地预约记录, 新增 {new_count} 条")
+        return records + [record for record in stored if ReserveHistoryStore.recordKey(record) not in known]
+
+
+    def __cachedReserveRecords(
+        self,
+        wanted_date: str
+    ) -> list:
+
+        # a snapshot of another date also answers the wanted date if it is complete for it
+        for date, records in self.__record_cache.items():
+            if date == wanted_date or self._isSnapshotComplete(records, wanted_date):
+                self.__cache_hits += 1
+                self._showTrace(f"预约记录缓存命中 : {wanted_date}")
+                return records
+        self.__cache_misses += 1
+        records = self._loadReserveRecords(wanted_date)
+        if records is not None:
+            records = self.__syncHistory(records)
+            self.__record_cache[wanted_date] = records
+        return records
+
+
+    def invalidateRecords(
+        self
+    ):
+
+        # the reservation state is changed (reserve, checkin, renew)
+        self.__record_cache.clear()
+
+
+    def resetRecords(
+        self,
+        username: str = None
+    ):
+
+        # a new user session begins, report the cache of the last one
+        if self.__cache_hits or self.__cache_misses:
+            self._showTrace(
+                f"本次登录预约记录缓存命中 {self.__cache_hits} 次, "\
+                f"未命中 {self.__cache_misses} 次"
+            )
+        self.__record_cache.clear()
+        self.__cache_hits = 0
+        self.__cache_misses = 0
+        self.__username = username
+
+
+    def _getReserveRecord(
         self,
         wanted_date: str,
-        wanted_status: str
+        wanted_status: str,
+        records: list = None
     ) -> dict:
 
+        """
+            Find the record of the wanted date and status, in 'records' if given,
+            otherwise in the snapshot of the reservation history cached since login.
+        """
         if wanted_date is None:
             self._showTrace("日期未指定, 无法检查当前预约状态")
             return None
         self._showTrace(f"正在检查用户在 {wanted_date} 是否有预约状态为 {wanted_status} 的预约记录......")
 
-        checked_count = 0
-        max_check_times = 6 # we only check (4*(6-1)=)20 reservations, the last time cant be checked
-
-        if not self.__navigateToReserveRecordPage():
+        if records is None:
+            records = self.__cachedReserveRecords(wanted_date)
+        if records is None:
             return None
-        for _ in range(max_check_times):
-            reservations = self.__loadReserveRecords()
-            if reservations is None:
-                return None
-            for reservation in reservations[checked_count:]:
-                record = self.__decodeReserveRecord(reservation)
-                checked_count += 1
-                if record is None:
-                    continue
-                if record["date"] == "":
-                    continue
-                if record["time"] == {"begin": "", "end": ""}:
-                    continue
-                # record date is later than the given date, check the next one
-                if datetime.strptime(record["date"], "%Y-%m-%d").date() >\
-                   datetime.strptime(wanted_date, "%Y-%m-%d").date():
-                    continue
-                # record date is earlier than the given date, so there is no wanted record
-                if datetime.strptime(record["date"], "%Y-%m-%d").date() <\
-                   datetime.strptime(wanted_date, "%Y-%m-%d").date():
-                    return None
-                if record["info"]["status"] == wanted_status:
-                    self._showTrace(
-                        f"寻找到用户第 {checked_count} 条状态为 {wanted_status} 的预约记录, "
-                        f"详细信息: {record["date"]} "
-                        f"{record["time"]["begin"]} - {record["time"]["end"]} {record["info"]["location"]}"
-                    )
-                    return record
-            if not self.__showMoreReserveRecords():
-                break
-        return None
+        record, index, _ = ReserveRecordParser.findRecord(records, wanted_date, wanted_status)
+        if record is not None:
+            self._showTrace(
+                f"寻找到用户第 {index + 1} 条状态为 {wanted_status} 的预约记录, "
+                f"详细信息: {record["date"]} "
+                f"{record["time"]["begin"]} - {record["time"]["end"]} {record["info"]["location"]}"
+            )
+        return record
 
 
     def canReserve(
@@ -260,9 +303,10 @@ class LibChecker(LibOperator):
     ) -> bool:
 
         # no reserved or using record in the given date
-        # then can reserve
-        if self.__getReserveRecord(date, "已预约") is None:
-            if self.__getReserveRecord(date, "使用中") is None:
+        # then can reserve, both are looked up in one snapshot
+        records = self.__cachedReserveRecords(date) if date else None
+        if self._getReserveRecord(date, "已预约", records) is None:
+            if self._getReserveRecord(date, "使用中", records) is None:
                 self._showTrace(f"用户在 {date} 可以预约")
                 return True
             self._showTrace(f"用户在 {date} 有使用中的预约, 无法预约")
@@ -275,13 +319,14 @@ class LibChecker(LibOperator):
         self
     ) -> bool:
 
-        # only check the current date
-        date = time.strftime("%Y-%m-%d", time.localtime())
-        record = self.__getReserveRecord(date, "已预约")
+        # only check the current date, on the server clock
+        now = ServerClock.now()
+        date = now.strftime("%Y-%m-%d")
+        record = self._getReserveRecord(date, "已预约")
         if record is not None:
             begin_time = record["time"]["begin"]
             begin_time = datetime.strptime(f"{date} {begin_time}", "%Y-%m-%d %H:%M")
-            time_diff = datetime.now() - begin_time
+            time_diff = now - begin_time
             time_diff_seconds = time_diff.total_seconds()
             # before 30 minutes, cant checkin
             if time_diff_seconds < -30*60:
@@ -312,13 +357,14 @@ class LibChecker(LibOperator):
         self
     ):
 
-        # only check the current date
-        date = time.strftime("%Y-%m-%d", time.localtime())
-        record = self.__getReserveRecord(date, "使用中")
+        # only check the current date, on the server clock
+        now = ServerClock.now()
+        date = now.strftime("%Y-%m-%d")
+        record = self._getReserveRecord(date, "使用中")
         if record is not None:
             end_time = record["time"]["end"]
             end_time = datetime.strptime(f"{date} {end_time}", "%Y-%m-%d %H:%M")
-            time_diff = end_time - datetime.now()
+            time_diff = end_time - now
             time_diff_seconds = time_diff.total_seconds()
             # a using record is definitely after the begin time
             trace_msg = (
@@ -354,7 +400,7 @@ class LibChecker(LibOperator):
 
         # only check the given record date
         date = record["date"]
-        act_record = self.__getReserveRecord(date, "使用中")
+        act_record = self._getReserveRecord(date, "使用中")
         if act_record is not None:
             if act_record["time"]["begin"] == record["time"]["begin"] and\
                act_record["time"]["end"] == record["time"]["end"]:
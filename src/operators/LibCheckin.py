@@ -18,6 +18,8 @@ from selenium.webdriver.support import expected_conditions as EC
 
 from base.LibOperator import LibOperator
 
+from utils.PageReadiness import PageReadiness
+
 
 class LibCheckin(LibOperator):
 
@@ -31,22 +33,21 @@ class LibCheckin(LibOperator):
         super().__init__(input_queue, output_queue)
 
         self.__driver = driver
+        self.__result_dialog = PageReadiness()\
+            .present(".ui_dialog", "结果对话框")\
+            .present(".resultMessage", "结果信息")\
+            .clickable(".btnOK", "确定按钮")
 
 
     def _waitResponseLoad(
         self
     ) -> bool:
 
+        missing = self.__result_dialog.wait(self.__driver, 2)
+        if missing:
+            self._showTrace(f"签到时发生未知错误 ! : 未找到 {", ".join(missing)}")
+            return False
         try:
-            WebDriverWait(self.__driver, 2).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "ui_dialog"))
-            )
-            WebDriverWait(self.__driver, 2).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "resultMessage"))
-            )
-            WebDriverWait(self.__driver, 2).until(
-                EC.element_to_be_clickable((By.CLASS_NAME, "btnOK"))
-            )
             result_message_element = self.__driver.find_element(
                 By.CLASS_NAME, "resultMessage"
             )
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import queue
+
+from base.LibBackend import LibBackend, LibBackendFallback
+from operators.LibHttpChecker import LibHttpChecker
+from operators.LibHttpLogin import LibHttpLogin
+from operators.LibHttpReserve import LibHttpReserve
+
+from utils.HtmlTree import HtmlTree
+from utils.HttpSession import HttpSession
+from utils.ReserveHistoryStore import ReserveHistoryStore
+
+
+class LibHttpBackend(LibBackend):
+
+    # the paths of the requests, the 'backend.endpoints' of the run config override them
+    DEFAULT_ENDPOINTS = {
+        "map": "/map",
+        "history": "/history?type=SEAT",
+        "logout": "/logout",
+        "room_seats": "/mapBook/getSeatsByRoom",
+        "start_times": "/freeBook/ajaxGetTime",
+        "end_times": "/freeBook/ajaxGetEndTime",
+        "reserve": "/selfRes",
+        "checkin": ""
+    }
+
+    def __init__(
+        self,
+        input_queue: queue.Queue,
+        output_queue: queue.Queue,
+        run_config: dict,
+        history_store: ReserveHistoryStore = None
+    ):
+
+        super().__init__(input_queue, output_queue)
+
+        lib_config = run_config.get("library", {})
+        backend_config = run_config.get("backend", {})
+        self.__endpoints = {
+            **LibHttpBackend.DEFAULT_ENDPOINTS,
+            **(backend_config.get("endpoints") or {})
+        }
+        self.__session = HttpSession(
+            lib_config.get("host_url"),
+            backend_config.get("timeout", 5)
+        )
+        self.__lib_checker = LibHttpChecker(
+            input_queue, output_queue, self.__session, self.__endpoints["history"],
+            history_store
+        )
+        self.__lib_login = LibHttpLogin(
+            input_queue, output_queue, self.__session, lib_config.get("login_url")
+        )
+        self.__lib_reserve = LibHttpReserve(
+            input_queue, output_queue, self.__session, self.__endpoints
+        )
+
+
+    def __endpoint(
+        self,
+        name: str
+    ) -> str:
+
+        # an empty endpoint means the action is only done by the browser
+        path = self.__endpoints.get(name, "")
+        if not path:
+            raise LibBackendFallback(f"未配置 '{name}' 接口")
+        return path
+
+
+    def login(
+        self,
+        username: str,
+        password: str,
+        max_attempts: int = 5,
+        auto_captcha: bool = True
+    ) -> bool:
+
+        self.__lib_checker.resetRecords(username)
+        self.__session.clearCookies()
+        return self.__lib_login.login(username, password, max_attempts, auto_captcha)
+
+
+    def logout(
+        self,
+        username: str
+    ) -> bool:
+
+        self.__lib_checker.resetRecords()
+        try:
+            self.__session.get(self.__endpoint("logout"))
+            self._showTrace(f"用户 {username} 注销成功 !")
+            return True
+        except Exception as e:
+            self._showTrace(f"用户 {username} 注销失败 ! : {e}")
+            return False
+        finally:
+            self.__session.clearCookies()
+
+
+    def resumeSession(
+        self,
+        username: str,
+        cookies: list,
+        check_url: str
+    ) -> bool:
+
+        self.__lib_checker.resetRecords(username)
+        return self.__lib_login.resume(username, cookies, check_url)
+
+
+    def sessionCookies(
+        self
+    ) -> list:
+
+        return [
+            {"name": name, "value": value, "path": "/"}
+            for name, value in self.__session.cookies().items()
+        ]
+
+
+    def dropSession(
+        self
+    ):
+
+        self.__lib_checker.resetRecords()
+        self.__session.clearCookies()
+
+
+    def canReserve(
+        self,
+        date: str
+    ) -> bool:
+
+        return self.__lib_checker.canReserve(date)
+
+
+    def canCheckin(
+        self
+    ) -> bool:
+
+        return self.__lib_checker.canCheckin()
+
+
+    def canRenew(
+        self
+    ) -> dict:
+
+        return self.__lib_checker.canRenew()
+
+
+    def postRenewCheck(
+        self,
+        record: dict
+    ) -> bool:
+
+        return self.__lib_checker.postRenewCheck(record)
+
+
+    def reserve(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        try:
+            return self.__lib_reserve.reserve(username, reserve_info)
+        finally:
+            # the reservation state may have changed
+            self.__lib_checker.invalidateRecords()
+
+
+    def prepareReserve(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        return self.__lib_reserve.prepare(username, reserve_info)
+
+
+    def commitReserve(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        try:
+            return self.__lib_reserve.commit(username, reserve_info)
+        finally:
+            # the reservation state may have changed
+            self.__lib_checker.invalidateRecords()
+
+
+    def checkin(
+        self,
+        username: str
+    ) -> bool:
+
+        # the reservation state may have changed
+        self.__lib_checker.invalidateRecords()
+        root = HtmlTree.parse(self.__session.post(self.__endpoint("checkin")))
+        result_element = root.find(cls="resultMessage")
+        if result_element is None:
+            raise LibBackendFallback("无法识别签到结果")
+        result_message = result_element.text()
+        if "签到成功" in result_message:
+            self._showTrace(f"用户 {username} 签到成功 !")
+            return True
+        if "签到失败" in result_message:
+            self._showTrace(f"\n"\
+                "      签到失败 !\n"\
+                f"          {result_message.replace("签到失败", "").strip()}"
+            )
+            self._showTrace(f"用户 {username} 签到失败 !")
+            return False
+        raise LibBackendFallback("无法识别签到结果")
+
+
+    def renew(
+        self,
+        username: str,
+        record: dict,
+        reserve_info: dict
+    ) -> bool:
+
+        # the renew dialog is built by the page script, there is no plain request for it yet
+        raise LibBackendFallback("续约暂不支持 HTTP 方式")
+
+
+    def close(
+        self
+    ):
+
+        self.__session.close()
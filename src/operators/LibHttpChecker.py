@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import queue
+
+from base.LibBackend import LibBackendFallback
+from operators.LibChecker import LibChecker
+
+from utils.HttpSession import HttpSession
+from utils.ReserveHistoryStore import ReserveHistoryStore
+from utils.ReserveRecordParser import ReserveRecordParser
+
+
+class LibHttpChecker(LibChecker):
+
+    def __init__(
+        self,
+        input_queue: queue.Queue,
+        output_queue: queue.Queue,
+        session: HttpSession,
+        history_path: str,
+        history_store: ReserveHistoryStore = None
+    ):
+
+        super().__init__(input_queue, output_queue, None, history_store)
+
+        self.__session = session
+        self.__history_path = history_path
+
+
+    def _loadReserveRecords(
+        self,
+        wanted_date: str
+    ) -> list:
+
+        if not self.__history_path:
+            raise LibBackendFallback("未配置 'history' 接口")
+        html = self.__session.get(self.__history_path)
+        records = ReserveRecordParser.parseRecords(html)
+        if records is None:
+            raise LibBackendFallback("无法解析预约记录页面")
+        if self._isSnapshotComplete(records, wanted_date) or\
+           self._reachesStoredHistory(records, wanted_date) or\
+           not ReserveRecordParser.hasMoreRecords(html):
+            return records
+        # the older records are loaded by the page script, leave them to the browser
+        raise LibBackendFallback("需要加载更多预约记录")
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import queue
+import base64
+
+from urllib.parse import urljoin
+
+from base.LibOperator import LibOperator
+from base.LibBackend import LibBackendFallback
+
+from utils.HtmlTree import HtmlTree, HtmlNode
+from utils.HttpSession import HttpSession
+from utils.OcrService import OcrService
+
+
+class LibHttpLogin(LibOperator):
+
+    def __init__(
+        self,
+        input_queue: queue.Queue,
+        output_queue: queue.Queue,
+        session: HttpSession,
+        login_url: str
+    ):
+
+        super().__init__(input_queue, output_queue)
+
+        self.__session = session
+        self.__login_url = login_url
+
+
+    def _waitResponseLoad(
+        self,
+        root: HtmlNode
+    ) -> bool:
+
+        # same as the browser login, the seat selecting page means login success
+        title = root.find("title")
+        if title is not None and "自选座位" in title.text():
+            return True
+        return root.find(id="search") is not None
+
+
+    @staticmethod
+    def __findLoginForm(
+        root: HtmlNode
+    ) -> HtmlNode:
+
+        for form in root.findAll("form"):
+            if any(item.attr("name") == "username" for item in form.findAll("input")):
+                return form
+        return None
+
+
+    def __loadLoginForm(
+        self,
+        root: HtmlNode = None
+    ) -> dict:
+
+        # the login page given back by a failed login can be used as well
+        if root is None:
+            root = HtmlTree.parse(self.__session.get(self.__login_url))
+        form_element = self.__findLoginForm(root)
+        captcha_element = root.find(id="loadImgId")
+        if form_element is None or captcha_element is None:
+            raise LibBackendFallback("无法解析登录页面")
+        fields = {}
+        for item in form_element.findAll("input"):
+            if item.attr("type") == "hidden" and item.attr("name"):
+                fields[item.attr("name")] = item.attr("value")
+        action = form_element.attr("action")
+        return {
+            "action": urljoin(self.__session.last_url, action) if action else self.__session.last_url,
+            "fields": fields,
+            "captcha": captcha_element.attr("src")
+        }
+
+
+    def __autoRecognizeCaptcha(
+        self,
+        img_src: str
+    ) -> list:
+
+        try:
+            if img_src.startswith("data:"):
+                captcha_img = base64.b64decode(img_src.split(',', 1)[1])
+            else:
+                captcha_img = self.__session.getBytes(urljoin(self.__session.last_url, img_src))
+            candidates = OcrService.recognize(captcha_img)
+            if not candidates:
+                raise Exception("识别结果置信度过低 !")
+            self._showTrace(
+                f"识别到验证码为 : {", ".join(f"'{text}' ({confidence:.0%})" for text, confidence in candidates)}"
+            )
+            return [text for text, _ in candidates]
+        except Exception as e:
+            self._showTrace(f"验证码识别失败 ! : {e}")
+            return []
+
+
+    def login(
+        self,
+        username: str,
+        password: str,
+        max_attempts: int = 5,
+        auto_captcha: bool = True
+    ) -> bool:
+
+        if not auto_captcha:
+            # the captcha image can only be shown to the user in the browser
+            raise LibBackendFallback("手动输入验证码需要使用浏览器")
+        form = None
+        candidates = []
+        for attempt in range(max_attempts):
+            self._showTrace(f"用户 {username} 第 {attempt + 1} 次尝试登录......")
+            # every load of the login page gives a new captcha
+            if form is None:
+                form = self.__loadLoginForm()
+            if not candidates:
+                candidates = self.__autoRecognizeCaptcha(form["captcha"])
+                if not candidates:
+                    form = None
+                    continue
+            captcha_text = candidates.pop(0)
+            fields = dict(form["fields"])
+            fields.update({
+                "username": username,
+                "password": password,
+                "answer": captcha_text
+            })
+            self._showTrace("尝试登录...")
+            root = HtmlTree.parse(self.__session.post(form["action"], fields))
+            if self._waitResponseLoad(root):
+                self._showTrace(f"用户 {username} 第 {attempt + 1} 次登录成功 !")
+                return True
+            if self.__findLoginForm(root) is None:
+                raise LibBackendFallback("无法识别登录结果")
+            self._showTrace(
+                f"用户 {username} 第 {attempt + 1} 次登录失败 ! : "\
+                "用户账号或者密码错误/验证码错误"
+            )
+            # the next candidate is only tried if the site gives back the same inline captcha
+            captcha_element = root.find(id="loadImgId")
+            same_captcha = captcha_element is not None and captcha_element.attr("src") == form["captcha"]
+            if candidates and same_captcha and form["captcha"].startswith("data:"):
+                self._showTrace(f"验证码未刷新, 尝试下一个候选验证码 '{candidates[0]}'")
+                form = self.__loadLoginForm(root)
+            else:
+                form = None
+                candidates = []
+        return False
+
+
+    def resume(
+        self,
+        username: str,
+        cookies: list,
+        check_url: str
+    ) -> bool:
+
+        self.__session.setCookies({cookie["name"]: cookie["value"] for cookie in cookies})
+        if self._waitResponseLoad(HtmlTree.parse(self.__session.get(check_url))):
+            return True
+        self.__session.clearCookies()
+        return False
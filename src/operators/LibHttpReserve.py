@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import queue
+
+from base.LibBackend import LibBackendFallback
+from operators.LibReserve import LibReserve
+
+from utils.HtmlTree import HtmlTree
+from utils.HttpSession import HttpSession
+from utils.SeatTopology import SeatTopology
+from utils.TimeSlots import TimeSlots
+
+
+class LibHttpReserve(LibReserve):
+
+    def __init__(
+        self,
+        input_queue: queue.Queue,
+        output_queue: queue.Queue,
+        session: HttpSession,
+        endpoints: dict
+    ):
+
+        super().__init__(input_queue, output_queue, None)
+
+        self.__session = session
+        self.__endpoints = endpoints
+        # the hidden fields of the map page loaded by 'prepare'
+        self.__fields = {}
+
+
+    def __loadMapTokens(
+        self
+    ) -> dict:
+
+        # the hidden inputs of the map page are posted with the reservation
+        root = HtmlTree.parse(self.__session.get(self.__endpoints["map"]))
+        if root.find(id="seatLayout") is None:
+            raise LibBackendFallback("无法解析预约选座页面")
+        tokens = {}
+        for item in root.findAll("input"):
+            if item.attr("type") == "hidden" and item.attr("name"):
+                tokens[item.attr("name")] = item.attr("value")
+        return tokens
+
+
+    def __findSeat(
+        self,
+        date: str,
+        room: str,
+        seat_id: str
+    ) -> str:
+
+        root = HtmlTree.parse(self.__session.get(
+            self.__endpoints["room_seats"],
+            {"roomId": room, "date": date}
+        ))
+        all_seats = [
+            seat for seat in root.findAll("li", attr="id")
+            if seat.attr("id").startswith("seat_")
+        ]
+        if not all_seats:
+            raise LibBackendFallback("无法解析房间座位列表")
+        seat_number = SeatTopology.canonicalSeat(seat_id)
+        for seat in all_seats:
+            if not seat_number == SeatTopology.canonicalSeat(seat.text()):
+                continue
+            seat_link = seat.find("a")
+            seat_status = seat_link.attr("title") if seat_link else ""
+            self._showTrace(f"座位 {seat_id} 选择成功 ! : 当前状态 - '{seat_status}'")
+            return seat.attr("id").removeprefix("seat_")
+        self._showTrace(f"座位 {seat_id} 在该楼层区域中不存在, 请检查座位号是否正确")
+        return None
+
+
+    def __loadTimes(
+        self,
+        path: str,
+        fields: dict,
+        time_type: str
+    ) -> tuple:
+
+        """
+            Returns (time_attrs, time_values) of the valid time options.
+        """
+        root = HtmlTree.parse(self.__session.get(path, fields))
+        if root.find("ul") is None and root.find("a", attr="time") is None:
+            raise LibBackendFallback(f"无法解析可用 {time_type} 列表")
+        time_attrs = [time_opt.attr("time") for time_opt in root.findAll("a", attr="time")]
+        time_values = TimeSlots.values(time_attrs)
+        valid = time_values != TimeSlots.INVALID
+        time_attrs = [time_attr for time_attr, is_valid in zip(time_attrs, valid) if is_valid]
+        return time_attrs, time_values[valid]
+
+
+    def __selectSeatTime(
+        self,
+        date: str,
+        seat: str,
+        reserve_info: dict
+    ) -> dict:
+
+        """
+            Choose the begin and the end time together, the end times of the begin times
+            within the max time diff are loaded, the nearest begin time first, until a
+            pair meets the whole duration.
+        """
+        begin_time, end_time = reserve_info["begin_time"], reserve_info["end_time"]
+        targets = self._periodTargets(
+            begin_time, end_time, reserve_info["expect_duration"], reserve_info["satisfy_duration"]
+        )
+        begin_attrs, begin_values = self.__loadTimes(
+            self.__endpoints["start_times"], {"id": seat, "date": date}, "开始时间"
+        )
+        if not begin_attrs:
+            self._showTrace("开始时间 选择失败 ! : 当前未查询到可用时间")
+            return None
+        end_attrs = [None]*len(begin_attrs)
+
+        def loadEndValues(
+            index: int
+        ) -> list:
+
+            end_attrs[index], end_values = self.__loadTimes(
+                self.__endpoints["end_times"],
+                {"id": seat, "date": date, "start": begin_attrs[index]},
+                "结束时间"
+            )
+            return end_values
+
+        best, end_values = self._probeSeatTime(begin_time, end_time, begin_values, loadEndValues, targets)
+        if best is None:
+            return None
+        begin_index, end_index, satisfied = best
+        self._showPeriodChoice(
+            begin_time,
+            int(begin_values[begin_index]),
+            int(end_values[begin_index][end_index]),
+            satisfied,
+            targets
+        )
+        return {"start": begin_attrs[begin_index], "end": end_attrs[begin_index][end_index]}
+
+
+    def __submitReserve(
+        self,
+        fields: dict
+    ) -> bool:
+
+        root = HtmlTree.parse(self.__session.post(self.__endpoints["reserve"], fields))
+        layout = root.find(cls="layoutSeat")
+        if layout is None:
+            raise LibBackendFallback("无法解析预约结果页面")
+        title_element = layout.find("dt")
+        title = title_element.text() if title_element else ""
+        contents = [element.text() for element in layout.findAll("dd") if element.text()]
+        result = self._decodeReserveResult(title, contents)
+        if result is None:
+            raise LibBackendFallback("无法识别预约结果")
+        return result
+
+
+    def prepare(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        # reserve info
+        if not self._checkReserveInfo(reserve_info):
+            return False
+        self.__fields = self.__loadMapTokens()
+        return True
+
+
+    def commit(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        fields = dict(self.__fields)
+        date = reserve_info["date"]
+        seat = self.__findSeat(date, reserve_info["room"], reserve_info["seat_id"])
+        seat_time = None
+        if seat is not None:
+            seat_time = self.__selectSeatTime(date, seat, reserve_info)
+        if seat_time is None:
+            self._showTrace(f"用户 {username} 预约失败 !")
+            return False
+        fields.update({"date": date, "seat": seat})
+        fields.update(seat_time)
+        if self.__submitReserve(fields):
+            self._showTrace(f"用户 {username} 预约成功 !")
+            return True
+        self._showTrace(f"用户 {username} 预约失败 !")
+        return False
@@ -11,14 +11,13 @@ import time
 import queue
 import base64
 
-import ddddocr
-
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 from base.LibOperator import LibOperator
 
+from utils.OcrService import OcrService
+from utils.PageReadiness import PageReadiness
+
 
 class LibLogin(LibOperator):
 
@@ -32,7 +31,17 @@ class LibLogin(LibOperator):
         super().__init__(input_queue, output_queue)
 
         self.__driver = driver
-        self.__ddddocr = ddddocr.DdddOcr()
+        self.__seat_page = PageReadiness()\
+            .title("自选座位 :: 座位预约系统")\
+            .present("#search", "查询按钮")\
+            .present(".selectContent", "选座区域")
+
+
+    def __isSeatPage(
+        self
+    ) -> bool:
+
+        return not self.__seat_page.wait(self.__driver, 2)
 
 
     def _waitResponseLoad(
@@ -40,20 +49,10 @@ class LibLogin(LibOperator):
     ) -> bool:
 
         # wait to verify login success
-        try:
-            WebDriverWait(self.__driver, 2).until( # title contains "自选座位 :: 座位预约系统"
-                EC.title_contains("自选座位 :: 座位预约系统")
-            )
-            WebDriverWait(self.__driver, 2).until( # search button presence
-                EC.presence_of_element_located((By.ID, "search"))
-            )
-            WebDriverWait(self.__driver, 2).until( # select content presence
-                EC.presence_of_element_located((By.CLASS_NAME, "selectContent"))
-            )
+        if self.__isSeatPage():
             return True
-        except:
-            self._showTrace(f"登录页面加载失败 ! : 用户账号或者密码错误/验证码错误, 具体以页面提示为准")
-            return False
+        self._showTrace(f"登录页面加载失败 ! : 用户账号或者密码错误/验证码错误, 具体以页面提示为准")
+        return False
 
 
     def __fillLogInElements(
@@ -76,30 +75,40 @@ class LibLogin(LibOperator):
         return True
 
 
-    def __autoRecognizeCaptcha(
+    def __captchaSource(
         self
     ) -> str:
 
-        # auto recognize captcha
         try:
-            captcha_img = self.__driver.find_element(By.ID, "loadImgId")
-            img_src = captcha_img.get_attribute("src")
+            return self.__driver.find_element(By.ID, "loadImgId").get_attribute("src")
+        except:
+            return None
+
+
+    def __autoRecognizeCaptcha(
+        self
+    ) -> list:
+
+        # auto recognize captcha, returns the candidates ranked by confidence
+        try:
+            img_src = self.__captchaSource()
             base64_str = img_src.split(',', 1)[1]
             captcha_img = base64.b64decode(base64_str)
-            captcha_text = self.__ddddocr.classification(captcha_img)
-            captcha_text = ''.join(filter(str.isalnum, captcha_text)).lower()
-            self._showTrace(f"识别到验证码为 : '{captcha_text}'")
-            if len(captcha_text) != 4:
-                raise Exception("识别到的验证码长度不等于 4 个字符 !")
-            return captcha_text
+            candidates = OcrService.recognize(captcha_img)
+            if not candidates:
+                raise Exception("识别结果置信度过低 !")
+            self._showTrace(
+                f"识别到验证码为 : {", ".join(f"'{text}' ({confidence:.0%})" for text, confidence in candidates)}"
+            )
+            return [text for text, _ in candidates]
         except Exception as e:
             self._showTrace(f"验证码识别失败 ! : {e}")
-            return ""
+            return []
 
 
     def __manualRecognizeCaptcha(
         self
-    ) -> str:
+    ) -> list:
 
         # manual recognize captcha
         try:
@@ -108,10 +117,10 @@ class LibLogin(LibOperator):
             self._showTrace(f"输入的验证码为 : '{captcha_text}'")
             if len(captcha_text) != 4:
                 raise Exception("输入的验证码长度不等于 4 个字符 !")
-            return captcha_text
+            return [captcha_text]
         except Exception as e:
             self._showTrace(f"输入验证码失败 ! : {e}")
-            return ""
+            return []
 
 
     def __refreshCaptcha(
@@ -133,22 +142,22 @@ class LibLogin(LibOperator):
     def __solveCaptcha(
         self,
         auto_captcha: bool = True
-    ) -> str:
+    ) -> list:
 
         max_attempts = 3 # the possibility of 3 times failed is less than (10%^3)
         for _ in range(max_attempts):
             if auto_captcha:
-                captcha_text = self.__autoRecognizeCaptcha()
+                candidates = self.__autoRecognizeCaptcha()
             else:
                 self._showTrace(f"用户未配置自动识别验证码, 请手动输入验证码 !")
-                captcha_text = self.__manualRecognizeCaptcha()
-            if captcha_text:
-                return captcha_text
+                candidates = self.__manualRecognizeCaptcha()
+            if candidates:
+                return candidates
             else:
                 if not self.__refreshCaptcha():
-                    return ""
+                    return []
         self._showTrace(f"验证码识别失败 {max_attempts} 次, 达到最大尝试次数 !")
-        return ""
+        return []
 
 
     def __fillCaptchaElement(
@@ -178,6 +187,7 @@ class LibLogin(LibOperator):
             self._showTrace("未提供有效 WebDriver 实例 !")
             return False
         # begin login process
+        candidates = []
         for attempt in range(max_attempts):
             self._showTrace(f"用户 {username} 第 {attempt + 1} 次尝试登录......")
             if not self.__fillLogInElements(
@@ -185,9 +195,12 @@ class LibLogin(LibOperator):
                 password,
             ):
                 continue
-            captcha_text = self.__solveCaptcha(auto_captcha)
-            if not captcha_text:
-                continue
+            if not candidates:
+                candidates = self.__solveCaptcha(auto_captcha)
+                if not candidates:
+                    continue
+            captcha_text = candidates.pop(0)
+            captcha_src = self.__captchaSource()
             if not self.__fillCaptchaElement(captcha_text):
                 continue
             self._showTrace("尝试登录...")
@@ -204,4 +217,39 @@ class LibLogin(LibOperator):
                 return True
             else:
                 self._showTrace(f"用户 {username} 第 {attempt + 1} 次登录失败 !")
+            # the next candidate is only tried if the site keeps the same captcha image
+            if candidates and self.__captchaSource() != captcha_src:
+                candidates = []
+            elif candidates:
+                self._showTrace(f"验证码未刷新, 尝试下一个候选验证码 '{candidates[0]}'")
         return False
+
+
+    def resume(
+        self,
+        username: str,
+        cookies: list,
+        check_url: str
+    ) -> bool:
+
+        """
+            Put the saved cookies back into the browser and check that the
+            session is still logged in.
+        """
+        if self.__driver is None:
+            self._showTrace("未提供有效 WebDriver 实例 !")
+            return False
+        try:
+            # the cookies can only be added on a page of the same host
+            self.__driver.delete_all_cookies()
+            for cookie in cookies:
+                self.__driver.add_cookie({
+                    "name": cookie["name"],
+                    "value": cookie["value"],
+                    "path": cookie.get("path", "/")
+                })
+            self.__driver.get(check_url)
+        except Exception as e:
+            self._showTrace(f"用户 {username} 会话恢复失败 ! : {e}")
+            return False
+        return self.__isSeatPage()
@@ -18,6 +18,9 @@ from selenium.webdriver.support import expected_conditions as EC
 
 from base.LibOperator import LibOperator
 
+from utils.PageReadiness import PageReadiness
+from utils.TimeSlots import TimeSlots
+
 
 class LibRenew(LibOperator):
 
@@ -31,6 +34,13 @@ class LibRenew(LibOperator):
         super().__init__(input_queue, output_queue)
 
         self.__driver = driver
+        self.__renew_dialog = PageReadiness()\
+            .visible("#extendDiv", "续约对话框")\
+            .present("#extendDiv p.messageHead", "续约提示")\
+            .present("#extendDiv div.resultMessage", "续约信息")
+        self.__renew_list = PageReadiness()\
+            .present("#extendDiv .renewal_List li", "续约时间列表")\
+            .present("#extendDiv .btnOK", "确定按钮")
 
 
     def _waitResponseLoad(
@@ -40,37 +50,18 @@ class LibRenew(LibOperator):
         self.__driver.refresh()
         return True
 
-    @staticmethod
-    def __timeToMins(
-        time_str: str
-    ) -> int:
-
-        hour, minute = map(int, time_str.split(":"))
-        return hour*60 + minute
-
-    @staticmethod
-    def __minsToTime(
-        mins: int
-    ) -> str:
-
-        hour, minute = divmod(mins, 60)
-        return f"{hour:02d}:{minute:02d}"
-
 
     def __waitRenewDialog(
         self
     ) -> bool:
 
+        missing = self.__renew_dialog.wait(self.__driver, 2)
+        if missing:
+            self._showTrace(f"续约时间选择界面加载失败 ! : 未找到 {", ".join(missing)}")
+            return False
         try:
-            WebDriverWait(self.__driver, 2).until(
-                EC.visibility_of_element_located((By.ID, "extendDiv"))
-            )
-            head_message = WebDriverWait(self.__driver, 2).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "#extendDiv p.messageHead"))
-            )
-            result_message = WebDriverWait(self.__driver, 2).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "#extendDiv div.resultMessage"))
-            )
+            head_message = self.__driver.find_element(By.CSS_SELECTOR, "#extendDiv p.messageHead")
+            result_message = self.__driver.find_element(By.CSS_SELECTOR, "#extendDiv div.resultMessage")
         except:
             self._showTrace("续约时间选择界面加载失败 !")
             return False
@@ -81,17 +72,9 @@ class LibRenew(LibOperator):
                 f"      续约失败 !\n"\
                 f"          {result_message}")
             return False
-        try:
-            WebDriverWait(self.__driver, 2).until(
-                EC.presence_of_all_elements_located(
-                    (By.CSS_SELECTOR, "#extendDiv .renewal_List li")
-                )
-            )
-            WebDriverWait(self.__driver, 2).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "#extendDiv .btnOK"))
-            )
-        except:
-            self._showTrace("续约时间选择界面加载失败 !")
+        missing = self.__renew_list.wait(self.__driver, 2)
+        if missing:
+            self._showTrace(f"续约时间选择界面加载失败 ! : 未找到 {", ".join(missing)}")
             return False
         return True
 
@@ -103,55 +86,37 @@ class LibRenew(LibOperator):
     ) -> bool:
 
         """
-            TODO : this function is too long and too ugly
-
-            we need to refactor it to make it more readable.
-            but may be it is not a good idea to refactor it. :) who knows...
+            Click the renew time nearest to the end of the record plus the expected
+            renew duration, then confirm the renewal.
         """
-
         end_time = record["time"]["end"]
         renew_info = reserve_info["renew_time"]
         max_diff = renew_info["max_diff"]
         prefer_earlier = renew_info["prefer_early"]
-        target_renew_mins = self.__timeToMins(end_time) + renew_info["expect_duration"]*60
-        renew_ok_btn = self.__driver.find_element(
-            By.CSS_SELECTOR, "#extendDiv .btnOK"
-        )
+        target_renew_mins = TimeSlots.toMins(end_time) + renew_info["expect_duration"]*60
         try:
-            renew_time_opts = self.__driver.find_elements(
-                By.CSS_SELECTOR, "#extendDiv .renewal_List li"
+            # the 'id' of an option is its minutes, read with the text in one call
+            renew_time_opts = self.__driver.execute_script(
+                "return Array.from(document.querySelectorAll(arguments[0]), "\
+                "(option) => [option.id, (option.innerText || option.textContent).trim()]);",
+                "#extendDiv .renewal_List li"
             )
-            free_times = []
-            best_time_diff = max_diff
-            best_actual_diff = None
-            best_time_opt = None
-
             if not renew_time_opts:
                 self._showTrace("当前未查询到可用续约时间 !")
                 return False
-            for time_opt in renew_time_opts:
-                time_attr = time_opt.get_attribute("id")
-                if time_attr and time_attr.isdigit():
-                    time_val = int(time_attr)
-                    free_times.append(time_opt.text.strip())
-                else:
-                    continue
-                actual_diff = time_val - target_renew_mins
-                abs_diff = abs(actual_diff)
-                if abs_diff < best_time_diff or (
-                    abs_diff == best_time_diff and (
-                        # 优先选择更早的时间
-                        (prefer_earlier and actual_diff <= 0) or
-                        # 优先选择更晚的时间
-                        (not prefer_earlier and actual_diff >= 0)
-                    )
-                ):
-                    best_time_diff = abs_diff
-                    best_actual_diff = actual_diff
-                    best_time_opt = time_opt
-
-            if best_time_opt is not None:
-                best_time_opt.click()
+            time_attrs = [time_attr for time_attr, _ in renew_time_opts]
+            time_values = TimeSlots.values(time_attrs)
+            free_times = [
+                time_text for (_, time_text), time_val in zip(renew_time_opts, time_values)
+                if time_val != TimeSlots.INVALID
+            ]
+            best_index = TimeSlots.nearest(time_values, target_renew_mins, max_diff, prefer_earlier)
+            if best_index != -1:
+                best_time_text = renew_time_opts[best_index][1]
+                best_actual_diff = int(time_values[best_index]) - target_renew_mins
+                self.__driver.find_element(
+                    By.CSS_SELECTOR, f"#extendDiv .renewal_List li[id='{time_attrs[best_index]}']"
+                ).click()
                 abs_time_diff = abs(best_actual_diff)
                 if best_actual_diff < 0:
                     time_relation = f"早了 {abs_time_diff} 分钟"
@@ -160,12 +125,12 @@ class LibRenew(LibOperator):
                 else:
                     time_relation = f"正好等于续约时间"
                 self._showTrace(
-                    f"选择距离期望续约时间最近的 {best_time_opt.text}, "\
+                    f"选择距离期望续约时间最近的 {best_time_text}, "\
                     f"与期望续约时间相比 {time_relation}"
                 )
                 # update the actual renew end time
-                record["time"]["end"] = best_time_opt.text.strip()
-                renew_ok_btn.click()
+                record["time"]["end"] = best_time_text
+                self.__driver.find_element(By.CSS_SELECTOR, "#extendDiv .btnOK").click()
                 return True
             self._showTrace(
                 "无法选择最近的可用续约时间 !" \
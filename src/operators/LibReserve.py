@@ -11,26 +11,132 @@ import re
 import time
 import queue
 
-from datetime import datetime, timedelta
+import numpy as np
+
+from urllib.parse import urljoin
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
 from base.LibOperator import LibOperator
 
+from utils.PageReadiness import PageReadiness
+from utils.RoomCache import RoomCache
+from utils.RoomSnapshot import RoomSnapshot
+from utils.SeatTopology import SeatTopology
+from utils.TimeSlots import TimeSlots
+
 
 class LibReserve(LibOperator):
 
+    # find the seat by its number and click it in one call,
+    # the cached element id is tried first and the whole room is scanned if it is stale
+    __SELECT_SEAT_SCRIPT = """
+        const [seatNumber, cachedId] = arguments;
+        const normalize = (seat) => (seat.innerText || seat.textContent).trim().replace(/^0+/, "").toUpperCase();
+        const index = {};
+        let seat = cachedId ? document.getElementById(cachedId) : null;
+        if (seat && normalize(seat) !== seatNumber) {
+            seat = null;
+        }
+        if (!seat) {
+            for (const item of document.querySelectorAll("li[id^='seat_']")) {
+                const number = normalize(item);
+                index[number] = item.id;
+                if (number === seatNumber && !seat) {
+                    seat = item;
+                }
+            }
+        }
+        if (!seat) {
+            return { found: false, clicked: false, status: "", index: index };
+        }
+        const link = seat.querySelector("a");
+        if (!link) {
+            return { found: true, clicked: false, status: "", index: index };
+        }
+        link.click();
+        return { found: true, clicked: true, status: link.getAttribute("title") || "", index: index };
+    """
+    # the state of every seat in the room read in one pass, as the codes of
+    # RoomSnapshot in the order of the given seat numbers
+    __ROOM_SNAPSHOT_SCRIPT = """
+        const [seatNumbers] = arguments;
+        const index = {};
+        const states = {};
+        for (const item of document.querySelectorAll("li[id^='seat_']")) {
+            const number = (item.innerText || item.textContent).trim().replace(/^0+/, "").toUpperCase();
+            const link = item.querySelector("a");
+            const hint = [item.className, link ? link.className : "", link ? link.getAttribute("title") : ""].join(" ");
+            index[number] = item.id;
+            if (!link || /using|occupied|away|unavailable|不可|使用|暂离/.test(hint)) {
+                states[number] = 2;
+            } else if (/booked|reserved|已预约|预约中/.test(hint)) {
+                states[number] = 3;
+            } else if (/free|空闲|可预约/.test(hint)) {
+                states[number] = 1;
+            } else {
+                states[number] = 4;
+            }
+        }
+        return { index: index, codes: seatNumbers.map((number) => states[number] || 0) };
+    """
+    # click the date, place, floor and room options of the map page in one call,
+    # each option is clicked as soon as it is in the page, and the call returns
+    # when the seats of the room replace the seats loaded with the page
+    __OPEN_ROOM_SCRIPT = """
+        const [steps, timeout, done] = arguments;
+        const deadline = Date.now() + timeout;
+        const waitFor = (selector) => new Promise((resolve) => {
+            const poll = () => {
+                const element = document.querySelector(selector);
+                if (element || Date.now() >= deadline) {
+                    resolve(element);
+                    return;
+                }
+                setTimeout(poll, 50);
+            };
+            poll();
+        });
+        for (const seat of document.querySelectorAll("li[id^='seat_']")) {
+            seat.setAttribute("data-stale", "");
+        }
+        (async () => {
+            for (const step of steps) {
+                const trigger = step.trigger ? document.getElementById(step.trigger) : null;
+                if (trigger) {
+                    trigger.click();
+                }
+                const element = await waitFor(step.selector);
+                if (!element) {
+                    done({ failed: step.label });
+                    return;
+                }
+                if (step.click) {
+                    element.click();
+                }
+            }
+            done({ failed: null });
+        })().catch((e) => done({ failed: String(e) }));
+    """
+
     def __init__(
         self,
         input_queue: queue.Queue,
         output_queue: queue.Queue,
-        driver: any
+        driver: any,
+        seat_fallback: dict = None,
+        room_cache: RoomCache = None,
+        room_link: dict = None
     ):
 
         super().__init__(input_queue, output_queue)
 
         self.__driver = driver
+        # try the nearest free seats when the wanted one is taken
+        self.__seat_fallback = seat_fallback or {}
+        # open the room from the map url directly, the dropdowns are the fallback
+        self.__room_link = room_link or {}
         # library floor and room mapping in website
         self.__floor_map = {
             "2": "二层",
@@ -48,6 +154,15 @@ class LibReserve(LibOperator):
             "7": "四层期刊区",
             "8": "五层考研"
         }
+        # the seat element ids, the room snapshot and the time options,
+        # shared with the other users of the run
+        self.__room_cache = room_cache or RoomCache()
+        self.__room_key = None
+        # the time options depend on the bookings of the selected seat
+        self.__seat_number = None
+        self.__seat_layout = PageReadiness()\
+            .present("#seatLayout", "座位布局")\
+            .present("li[id^='seat_']", "座位列表")
 
 
     def _waitResponseLoad(
@@ -72,49 +187,50 @@ class LibReserve(LibOperator):
             content_elements = self.__driver.find_elements(
                 By.CSS_SELECTOR, ".layoutSeat dd"
             )
-            if not content_elements:
-                 self._showTrace("未找到预约结果")
-                 raise
             title = title_elements[0].text if title_elements else ""
             contents = [element.text for element in content_elements if element.text.strip()]
-            for message in contents:
-               if "预约失败" in message or "已有1个有效预约" in message:
-                   self._showTrace(f"预约失败 - {"".join(contents)}")
-                   raise
-            if "预定好了" in title or "预约成功" in title or "操作成功" in title:
-                if len(contents) >= 6:
-                    self._showTrace(f"\n"\
-                        f"      预约成功 !\n"\
-                        f"          {contents[1]}\n"\
-                        f"          {contents[2]}\n"\
-                        f"          {contents[3]}\n"\
-                        f"          签到时间 ：{contents[5]}"
-                    )
-                else:
-                    self._showTrace("\n"\
-                        "      预约成功 !\n"\
-                        "          未找获取到详细信息"
-                    )
+            if self._decodeReserveResult(title, contents) is False:
+                raise
             return True
         except:
             self._showTrace(f"预约结果加载失败 !")
             return False
 
-    @staticmethod
-    def __timeToMins(
-        time_str: str
-    ) -> int:
 
-        hour, minute = map(int, time_str.split(":"))
-        return hour*60 + minute
+    def _decodeReserveResult(
+        self,
+        title: str,
+        contents: list
+    ) -> bool:
 
-    @staticmethod
-    def __minsToTime(
-        mins: int
-    ) -> str:
+        """
+            Decode the '.layoutSeat' result of a reservation.
 
-        hour, minute = divmod(mins, 60)
-        return f"{hour:02d}:{minute:02d}"
+            Returns True if succeeded, False if failed, None if the result is unknown.
+        """
+        if not contents:
+            self._showTrace("未找到预约结果")
+            return False
+        for message in contents:
+            if "预约失败" in message or "已有1个有效预约" in message:
+                self._showTrace(f"预约失败 - {"".join(contents)}")
+                return False
+        if "预定好了" in title or "预约成功" in title or "操作成功" in title:
+            if len(contents) >= 6:
+                self._showTrace(f"\n"\
+                    f"      预约成功 !\n"\
+                    f"          {contents[1]}\n"\
+                    f"          {contents[2]}\n"\
+                    f"          {contents[3]}\n"\
+                    f"          签到时间 ：{contents[5]}"
+                )
+            else:
+                self._showTrace("\n"\
+                    "      预约成功 !\n"\
+                    "          未找获取到详细信息"
+                )
+            return True
+        return None
 
 
     def __containRequiredInfo(
@@ -136,6 +252,13 @@ class LibReserve(LibOperator):
                 raise ValueError("未指定座位")
             if reserve_info["seat_id"] == "":
                 raise ValueError("未指定座位号")
+            topology = SeatTopology.forRoom(reserve_info["room"])
+            if topology is not None and not topology.contains(reserve_info["seat_id"]):
+                # the seat map table may be behind the website, still try it
+                self._showTrace(
+                    f"座位 {reserve_info['seat_id']} 不在 {self.__room_map[reserve_info['room']]} 的座位图中, "\
+                    f"请检查座位号是否正确"
+                )
             return True
         except ValueError as e:
             self._showTrace(
@@ -207,10 +330,10 @@ class LibReserve(LibOperator):
         if reserve_info.get("end_time") is None:
             reserve_info["end_time"] = {}
         if "time" not in reserve_info["end_time"]:
-            end_mins = self.__timeToMins(reserve_info["begin_time"]["time"])
+            end_mins = TimeSlots.toMins(reserve_info["begin_time"]["time"])
             end_mins = end_mins + int(reserve_info["expect_duration"]*60)
             reserve_info["end_time"] = {
-                "time": self.__minsToTime(end_mins),
+                "time": TimeSlots.toTime(end_mins),
                 "max_diff": 30,
                 "prefer_early": False
             }
@@ -232,8 +355,8 @@ class LibReserve(LibOperator):
     ):
 
         begin_time, end_time = reserve_info["begin_time"], reserve_info["end_time"]
-        begin_mins = self.__timeToMins(begin_time["time"])
-        end_mins = self.__timeToMins(end_time["time"])
+        begin_mins = TimeSlots.toMins(begin_time["time"])
+        end_mins = TimeSlots.toMins(end_time["time"])
         # if end time is earlier than begin_time, exchange them
         if end_mins < begin_mins:
             self._showTrace(
@@ -242,15 +365,15 @@ class LibReserve(LibOperator):
             reserve_info["end_time"] = begin_time
             reserve_info["begin_time"] = end_time
             begin_time, end_time = reserve_info["begin_time"], reserve_info["end_time"]
-            begin_mins = self.__timeToMins(begin_time["time"])
-            end_mins = self.__timeToMins(end_time["time"])
+            begin_mins = TimeSlots.toMins(begin_time["time"])
+            end_mins = TimeSlots.toMins(end_time["time"])
         # ensure the end time is not later than 23:30
-        if end_mins > self.__timeToMins("23:30"):
+        if end_mins > TimeSlots.toMins("23:30"):
             self._showTrace(
                 f"结束时间 {end_time['time']} 晚于 23:30, 自动设置为 23:30"
             )
             reserve_info["end_time"]["time"] = "23:30"
-            end_mins = self.__timeToMins("23:30")
+            end_mins = TimeSlots.toMins("23:30")
         # ensure the duration is not longer than 8 hours
         if reserve_info["satisfy_duration"]:
             if reserve_info["expect_duration"] > 8:
@@ -267,11 +390,11 @@ class LibReserve(LibOperator):
                     f"{float((end_mins - begin_mins)/60)} 小时 "
                     f"超出最大时长 8 小时, 自动设置为 8 小时"
                 )
-                reserve_info["end_time"]["time"] = self.__minsToTime(begin_mins + 8*60)
+                reserve_info["end_time"]["time"] = TimeSlots.toTime(begin_mins + 8*60)
         return True
 
 
-    def __checkReserveInfo(
+    def _checkReserveInfo(
         self,
         reserve_info: dict
     ) -> bool:
@@ -451,121 +574,238 @@ class LibReserve(LibOperator):
 
     def __selectSeat(
         self,
+        room: str,
         seat_id: str
     ) -> bool:
 
-        try:
-            # wait fot seat layout element to load
-            WebDriverWait(self.__driver, 2).until(
-                EC.presence_of_element_located((By.ID, "seatLayout"))
-            )
-            WebDriverWait(self.__driver, 2).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "li[id^='seat_']"))
-            )
-        except:
-            self._showTrace(f"座位加载失败 !")
+        missing = self.__seat_layout.wait(self.__driver, 5)
+        if missing:
+            self._showTrace(f"座位加载失败 ! : 未找到 {", ".join(missing)}")
             return False
+        seat_number = SeatTopology.canonicalSeat(seat_id)
+        room_index = self.__room_cache.get(self.__room_key, "seat_index") or {}
         try:
-            all_seats = self.__driver.find_elements(
-                By.CSS_SELECTOR, "li[id^='seat_']"
+            result = self.__driver.execute_script(
+                self.__SELECT_SEAT_SCRIPT,
+                seat_number,
+                room_index.get(seat_number)
             )
-            seat_id_upper = seat_id.lstrip('0').upper()
-            for seat in all_seats:
-                if not seat_id_upper == seat.text.lstrip('0'):
-                    continue
-                seat_link = seat.find_element(By.TAG_NAME, "a")
-                WebDriverWait(self.__driver, 2).until(
-                    EC.element_to_be_clickable(seat_link)
-                )
-                seat_link.click()
-                seat_status = seat_link.get_attribute("title")
-                self._showTrace(f"座位 {seat_id} 选择成功 ! : 当前状态 - '{seat_status}'")
-                return True
+        except Exception as e:
+            self._showTrace(f"座位选择失败 ! : {e}")
+            return False
+        if result["index"]:
+            # the element ids of the seats do not change in the session
+            self.__room_cache.put(self.__room_key, "seat_index", result["index"])
+        if not result["found"]:
             self._showTrace(f"座位 {seat_id} 在该楼层区域中不存在, 请检查座位号是否正确")
-        except:
-            self._showTrace(f"座位选择失败 !")
             return False
+        if not result["clicked"]:
+            self._showTrace(f"座位选择失败 ! : 座位 {seat_id} 不可点击")
+            return False
+        self.__seat_number = seat_number
+        self._showTrace(f"座位 {seat_id} 选择成功 ! : 当前状态 - '{result["status"]}'")
+        return True
 
 
-    def __selectNearestTime(
+    def _showTimeChoice(
         self,
-        time_id: str,
         time_type: str,
-        target_time: int,
-        max_time_diff: int = 30,
-        prefer_earlier: bool = True
-    ) -> int:
+        time_val: int,
+        actual_diff: int
+    ):
 
-        try:
-            WebDriverWait(self.__driver, 2).until(
-                EC.presence_of_all_elements_located(
-                    (By.CSS_SELECTOR, f"#{time_id} ul li a")
-                )
+        abs_time_diff = abs(actual_diff)
+        if actual_diff < 0:
+            time_relation = f"早了 {abs_time_diff} 分钟"
+        elif actual_diff > 0:
+            time_relation = f"晚了 {abs_time_diff} 分钟"
+        else:
+            time_relation = f"正好等于 {time_type}"
+        self._showTrace(
+            f"选择距离期望 {time_type} 最近的 {TimeSlots.toTime(time_val)}, "\
+            f"与期望 {time_type} 相比 {time_relation}"
+        )
+
+
+    def _periodTargets(
+        self,
+        begin_time: dict,
+        end_time: dict,
+        expct_duration: int,
+        satisfy_duration: bool
+    ) -> tuple:
+
+        """
+            (expected begin, expected end, end target, duration) in minutes of the day,
+            the end target is None if the end follows the chosen begin time.
+        """
+        expect_begin_mins = TimeSlots.toMins(begin_time["time"])
+        if satisfy_duration:
+            duration = int(expct_duration*60)
+            self._showTrace(
+                f"需要满足期望预约持续时间: {expct_duration} 小时, 结束时间根据开始时间计算"
             )
-        except:
-            self._showTrace(f"{time_type} 选择失败 ! : 当前未查询到可用时间")
-            return -1
-        try:
-            all_time_opts = self.__driver.find_elements(
-                By.CSS_SELECTOR,
-                f"#{time_id} ul li a"
+            return expect_begin_mins, min(expect_begin_mins + duration, TimeSlots.LATEST_END), None, duration
+        expect_end_mins = TimeSlots.toMins(end_time["time"])
+        return expect_begin_mins, expect_end_mins, expect_end_mins, expect_end_mins - expect_begin_mins
+
+
+    def _probeSeatTime(
+        self,
+        begin_time: dict,
+        end_time: dict,
+        begin_values: np.ndarray,
+        load_end_values: callable,
+        targets: tuple
+    ) -> tuple:
+
+        """
+            Choose the begin and the end time together: the end times of the begin times
+            within the max time diff are loaded by 'load_end_values(index)', the nearest
+            begin time first, until a pair meets the whole duration.
+
+            Returns (begin index, end index, satisfied minutes) of the best period and
+            the loaded end times, the period is None if there is no pair.
+        """
+        expect_begin_mins, expect_end_mins, end_target, duration = targets
+        candidates = TimeSlots.candidates(
+            begin_values, expect_begin_mins, begin_time["max_diff"], begin_time["prefer_early"]
+        )
+        if not candidates:
+            self._showTrace(
+                f"无法选择最近的 开始时间 {begin_time["time"]}, "\
+                f"所有可选时间与目标时间相差都超过 {begin_time["max_diff"]} 分钟"
+            )
+            self._showTrace(f"当前可供预约的 开始时间 有: {[
+                TimeSlots.toTime(val) for val in begin_values if val != TimeSlots.INVALID
+            ]}")
+            return None, None
+        best, end_values = TimeSlots.probePeriod(
+            begin_values, candidates, load_end_values, expect_begin_mins, end_target, duration,
+            (begin_time["max_diff"], begin_time["prefer_early"]),
+            (end_time["max_diff"], end_time["prefer_early"])
+        )
+        if best is None:
+            self._showTrace(
+                f"无法在最大时间差内同时满足开始时间 {begin_time["time"]} 和结束时间 "\
+                f"{TimeSlots.toTime(expect_end_mins)}"
             )
-            free_times = []
-            best_time_diff = max_time_diff
-            best_actual_diff = None
-            best_time_opt = None
-
-            if not all_time_opts:
-                self._showTrace(f"{time_type} 选择失败 ! : 当前未查询到可用时间")
-                return -1
-            for time_opt in all_time_opts:
-                time_attr = time_opt.get_attribute("time")
-                if time_attr == "now":
-                    now = datetime.now()
-                    time_val = int(now.hour*60 + now.minute)
-                elif time_attr and time_attr.isdigit():
-                    time_val = int(time_attr)
-                else:
-                    continue
-                free_times.append(self.__minsToTime(time_val))
-                actual_diff = time_val - target_time
-                abs_diff = abs(actual_diff)
-                if abs_diff < best_time_diff or (
-                    abs_diff == best_time_diff and (
-                        # prefer earlier time
-                        (prefer_earlier and actual_diff <= 0) or
-                        # prefer later time
-                        (not prefer_earlier and actual_diff >= 0)
+            for index in candidates:
+                if end_values[index] is not None:
+                    self._showTrace(
+                        f"开始时间 {TimeSlots.toTime(begin_values[index])} 可选的结束时间有: {[
+                            TimeSlots.toTime(val) for val in end_values[index] if val != TimeSlots.INVALID
+                        ]}"
                     )
-                ):
-                    best_time_diff = abs_diff
-                    best_actual_diff = actual_diff
-                    best_time_opt = time_opt
-
-            if best_time_opt is not None:
-                best_time_opt.click()
-                abs_time_diff = abs(best_actual_diff)
-                if best_actual_diff < 0:
-                    time_relation = f"早了 {abs_time_diff} 分钟"
-                elif best_actual_diff > 0:
-                    time_relation = f"晚了 {abs_time_diff} 分钟"
-                else:
-                    time_relation = f"正好等于 {time_type}"
-                target_time += best_actual_diff
+        return best, end_values
+
+
+    def _showPeriodChoice(
+        self,
+        begin_time: dict,
+        begin_val: int,
+        end_val: int,
+        satisfied: int,
+        targets: tuple
+    ):
+
+        expect_begin_mins, expect_end_mins, end_target, duration = targets
+        self._showTimeChoice("开始时间", begin_val, begin_val - expect_begin_mins)
+        if end_target is None:
+            end_target = min(begin_val + duration, TimeSlots.LATEST_END)
+            if begin_val + duration > TimeSlots.LATEST_END:
                 self._showTrace(
-                    f"选择距离期望 {time_type} 最近的 {best_time_opt.text}, "\
-                    f"与期望 {time_type} 相比 {time_relation}"
+                    f"预约持续时间 {duration/60:g} 小时, 超过最大预约时间 23:30, 自动调整为 23:30"
                 )
-                return target_time
+        self._showTimeChoice("结束时间", end_val, end_val - end_target)
+        if satisfied < duration:
             self._showTrace(
-                f"无法选择最近的 {time_type} {self.__minsToTime(target_time)}, "\
-                f"所有可选时间与目标时间相差都超过 {max_time_diff} 分钟"
+                f"实际预约持续时间 {(end_val - begin_val)/60:g} 小时, 短于期望的 {duration/60:g} 小时"
+            )
+        self._showTrace(
+            f"期望预约时间段: {begin_time["time"]} - {TimeSlots.toTime(expect_end_mins)}, "
+            f"实际预约时间段: {TimeSlots.toTime(begin_val)} - {TimeSlots.toTime(end_val)}"
+        )
+
+
+    def __readTimeAttrs(
+        self,
+        time_id: str
+    ) -> list:
+
+        """
+            The 'time' attributes of all the options read in one call, None if there
+            is no option. The options marked stale are the ones of an earlier begin time.
+        """
+        selector = f"#{time_id} ul li a:not([data-stale])"
+        try:
+            WebDriverWait(self.__driver, 2).until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
+            )
+            time_attrs = self.__driver.execute_script(
+                "return Array.from(document.querySelectorAll(arguments[0]), "\
+                "(option) => option.getAttribute('time'));",
+                selector
+            )
+        except:
+            return None
+        return time_attrs or None
+
+
+    def __clickTime(
+        self,
+        time_id: str,
+        time_attr: str
+    ) -> bool:
+
+        try:
+            WebDriverWait(self.__driver, 2).until(
+                EC.element_to_be_clickable(
+                    (By.CSS_SELECTOR, f"#{time_id} ul li a[time='{time_attr}']:not([data-stale])")
+                )
+            ).click()
+            return True
+        except:
+            return False
+
+
+    def __clickBeginTime(
+        self,
+        time_attr: str
+    ) -> bool:
+
+        # the end options in the page are of the former begin time until they are reloaded
+        try:
+            self.__driver.execute_script(
+                "for (const option of document.querySelectorAll(arguments[0])) { "\
+                "option.setAttribute('data-stale', ''); }",
+                "#endTime ul li a"
             )
-            self._showTrace(f"当前可供预约的 {time_type} 有: {free_times}")
-            return -1
         except:
-            self._showTrace(f"{time_type} {self.__minsToTime(target_time)} 选择失败 !")
-            return -1
+            pass
+        return self.__clickTime("startTime", time_attr)
+
+
+    def __readEndTimes(
+        self,
+        begin_attr: str,
+        begin_val: int
+    ) -> tuple:
+
+        """
+            The end options of the begin time of the seat, from the room cache or read after clicking
+            the begin time, returns (time_attrs, clicked), time_attrs is None if unknown.
+        """
+        options_name = ("endTime", self.__seat_number, begin_val)
+        time_attrs = self.__room_cache.get(self.__room_key, options_name)
+        if time_attrs is not None:
+            return time_attrs, False
+        if not self.__clickBeginTime(begin_attr):
+            return None, False
+        time_attrs = self.__readTimeAttrs("endTime")
+        if time_attrs is not None:
+            self.__room_cache.put(self.__room_key, options_name, time_attrs)
+        return time_attrs, True
 
 
     def __selectSeatTime(
@@ -576,75 +816,128 @@ class LibReserve(LibOperator):
         satisfy_duration: bool = True
     ) -> bool:
 
-        expect_begin_time = actual_begin_time = begin_time["time"]
-        expect_end_time = actual_end_time = end_time["time"]
-        expect_begin_mins = self.__timeToMins(expect_begin_time)
-        actual_begin_mins = expect_begin_mins
-        expect_end_mins = self.__timeToMins(expect_end_time)
-
-        # select the begin time
-        if self.__selectNearestTime(
-            time_id="startTime", # dont change into begin, this is the element in the page
-            time_type="开始时间",
-            target_time=expect_begin_mins,
-            max_time_diff=begin_time["max_diff"],
-            prefer_earlier=begin_time["prefer_early"]
-        ) == -1:
+        """
+            Choose the begin and the end time together: the end options of the begin
+            options within the max time diff are read, the nearest begin option first,
+            until a pair meets the whole duration, then the best pair is clicked.
+        """
+        targets = self._periodTargets(begin_time, end_time, expct_duration, satisfy_duration)
+        # the begin options of the seat, read by an earlier attempt of the run
+        begin_attrs = self.__room_cache.get(self.__room_key, ("startTime", self.__seat_number))
+        if begin_attrs is None:
+            begin_attrs = self.__readTimeAttrs("startTime")
+            if begin_attrs is None:
+                self._showTrace("开始时间 选择失败 ! : 当前未查询到可用时间")
+                return False
+            self.__room_cache.put(self.__room_key, ("startTime", self.__seat_number), begin_attrs)
+        begin_values = TimeSlots.values(begin_attrs)
+        end_attrs = [None]*len(begin_attrs)
+        clicked = None
+
+        def loadEndValues(
+            index: int
+        ) -> list:
+
+            nonlocal clicked
+            time_attrs, is_clicked = self.__readEndTimes(begin_attrs[index], int(begin_values[index]))
+            if is_clicked:
+                clicked = index
+            if time_attrs is None:
+                return None
+            end_attrs[index] = time_attrs
+            return TimeSlots.values(time_attrs)
+
+        best, end_values = self._probeSeatTime(begin_time, end_time, begin_values, loadEndValues, targets)
+        if end_values is None:
+            # the cached options may be out of date
+            self.__room_cache.put(self.__room_key, ("startTime", self.__seat_number), None)
             return False
-        else:
-            actual_begin_time = self.__minsToTime(expect_begin_mins)
-            actual_begin_mins = self.__timeToMins(actual_begin_time)
-        # if 'satisfy_duration' is True.
-        # select the end time based on the begin time
-        # (because it may be changed under the 'max time diff' strategy) and expect duration.
-        if satisfy_duration:
-            expect_end_mins = int(actual_begin_mins + expct_duration*60)
-            if expect_end_mins > self.__timeToMins("23:30"):
-                expect_end_mins = self.__timeToMins("23:30")
-                self._showTrace(
-                    f"预约持续时间 {expct_duration} 小时, 超过最大预约时间 23:30, 自动调整为 23:30"
-                )
-            expect_end_time = self.__minsToTime(expect_end_mins)
-            self._showTrace(
-                f"需要满足期望预约持续时间: {expct_duration} 小时, "\
-                f"根据开始时间 {actual_begin_time} 计算结束时间: {self.__minsToTime(expect_end_mins)}"
+        if best is None:
+            return False
+        begin_index, end_index, satisfied = best
+        begin_val = int(begin_values[begin_index])
+        end_val = int(end_values[begin_index][end_index])
+        if clicked != begin_index and not self.__clickBeginTime(begin_attrs[begin_index]):
+            self._showTrace(f"开始时间 {TimeSlots.toTime(begin_val)} 选择失败 !")
+            self.__room_cache.put(self.__room_key, ("startTime", self.__seat_number), None)
+            return False
+        if not self.__clickTime("endTime", end_attrs[begin_index][end_index]):
+            self._showTrace(f"结束时间 {TimeSlots.toTime(end_val)} 选择失败 !")
+            self.__room_cache.put(self.__room_key, ("endTime", self.__seat_number, begin_val), None)
+            return False
+        self._showPeriodChoice(begin_time, begin_val, end_val, satisfied, targets)
+        return True
+
+
+    def __openRoomByLink(
+        self,
+        reserve_info: dict
+    ) -> bool:
+
+        """
+            Load the map page from its url built from the reserve info, then select
+            the date, place, floor and room in the page without any fixed sleep.
+        """
+        date, floor, room = reserve_info["date"], reserve_info["floor"], reserve_info["room"]
+        place = "1" # the library only have this place :)
+        try:
+            map_url = self.__room_link.get("map_url", "/map").format(
+                date=date, place=place, floor=floor, room=room
             )
-        # select the end time
-        if self.__selectNearestTime(
-            time_id="endTime",
-            time_type="结束时间",
-            target_time=expect_end_mins,
-            max_time_diff=end_time["max_diff"],
-            prefer_earlier=end_time["prefer_early"]
-        ) == -1:
+            self.__driver.get(urljoin(self.__driver.current_url, map_url))
+        except Exception as e:
+            self._showTrace(f"加载预约选座页面失败 ! : {e}")
+            return False
+        steps = [
+            {"trigger": "onDate_select", "selector": f"p#options_onDate a[value='{date}']",
+                "click": True, "label": f"日期 {date}"},
+            {"trigger": "display_building", "selector": f"p#options_building a[value='{place}']",
+                "click": True, "label": "预约场所 图书馆"},
+            {"trigger": "floor_select", "selector": f"p#options_floor a[value='{floor}']",
+                "click": True, "label": f"楼层 {self.__floor_map.get(floor)}"},
+            {"trigger": None, "selector": "#findRoom",
+                "click": True, "label": "房间/区域"},
+            {"trigger": None, "selector": f"#room_{room}",
+                "click": True, "label": f"房间 {self.__room_map.get(room)}"},
+            {"trigger": None, "selector": "#seatLayout li[id^='seat_']:not([data-stale])",
+                "click": False, "label": "座位列表"}
+        ]
+        try:
+            result = self.__driver.execute_async_script(
+                self.__OPEN_ROOM_SCRIPT, steps, int(self.__room_link.get("timeout", 5)*1000)
+            )
+        except Exception as e:
+            self._showTrace(f"打开房间失败 ! : {e}")
+            return False
+        if result["failed"]:
+            self._showTrace(f"打开房间失败 ! : 未找到 {result["failed"]}")
             return False
-        else:
-            actual_end_time = self.__minsToTime(expect_end_mins)
         self._showTrace(
-            f"期望预约时间段: {expect_begin_time} - {expect_end_time}, "
-            f"实际预约时间段: {actual_begin_time} - {actual_end_time}"
+            f"日期 {date}, 楼层 {self.__floor_map.get(floor)}, "\
+            f"房间 {self.__room_map.get(room)} 选择成功 !"
         )
         return True
 
 
-    def reserve(
+    def __openRoom(
         self,
-        username: str,
         reserve_info: dict
     ) -> bool:
 
-        submit_reserve = False
-        reserve_success = False
-        have_hover_on_page = False
-
-        # reserve info
-        if not self.__checkReserveInfo(reserve_info):
-            return False
+        self.__room_key = RoomCache.keyOf(reserve_info)
+        if self.__room_link.get("enabled", True):
+            if self.__openRoomByLink(reserve_info):
+                return True
+            self._showTrace("将通过下拉菜单重新选择房间")
         # map page
         try:
             WebDriverWait(self.__driver, 2).until(
                 EC.element_to_be_clickable((By.XPATH, "//a[@href='/map']"))
             ).click()
+        except:
+            # already in the map page loaded from the map url
+            pass
+        try:
             WebDriverWait(self.__driver, 2).until(
                 EC.presence_of_element_located((By.ID, "seatLayout"))
             )
@@ -660,33 +953,154 @@ class LibReserve(LibOperator):
             return False
         if not self.__selectRoom(reserve_info["room"]):
             return False
-        else:
-            have_hover_on_page = True
-        # seat selections
-        if not self.__selectSeat(reserve_info["seat_id"]):
-            pass
-        elif not self.__selectSeatTime(
+        return True
+
+
+    def roomSnapshot(
+        self,
+        room: str
+    ) -> RoomSnapshot:
+
+        """
+            Read the state of every seat of the opened room, None if the room is not loaded
+            or has no seat map.
+        """
+        topology = SeatTopology.forRoom(room)
+        if topology is None:
+            return None
+        # read by an earlier user of the run, until a reservation in the room succeeds
+        key = self.__room_key if self.__room_key and self.__room_key[2] == room else None
+        snapshot = self.__room_cache.get(key, "snapshot") if key else None
+        if snapshot is not None:
+            return snapshot
+        missing = self.__seat_layout.wait(self.__driver, 5)
+        if missing:
+            return None
+        try:
+            result = self.__driver.execute_script(self.__ROOM_SNAPSHOT_SCRIPT, topology.seats())
+        except Exception as e:
+            self._showTrace(f"读取座位状态失败 ! : {e}")
+            return None
+        snapshot = RoomSnapshot.fromCodes(topology, result["codes"])
+        if key:
+            if result["index"]:
+                self.__room_cache.put(key, "seat_index", result["index"])
+            self.__room_cache.put(key, "snapshot", snapshot)
+        return snapshot
+
+
+    def __seatCandidates(
+        self,
+        reserve_info: dict
+    ) -> list:
+
+        """
+            The wanted seat, followed by the free seats around it from the nearest
+            to the farthest when the fallback is enabled, at most 'max_attempts' seats.
+        """
+        seat_id = reserve_info["seat_id"]
+        if not self.__seat_fallback.get("enabled", False):
+            return [seat_id]
+        snapshot = self.roomSnapshot(reserve_info["room"])
+        if snapshot is None or not snapshot.topology().contains(seat_id):
+            return [seat_id]
+        wanted = SeatTopology.canonicalSeat(seat_id)
+        nearby = snapshot.topology().nearestSeats(wanted, self.__seat_fallback.get("radius", 3))
+        candidates = [seat for seat in [wanted] + nearby if snapshot.isAvailable(seat)]
+        if not snapshot.isAvailable(wanted):
+            self._showTrace(f"座位 {seat_id} 已被占用, 将尝试附近的座位")
+        candidates = candidates[:max(1, self.__seat_fallback.get("max_attempts", 3))]
+        if not candidates:
+            self._showTrace(f"座位 {seat_id} 附近没有空闲座位")
+        return candidates
+
+
+    def __trySeat(
+        self,
+        reserve_info: dict,
+        seat_id: str
+    ) -> tuple:
+
+        """
+            Select the seat and the time and submit, returns (submitted, succeeded).
+        """
+        if not self.__selectSeat(reserve_info["room"], seat_id):
+            return False, False
+        if not self.__selectSeatTime(
             begin_time=reserve_info["begin_time"],
             end_time=reserve_info["end_time"],
             expct_duration=reserve_info["expect_duration"],
             satisfy_duration=reserve_info["satisfy_duration"]
         ):
-            pass
-        else:
-            try:
-                WebDriverWait(self.__driver, 2).until(
-                    EC.element_to_be_clickable((By.ID, "reserveBtn"))
-                ).click()
-                submit_reserve = True
-                if not self._waitResponseLoad():
-                    raise
-                reserve_success = True
-            except:
-                self._showTrace(f"预约提交失败 !")
-        if not submit_reserve and have_hover_on_page:
+            return False, False
+        try:
+            WebDriverWait(self.__driver, 2).until(
+                EC.element_to_be_clickable((By.ID, "reserveBtn"))
+            ).click()
+        except:
+            self._showTrace(f"预约提交失败 !")
+            return False, False
+        if not self._waitResponseLoad():
+            self._showTrace(f"预约提交失败 !")
+            return True, False
+        return True, True
+
+
+    def prepare(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        """
+            Open the map page and select the date, place, floor and room,
+            so that 'commit' only has to pick the seat and the time.
+        """
+        # reserve info
+        if not self._checkReserveInfo(reserve_info):
+            return False
+        return self.__openRoom(reserve_info)
+
+
+    def commit(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        reserve_success = False
+        candidates = self.__seatCandidates(reserve_info)
+        if not candidates:
             self.__driver.refresh()
+        for attempt, seat_id in enumerate(candidates):
+            # the page is refreshed after a failed attempt, open the room again
+            if attempt > 0:
+                self._showTrace(f"尝试预约附近的座位 {seat_id} ({attempt}/{len(candidates) - 1})......")
+                if not self.__openRoom(reserve_info):
+                    break
+            submit_reserve, reserve_success = self.__trySeat(reserve_info, seat_id)
+            # the room is selected, the page has a hover layer on it
+            if not submit_reserve:
+                self.__driver.refresh()
+            # a submitted reservation is decided by the server, another seat would not help
+            if submit_reserve:
+                break
         if reserve_success:
+            # the room has changed, the next user reads it again
+            self.__room_cache.invalidate(self.__room_key)
             self._showTrace(f"用户 {username} 预约成功 !")
         else:
             self._showTrace(f"用户 {username} 预约失败 !")
-        return reserve_success
\ No newline at end of file
+        return reserve_success
+
+
+    def reserve(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        if not self.prepare(username, reserve_info):
+            return False
+        return self.commit(username, reserve_info)
+
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import queue
+
+from base.LibBackend import LibBackend
+from operators.LibChecker import LibChecker
+from operators.LibLogin import LibLogin
+from operators.LibLogout import LibLogout
+from operators.LibReserve import LibReserve
+from operators.LibCheckin import LibCheckin
+from operators.LibRenew import LibRenew
+
+from utils.ReserveHistoryStore import ReserveHistoryStore
+from utils.RoomCache import RoomCache
+from utils.RoomSnapshot import RoomSnapshot
+
+
+class LibSeleniumBackend(LibBackend):
+
+    def __init__(
+        self,
+        input_queue: queue.Queue,
+        output_queue: queue.Queue,
+        driver: any,
+        history_store: ReserveHistoryStore = None,
+        seat_fallback: dict = None,
+        room_cache: RoomCache = None,
+        room_link: dict = None
+    ):
+
+        super().__init__(input_queue, output_queue)
+
+        self.__driver = driver
+        self.__lib_checker = LibChecker(input_queue, output_queue, driver, history_store)
+        self.__lib_login = LibLogin(input_queue, output_queue, driver)
+        self.__lib_logout = LibLogout(input_queue, output_queue, driver)
+        self.__lib_reserve = LibReserve(
+            input_queue, output_queue, driver, seat_fallback, room_cache, room_link
+        )
+        self.__lib_checkin = LibCheckin(input_queue, output_queue, driver)
+        self.__lib_renew = LibRenew(input_queue, output_queue, driver)
+
+
+    def login(
+        self,
+        username: str,
+        password: str,
+        max_attempts: int = 5,
+        auto_captcha: bool = True
+    ) -> bool:
+
+        self.__lib_checker.resetRecords(username)
+        return self.__lib_login.login(username, password, max_attempts, auto_captcha)
+
+
+    def logout(
+        self,
+        username: str
+    ) -> bool:
+
+        self.__lib_checker.resetRecords()
+        return self.__lib_logout.logout(username)
+
+
+    def resumeSession(
+        self,
+        username: str,
+        cookies: list,
+        check_url: str
+    ) -> bool:
+
+        self.__lib_checker.resetRecords(username)
+        return self.__lib_login.resume(username, cookies, check_url)
+
+
+    def sessionCookies(
+        self
+    ) -> list:
+
+        return [
+            {"name": cookie["name"], "value": cookie["value"], "path": cookie.get("path", "/")}
+            for cookie in self.__driver.get_cookies()
+        ]
+
+
+    def dropSession(
+        self
+    ):
+
+        self.__lib_checker.resetRecords()
+        self.__driver.delete_all_cookies()
+
+
+    def canReserve(
+        self,
+        date: str
+    ) -> bool:
+
+        return self.__lib_checker.canReserve(date)
+
+
+    def canCheckin(
+        self
+    ) -> bool:
+
+        return self.__lib_checker.canCheckin()
+
+
+    def canRenew(
+        self
+    ) -> dict:
+
+        return self.__lib_checker.canRenew()
+
+
+    def postRenewCheck(
+        self,
+        record: dict
+    ) -> bool:
+
+        return self.__lib_checker.postRenewCheck(record)
+
+
+    def reserve(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        try:
+            return self.__lib_reserve.reserve(username, reserve_info)
+        finally:
+            # the reservation state may have changed
+            self.__lib_checker.invalidateRecords()
+
+
+    def prepareReserve(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        return self.__lib_reserve.prepare(username, reserve_info)
+
+
+    def commitReserve(
+        self,
+        username: str,
+        reserve_info: dict
+    ) -> bool:
+
+        try:
+            return self.__lib_reserve.commit(username, reserve_info)
+        finally:
+            # the reservation state may have changed
+            self.__lib_checker.invalidateRecords()
+
+
+    def roomSnapshot(
+        self,
+        reserve_info: dict
+    ) -> RoomSnapshot:
+
+        # the room is opened by 'prepareReserve'
+        return self.__lib_reserve.roomSnapshot(reserve_info["room"])
+
+
+    def checkin(
+        self,
+        username: str
+    ) -> bool:
+
+        try:
+            return self.__lib_checkin.checkin(username)
+        finally:
+            # the reservation state may have changed
+            self.__lib_checker.invalidateRecords()
+
+
+    def renew(
+        self,
+        username: str,
+        record: dict,
+        reserve_info: dict
+    ) -> bool:
+
+        try:
+            return self.__lib_renew.renew(username, record, reserve_info)
+        finally:
+            # the reservation state may have changed
+            self.__lib_checker.invalidateRecords()
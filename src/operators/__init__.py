@@ -3,10 +3,19 @@
 
     Here are the classes and modules in this package:
     - AutoLib: AutoLibrary operator.
+    - AutoLibRunner: Runner for running user groups on several browser drivers in parallel.
+    - AutoLibAsync: Asyncio engine running many user sessions over the HTTP backend.
+    - AutoLibSupervisor: Supervisor running each user group in a separate worker process.
+    - DriverPool: Pool of warm browser drivers reused across runs.
     - LibLogin: Library operator for logging in.
     - LibLogout: Library operator for logging out.
     - LibReserve: Library operator for reserving seat.
     - LibCheckin: Library operator for checking in seat.
     - LibCheckout: Library operator for checking out seat.
     - LibRenew: Library operator for renewing seat.
+    - LibSeleniumBackend: Library backend driving the browser.
+    - LibHttpBackend: Library backend sending plain HTTP requests.
+    - LibHttpLogin: Library operator for logging in over HTTP.
+    - LibHttpChecker: Library operator for checking reservation records over HTTP.
+    - LibHttpReserve: Library operator for reserving seat over HTTP.
 """
\ No newline at end of file
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import io
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+import tracemalloc
+
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from utils.CaptchaPreprocessor import CaptchaPreprocessor
+from utils.OcrService import OcrService
+
+
+class CaptchaBenchmark:
+
+    """
+        Offline benchmark of the captcha recognition used by the logins.
+
+        Run from the 'src' directory:
+            python -m utils.CaptchaBenchmark --dir <labelled images>
+            python -m utils.CaptchaBenchmark --synthetic 200
+        The label of an image is the part of its file name before the first '_',
+        e.g. 'a7k2.png' or 'a7k2_0031.png'.
+    """
+
+    IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".bmp")
+
+    def __init__(
+        self,
+        mode: str = "recognize"
+    ):
+
+        # 'classify' is one raw reading, 'recognize' is the ranked candidates used by the logins
+        self.__mode = mode
+
+    @staticmethod
+    def loadLabelled(
+        path: str
+    ) -> list:
+
+        samples = []
+        for name in sorted(os.listdir(path)):
+            stem, suffix = os.path.splitext(name)
+            if suffix.lower() not in CaptchaBenchmark.IMAGE_SUFFIXES:
+                continue
+            with open(os.path.join(path, name), "rb") as file:
+                samples.append((file.read(), stem.split("_", 1)[0].lower()))
+        return samples
+
+    @staticmethod
+    def generateSynthetic(
+        count: int,
+        seed: int = 0
+    ) -> list:
+
+        """
+            4 alphanumeric characters with jitter, interference lines and dots,
+            roughly the style of the library captcha.
+        """
+        rng = random.Random(seed)
+        font = ImageFont.load_default(26)
+        samples = []
+        for _ in range(count):
+            text = "".join(rng.choice(OcrService.CAPTCHA_CHARSET) for _ in range(4))
+            image = Image.new("RGB", (120, 40), tuple(rng.randint(220, 255) for _ in range(3)))
+            draw = ImageDraw.Draw(image)
+            for index, char in enumerate(text):
+                color = tuple(rng.randint(0, 120) for _ in range(3))
+                draw.text((8 + index*27 + rng.randint(-3, 3), rng.randint(0, 8)), char, fill=color, font=font)
+            for _ in range(3):
+                points = [(rng.randint(0, 120), rng.randint(0, 40)) for _ in range(2)]
+                draw.line(points, fill=tuple(rng.randint(80, 200) for _ in range(3)), width=1)
+            for _ in range(60):
+                draw.point((rng.randint(0, 119), rng.randint(0, 39)), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+            image = image.filter(ImageFilter.SMOOTH)
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+            samples.append((buffer.getvalue(), text))
+        return samples
+
+
+    def __read(
+        self,
+        image: bytes
+    ) -> str:
+
+        if self.__mode == "classify":
+            reading = OcrService.classify(image).lower()
+            return "".join(char for char in reading if char in OcrService.CAPTCHA_CHARSET)
+        candidates = OcrService.recognize(image)
+        return candidates[0][0] if candidates else ""
+
+
+    def __timedRead(
+        self,
+        sample: tuple
+    ) -> tuple:
+
+        begin = time.perf_counter()
+        reading = self.__read(sample[0])
+        return reading == sample[1], time.perf_counter() - begin
+
+
+    @staticmethod
+    def __percentile(
+        values: list,
+        percent: float
+    ) -> float:
+
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, max(0, round(percent/100*len(ordered)) - 1))
+        return ordered[index]
+
+    @staticmethod
+    def __peakRss(
+    ) -> float:
+
+        # in MiB, not available on Windows
+        try:
+            import resource
+        except ImportError:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak/1024/1024 if sys.platform == "darwin" else peak/1024
+
+
+    def run(
+        self,
+        samples: list,
+        max_threads: int = 4
+    ) -> dict:
+
+        # load the model first, the loading is not part of the latency
+        OcrService.warmUp().result()
+        tracemalloc.start()
+        results = [self.__timedRead(sample) for sample in samples]
+        _, heap_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        latencies = [latency for _, latency in results]
+        report = {
+            "samples": len(samples),
+            "accuracy": sum(1 for correct, _ in results if correct)/len(samples),
+            "p50": self.__percentile(latencies, 50),
+            "p95": self.__percentile(latencies, 95),
+            "p99": self.__percentile(latencies, 99),
+            "mean": statistics.fmean(latencies),
+            "throughput": {},
+            "heap_peak": heap_peak/1024/1024,
+            "rss_peak": None
+        }
+        # 1..N callers at the same time, as the runners of a process call OcrService,
+        # they share its one worker, so the gain shows how much of the reading is serialised
+        for threads in range(1, max_threads + 1):
+            begin = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(executor.map(self.__timedRead, samples))
+            report["throughput"][threads] = len(samples)/(time.perf_counter() - begin)
+        report["rss_peak"] = self.__peakRss()
+        return report
+
+
+    @staticmethod
+    def formatReport(
+        report: dict
+    ) -> str:
+
+        lines = [
+            f"样本数量: {report["samples"]}",
+            f"完全匹配准确率: {report["accuracy"]:.2%}",
+            f"单张耗时: p50 {report["p50"]*1000:.1f} 毫秒, "\
+            f"p95 {report["p95"]*1000:.1f} 毫秒, "\
+            f"p99 {report["p99"]*1000:.1f} 毫秒, "\
+            f"平均 {report["mean"]*1000:.1f} 毫秒",
+        ]
+        for threads, throughput in report["throughput"].items():
+            lines.append(f"{threads} 个线程吞吐量: {throughput:.1f} 张/秒")
+        lines.append(f"Python 堆内存峰值: {report["heap_peak"]:.1f} MiB")
+        if report["rss_peak"] is not None:
+            lines.append(f"进程内存峰值: {report["rss_peak"]:.1f} MiB")
+        return "\n".join(lines)
+
+
+def main(
+    argv: list = None
+) -> int:
+
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.CaptchaBenchmark",
+        description="验证码识别离线基准测试"
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dir", help="已标注验证码图片所在目录, 文件名第一个 '_' 之前的部分为标注")
+    source.add_argument("--synthetic", type=int, help="生成指定数量的模拟验证码")
+    parser.add_argument("--seed", type=int, default=0, help="模拟验证码的随机种子")
+    parser.add_argument("--mode", choices=("recognize", "classify"), default="recognize",
+        help="recognize 为登录使用的候选识别, classify 为单次原始识别")
+    parser.add_argument("--threads", type=int, default=4, help="吞吐量测试中同时识别的最大调用线程数")
+    parser.add_argument("--ocr-threads", type=int, default=0, help="识别模型使用的线程数, 0 为默认")
+    parser.add_argument("--variants", action="store_true", help="每张验证码都做变换识别")
+    parser.add_argument("--preprocess", default="",
+        help=f"以 ',' 分隔的预处理步骤 ({", ".join(CaptchaPreprocessor.STEPS)}), 设置后会与原始识别对比")
+    args = parser.parse_args(argv)
+
+    if args.dir:
+        samples = CaptchaBenchmark.loadLabelled(args.dir)
+    else:
+        samples = CaptchaBenchmark.generateSynthetic(args.synthetic, args.seed)
+    if not samples:
+        print("没有可用的验证码样本")
+        return 1
+    pipelines = [[]]
+    if args.preprocess:
+        pipelines.append([step.strip() for step in args.preprocess.split(",") if step.strip()])
+    for steps in pipelines:
+        # keep every candidate, the accuracy is measured on the best one
+        OcrService.configure(
+            args.ocr_threads, top_k=1, min_confidence=0, preprocess=steps, variants=args.variants
+        )
+        report = CaptchaBenchmark(args.mode).run(samples, max(1, args.threads))
+        print(f"[{"预处理: " + ", ".join(steps) if steps else "原始识别"}]")
+        print(CaptchaBenchmark.formatReport(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
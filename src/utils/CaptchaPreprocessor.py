@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import io
+
+import numpy as np
+
+from PIL import Image
+
+
+class CaptchaPreprocessor:
+
+    """
+        Clean up a captcha with NumPy and turn it into the input tensor of the
+        ddddocr model, (1, 1, 64, width) normalized to [-1, 1].
+
+        The steps run in the order of STEPS, the ones not configured are skipped.
+    """
+
+    STEPS = ("denoise", "binarize", "remove_lines", "crop")
+    MODEL_HEIGHT = 64
+
+    def __init__(
+        self,
+        steps: list = None
+    ):
+
+        steps = steps or []
+        unknown = [step for step in steps if step not in self.STEPS]
+        if unknown:
+            raise ValueError(f"未知的验证码预处理步骤: {unknown}")
+        self.__steps = [step for step in self.STEPS if step in steps]
+
+    @staticmethod
+    def __shifted(
+        pixels: np.ndarray,
+        pad_value
+    ) -> np.ndarray:
+
+        # the 3x3 neighbourhood of every pixel, stacked on a new first axis
+        padded = np.pad(pixels, 1, mode="constant", constant_values=pad_value)
+        height, width = pixels.shape
+        return np.stack([
+            padded[row:row + height, col:col + width]
+            for row in range(3) for col in range(3)
+        ])
+
+    @staticmethod
+    def __denoise(
+        gray: np.ndarray
+    ) -> np.ndarray:
+
+        # 3x3 median, removes the salt and pepper dots
+        return np.median(CaptchaPreprocessor.__shifted(gray, 255), axis=0).astype(np.uint8)
+
+    @staticmethod
+    def __binarize(
+        gray: np.ndarray
+    ) -> np.ndarray:
+
+        # Otsu threshold, the glyphs become black on white
+        histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+        levels = np.arange(256)
+        weight_dark = np.cumsum(histogram)
+        weight_light = weight_dark[-1] - weight_dark
+        sum_dark = np.cumsum(histogram*levels)
+        mean_dark = sum_dark/np.maximum(weight_dark, 1)
+        mean_light = (sum_dark[-1] - sum_dark)/np.maximum(weight_light, 1)
+        variance = weight_dark*weight_light*(mean_dark - mean_light)**2
+        threshold = int(np.argmax(variance))
+        return np.where(gray <= threshold, 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def __removeLines(
+        gray: np.ndarray
+    ) -> np.ndarray:
+
+        """
+            Drop the ink pixels without an ink neighbour both vertically and
+            horizontally, the interference lines are one pixel thick while the
+            strokes of the glyphs are thicker.
+        """
+        ink = gray < 128
+        padded = np.pad(ink, 1, mode="constant", constant_values=False)
+        vertical = padded[:-2, 1:-1] | padded[2:, 1:-1]
+        horizontal = padded[1:-1, :-2] | padded[1:-1, 2:]
+        return np.where(ink & vertical & horizontal, gray, 255).astype(np.uint8)
+
+    @staticmethod
+    def __crop(
+        gray: np.ndarray,
+        margin: int = 2
+    ) -> np.ndarray:
+
+        ink = gray < 128
+        rows = np.flatnonzero(ink.any(axis=1))
+        cols = np.flatnonzero(ink.any(axis=0))
+        if rows.size == 0 or cols.size == 0:
+            return gray
+        top, bottom = max(0, rows[0] - margin), min(gray.shape[0], rows[-1] + margin + 1)
+        left, right = max(0, cols[0] - margin), min(gray.shape[1], cols[-1] + margin + 1)
+        return gray[top:bottom, left:right]
+
+    @staticmethod
+    def toGray(
+        image: bytes
+    ) -> np.ndarray:
+
+        return np.asarray(Image.open(io.BytesIO(image)).convert("L"), dtype=np.uint8)
+
+    @staticmethod
+    def toTensor(
+        gray: np.ndarray
+    ) -> np.ndarray:
+
+        # same resize and normalization as ddddocr
+        height, width = gray.shape
+        width = max(1, int(width*(CaptchaPreprocessor.MODEL_HEIGHT/height)))
+        resized = Image.fromarray(gray).resize((width, CaptchaPreprocessor.MODEL_HEIGHT), Image.LANCZOS)
+        tensor = np.asarray(resized, dtype=np.float32)/255.
+        return ((tensor - 0.5)/0.5)[np.newaxis, np.newaxis, :, :]
+
+
+    def steps(
+        self
+    ) -> list:
+
+        return list(self.__steps)
+
+
+    def clean(
+        self,
+        gray: np.ndarray
+    ) -> np.ndarray:
+
+        actions = {
+            "denoise": self.__denoise,
+            "binarize": self.__binarize,
+            "remove_lines": self.__removeLines,
+            "crop": self.__crop
+        }
+        for step in self.__steps:
+            gray = actions[step](gray)
+        return gray
+
+
+    def process(
+        self,
+        image: bytes
+    ) -> np.ndarray:
+
+        return self.toTensor(self.clean(self.toGray(image)))
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import os
+
+from selenium import webdriver
+from selenium.webdriver.edge.service import Service
+
+
+class DriverFactory:
+
+    @staticmethod
+    def __browserOptions(
+        web_driver_config: dict
+    ) -> webdriver.EdgeOptions:
+
+        edge_options = webdriver.EdgeOptions()
+        if web_driver_config.get("headless"):
+            edge_options.add_argument("--headless")
+            edge_options.add_argument("--disable-gpu")
+            edge_options.add_argument("--no-sandbox")
+            edge_options.add_argument("--disable-dev-shm-usage")
+
+        # must be 1920x1080, otherwise the page will cause some elements not accessible
+        edge_options.add_argument("--window-size=1920,1080")
+        edge_options.add_argument("--remote-allow-origins=*")
+
+        # omit ssl errors and verbose log level
+        edge_options.add_argument("--ignore-certificate-errors")
+        edge_options.add_argument("--ignore-ssl-errors")
+        edge_options.add_argument("--log-level=OFF")
+        edge_options.add_argument("--silent")
+
+        edge_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        edge_options.add_experimental_option("useAutomationExtension", False)
+        edge_options.add_argument("--disable-blink-features=AutomationControlled")
+        edge_options.add_argument(
+            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "\
+            "AppleWebKit/537.36 (KHTML, like Gecko) "\
+            "Chrome/120.0.0.0 "\
+            "Safari/537.36 "\
+            "Edg/120.0.0.0"
+        )
+        return edge_options
+
+
+    @staticmethod
+    def createDriver(
+        web_driver_config: dict
+    ) -> any:
+
+        if not web_driver_config:
+            raise Exception("未配置浏览器驱动参数 !")
+        edge_options = DriverFactory.__browserOptions(web_driver_config)
+        driver_path = os.path.abspath(web_driver_config.get("driver_path"))
+        driver_type = web_driver_config.get("driver_type")
+        service = None
+        if driver_path:
+            service = Service(executable_path=driver_path)
+        match driver_type.lower():
+            case "edge":
+                driver = webdriver.Edge(service=service, options=edge_options)
+            case "chrome":
+                driver = webdriver.Chrome(service=service, options=edge_options)
+            case "firefox":
+                driver = webdriver.Firefox(service=service, options=edge_options)
+            case _:
+                raise Exception(f"不支持的浏览器驱动类型: {driver_type}")
+        driver.implicitly_wait(1)
+        driver.execute_script(
+            "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+        )
+        return driver
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+from html.parser import HTMLParser
+
+
+class HtmlNode:
+
+    def __init__(
+        self,
+        tag: str,
+        attrs: dict,
+        parent: "HtmlNode" = None
+    ):
+
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        # child nodes and text pieces, in document order
+        self.contents = []
+
+
+    def attr(
+        self,
+        name: str,
+        default: str = ""
+    ) -> str:
+
+        value = self.attrs.get(name)
+        return default if value is None else value
+
+
+    @property
+    def children(
+        self
+    ) -> list:
+
+        return [item for item in self.contents if isinstance(item, HtmlNode)]
+
+
+    def text(
+        self
+    ) -> str:
+
+        parts = [
+            item if isinstance(item, str) else item.text()
+            for item in self.contents
+        ]
+        return " ".join(part for part in parts if part).strip()
+
+
+    def matches(
+        self,
+        tag: str = None,
+        id: str = None,
+        cls: str = None,
+        attr: str = None
+    ) -> bool:
+
+        if tag is not None and self.tag != tag:
+            return False
+        if id is not None and self.attrs.get("id") != id:
+            return False
+        if cls is not None and cls not in self.attr("class").split():
+            return False
+        if attr is not None and attr not in self.attrs:
+            return False
+        return True
+
+
+    def iter(
+        self
+    ):
+
+        for item in self.contents:
+            if isinstance(item, HtmlNode):
+                yield item
+                yield from item.iter()
+
+
+    def findAll(
+        self,
+        tag: str = None,
+        id: str = None,
+        cls: str = None,
+        attr: str = None
+    ) -> list:
+
+        return [
+            node for node in self.iter()
+            if node.matches(tag, id, cls, attr)
+        ]
+
+
+    def find(
+        self,
+        tag: str = None,
+        id: str = None,
+        cls: str = None,
+        attr: str = None
+    ) -> "HtmlNode":
+
+        for node in self.iter():
+            if node.matches(tag, id, cls, attr):
+                return node
+        return None
+
+
+class HtmlTree(HTMLParser):
+
+    # elements which never have a closing tag
+    VOID_TAGS = {
+        "area", "base", "br", "col", "embed", "hr", "img", "input",
+        "link", "meta", "param", "source", "track", "wbr"
+    }
+
+    def __init__(
+        self
+    ):
+
+        super().__init__(convert_charrefs=True)
+
+        self.__root = HtmlNode("document", {})
+        self.__current = self.__root
+
+
+    def handle_starttag(
+        self,
+        tag: str,
+        attrs: list
+    ):
+
+        node = HtmlNode(tag, dict(attrs), self.__current)
+        self.__current.contents.append(node)
+        if tag not in self.VOID_TAGS:
+            self.__current = node
+
+
+    def handle_startendtag(
+        self,
+        tag: str,
+        attrs: list
+    ):
+
+        node = HtmlNode(tag, dict(attrs), self.__current)
+        self.__current.contents.append(node)
+
+
+    def handle_endtag(
+        self,
+        tag: str
+    ):
+
+        # close up to the matching element, tolerating unclosed children
+        node = self.__current
+        while node is not self.__root and node.tag != tag:
+            node = node.parent
+        if node is not self.__root:
+            self.__current = node.parent
+
+
+    def handle_data(
+        self,
+        data: str
+    ):
+
+        data = data.strip()
+        if data:
+            self.__current.contents.append(data)
+
+    @staticmethod
+    def parse(
+        html: str
+    ) -> HtmlNode:
+
+        tree = HtmlTree()
+        tree.feed(html or "")
+        tree.close()
+        return tree.__root
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import re
+import threading
+
+from http.cookies import SimpleCookie
+from urllib.parse import urljoin, urlencode
+
+import urllib3
+
+
+class HttpSession:
+
+    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "\
+        "AppleWebKit/537.36 (KHTML, like Gecko) "\
+        "Chrome/120.0.0.0 "\
+        "Safari/537.36 "\
+        "Edg/120.0.0.0"
+    MAX_REDIRECTS = 5
+
+    def __init__(
+        self,
+        host_url: str,
+        timeout: float = 5.0,
+        pool_size: int = 4
+    ):
+
+        self.__host_url = host_url.rstrip("/")
+        # keep-alive connections are reused by all requests of the session
+        self.__pool = urllib3.PoolManager(
+            num_pools=2,
+            maxsize=pool_size,
+            retries=False,
+            timeout=urllib3.Timeout(connect=timeout, read=timeout),
+            cert_reqs="CERT_NONE",
+            headers={
+                "User-Agent": self.USER_AGENT,
+                "Accept-Language": "zh-CN,zh;q=0.9",
+            }
+        )
+        self.__cookies = {}
+        self.__cookies_lock = threading.Lock()
+        self.last_url = ""
+
+
+    def __url(
+        self,
+        path: str
+    ) -> str:
+
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return self.__host_url + path
+
+
+    def __cookieHeader(
+        self
+    ) -> dict:
+
+        with self.__cookies_lock:
+            if not self.__cookies:
+                return {}
+            return {
+                "Cookie": "; ".join(f"{k}={v}" for k, v in self.__cookies.items())
+            }
+
+
+    def __storeCookies(
+        self,
+        response: urllib3.BaseHTTPResponse
+    ):
+
+        for header in response.headers.getlist("Set-Cookie"):
+            cookie = SimpleCookie()
+            try:
+                cookie.load(header)
+            except Exception:
+                continue
+            with self.__cookies_lock:
+                for key, morsel in cookie.items():
+                    self.__cookies[key] = morsel.value
+
+
+    def __decode(
+        self,
+        response: urllib3.BaseHTTPResponse
+    ) -> str:
+
+        content_type = response.headers.get("Content-Type", "")
+        charset = re.search(r"charset=([\w-]+)", content_type)
+        try:
+            return response.data.decode(charset.group(1) if charset else "utf-8", errors="replace")
+        except LookupError:
+            return response.data.decode("utf-8", errors="replace")
+
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        fields: dict = None,
+        headers: dict = None
+    ) -> urllib3.BaseHTTPResponse:
+
+        url = self.__url(path)
+        body = None
+        request_headers = dict(headers or {})
+        if fields and method == "GET":
+            url += ("&" if "?" in url else "?") + urlencode(fields)
+        elif fields:
+            body = urlencode(fields)
+            request_headers["Content-Type"] = "application/x-www-form-urlencoded; charset=UTF-8"
+        # the redirects are followed here, so the cookies set by each hop are kept
+        for _ in range(self.MAX_REDIRECTS + 1):
+            request_headers.update(self.__cookieHeader())
+            response = self.__pool.request(
+                method, url,
+                body=body,
+                headers=request_headers,
+                redirect=False
+            )
+            self.__storeCookies(response)
+            location = response.headers.get("Location")
+            if response.status not in (301, 302, 303, 307, 308) or not location:
+                self.last_url = url
+                return response
+            url = urljoin(url, location)
+            if response.status in (301, 302, 303):
+                method, body = "GET", None
+                request_headers.pop("Content-Type", None)
+        raise Exception(f"重定向次数过多: {url}")
+
+
+    def get(
+        self,
+        path: str,
+        fields: dict = None
+    ) -> str:
+
+        return self.__decode(self.request("GET", path, fields))
+
+
+    def post(
+        self,
+        path: str,
+        fields: dict = None
+    ) -> str:
+
+        return self.__decode(self.request("POST", path, fields))
+
+
+    def getBytes(
+        self,
+        path: str
+    ) -> bytes:
+
+        return self.request("GET", path).data
+
+
+    def cookies(
+        self
+    ) -> dict:
+
+        with self.__cookies_lock:
+            return dict(self.__cookies)
+
+
+    def setCookies(
+        self,
+        cookies: dict
+    ):
+
+        with self.__cookies_lock:
+            self.__cookies = dict(cookies)
+
+
+    def clearCookies(
+        self
+    ):
+
+        with self.__cookies_lock:
+            self.__cookies = {}
+
+
+    def close(
+        self
+    ):
+
+        self.__pool.clear()
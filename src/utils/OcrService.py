@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import io
+import os
+import ast
+import queue
+import string
+import threading
+
+from collections import Counter
+from concurrent.futures import Future
+
+import ddddocr
+import onnxruntime
+
+import numpy as np
+
+from PIL import Image, ImageFilter, ImageOps
+
+from utils.CaptchaPreprocessor import CaptchaPreprocessor
+
+
+class OcrService:
+
+    """
+        Process-wide captcha recognizer.
+
+        The model shipped with ddddocr is loaded once and all the recognition requests
+        are served by one worker thread, so the runners of the process share one
+        onnxruntime session instead of loading the model for every login.
+    """
+
+    # the model and the charset of ddddocr 1.0.x, read from the files of the package
+    MODEL_FILE = "common.onnx"
+
+    __lock = threading.Lock()
+    __requests = queue.Queue()
+    __worker = None
+    __session = None
+    __charset = None
+    __threads = 0 # intra-op threads of the session, 0 for the onnxruntime default
+    __loaded_threads = None
+    __top_k = 3 # number of candidates returned by 'recognize'
+    __min_confidence = 0.6 # candidates below it are not worth a login attempt
+    __preprocessor = None # None for the raw ddddocr path
+    __variants_enabled = False # read the variants of every captcha, not only of the unreadable ones
+
+    CAPTCHA_CHARSET = string.ascii_lowercase + string.digits
+
+    @classmethod
+    def configure(
+        cls,
+        threads: int = 0,
+        top_k: int = 3,
+        min_confidence: float = 0.6,
+        preprocess: list = None,
+        variants: bool = False
+    ):
+
+        # takes effect on the next request if the model is already loaded
+        preprocessor = CaptchaPreprocessor(preprocess) if preprocess else None
+        with cls.__lock:
+            cls.__threads = max(0, int(threads))
+            cls.__top_k = max(1, int(top_k))
+            cls.__min_confidence = min(1.0, max(0.0, float(min_confidence)))
+            cls.__preprocessor = preprocessor
+            cls.__variants_enabled = bool(variants)
+
+    @classmethod
+    def __ensureWorker(
+        cls
+    ):
+
+        with cls.__lock:
+            if cls.__worker is not None and cls.__worker.is_alive():
+                return
+            cls.__worker = threading.Thread(
+                target=cls.__serve,
+                name="OcrService",
+                daemon=True
+            )
+            cls.__worker.start()
+
+    @classmethod
+    def __loadModel(
+        cls
+    ):
+
+        with cls.__lock:
+            threads = cls.__threads
+        if cls.__session is not None and cls.__loaded_threads == threads:
+            return
+        package_dir = os.path.dirname(ddddocr.__file__)
+        if cls.__charset is None:
+            cls.__charset = cls.__loadCharset(os.path.join(package_dir, "__init__.py"))
+        options = onnxruntime.SessionOptions()
+        # the model declares a fixed output length, every wider captcha would warn about it
+        options.log_severity_level = 3
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        cls.__session = onnxruntime.InferenceSession(
+            os.path.join(package_dir, cls.MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        cls.__loaded_threads = threads
+
+    @staticmethod
+    def __loadCharset(
+        source_path: str
+    ) -> list:
+
+        # ddddocr 1.0.x ships the charset as the list literal assigned in 'DdddOcr.__init__',
+        # it is read from the source rather than from a private attribute of an instance
+        with open(source_path, "r", encoding="utf-8") as file:
+            tree = ast.parse(file.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Assign) and isinstance(node.value, ast.List) and any(
+                isinstance(target, ast.Attribute) and target.attr.endswith("charset")
+                for target in node.targets
+            ):
+                return ast.literal_eval(node.value)
+        raise RuntimeError(f"未能在 {source_path} 中找到 ddddocr 的字符集")
+
+    @staticmethod
+    def __toTensor(
+        image: bytes
+    ) -> np.ndarray:
+
+        # the same input as the 'classification' of ddddocr 1.0.x, resized before the gray conversion
+        source = Image.open(io.BytesIO(image))
+        width = max(1, int(source.size[0]*(CaptchaPreprocessor.MODEL_HEIGHT/source.size[1])))
+        source = source.resize((width, CaptchaPreprocessor.MODEL_HEIGHT), Image.LANCZOS).convert("L")
+        tensor = np.asarray(source, dtype=np.float32)/255.
+        return ((tensor - 0.5)/0.5)[np.newaxis, np.newaxis, :, :]
+
+    @classmethod
+    def __infer(
+        cls,
+        tensors: np.ndarray
+    ) -> list:
+
+        # the same greedy decoding as ddddocr, the model outputs the character indices
+        session = cls.__session
+        charset = cls.__charset
+        outputs = session.run(None, {session.get_inputs()[0].name: tensors})[0]
+        readings = []
+        for indices in outputs:
+            chars = []
+            last_index = 0
+            for index in indices:
+                if index != last_index and index != 0:
+                    chars.append(charset[index])
+                last_index = index
+            readings.append("".join(chars))
+        return readings
+
+    @classmethod
+    def __runTensors(
+        cls,
+        requests: list
+    ):
+
+        # stack the tensors of the same width if the batch size of the model is not fixed
+        batch_size = cls.__session.get_inputs()[0].shape[0]
+        if isinstance(batch_size, int):
+            groups = [[request] for request in requests]
+        else:
+            widths = {}
+            for request in requests:
+                widths.setdefault(request[0].shape[-1], []).append(request)
+            groups = list(widths.values())
+        for group in groups:
+            try:
+                readings = cls.__infer(np.concatenate([tensor for tensor, _ in group]))
+            except Exception as e:
+                for _, future in group:
+                    future.set_exception(e)
+                continue
+            for (_, future), reading in zip(group, readings):
+                future.set_result(reading)
+
+    @classmethod
+    def __serve(
+        cls
+    ):
+
+        while True:
+            batch = [cls.__requests.get()]
+            # take all the requests queued meanwhile, the model runs them back to back
+            try:
+                while True:
+                    batch.append(cls.__requests.get_nowait())
+            except queue.Empty:
+                pass
+            try:
+                cls.__loadModel()
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            requests = []
+            for image, future in batch:
+                if future.cancelled():
+                    continue
+                if not isinstance(image, bytes):
+                    requests.append((image, future))
+                    continue
+                try:
+                    requests.append((cls.__toTensor(image), future))
+                except Exception as e:
+                    future.set_exception(e)
+            cls.__runTensors(requests)
+
+    @staticmethod
+    def __blankImage(
+    ) -> bytes:
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (100, 40), "white").save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    @classmethod
+    def warmUp(
+        cls
+    ) -> Future:
+
+        """
+            Load the model and run one inference in the background.
+        """
+        return cls.submit(cls.__blankImage())
+
+    @classmethod
+    def submit(
+        cls,
+        image: bytes
+    ) -> Future:
+
+        future = Future()
+        with cls.__lock:
+            preprocessor = cls.__preprocessor
+        if preprocessor:
+            # cleaned up in the calling thread, the worker only runs the model
+            try:
+                image = preprocessor.process(image)
+            except Exception as e:
+                future.set_exception(e)
+                return future
+        cls.__requests.put((image, future))
+        cls.__ensureWorker()
+        return future
+
+    @classmethod
+    def classify(
+        cls,
+        image: bytes,
+        timeout: float = 30
+    ) -> str:
+
+        return cls.submit(image).result(timeout)
+
+    @staticmethod
+    def __variants(
+        image: bytes
+    ) -> list:
+
+        """
+            Slightly different renderings of the captcha, the model reads each of them
+            and the agreement of the readings is taken as the confidence. The first one
+            is read along with every captcha, so it is kept the cheapest.
+        """
+        source = Image.open(io.BytesIO(image)).convert("RGB")
+        width, height = source.size
+        renderings = [
+            ImageOps.autocontrast(source.convert("L")),
+            source.filter(ImageFilter.MedianFilter(3)),
+            source.resize((int(width*0.9), height), Image.LANCZOS),
+            source.resize((int(width*1.1), height), Image.LANCZOS)
+        ]
+        variants = []
+        for rendering in renderings:
+            buffer = io.BytesIO()
+            rendering.save(buffer, format="PNG")
+            variants.append(buffer.getvalue())
+        return variants
+
+    @classmethod
+    def recognize(
+        cls,
+        image: bytes,
+        length: int = 4,
+        charset: str = CAPTCHA_CHARSET,
+        timeout: float = 30
+    ) -> list:
+
+        """
+            Returns the candidates [(text, confidence), ...] of the captcha, ranked by
+            the confidence, the candidates below 'min_confidence' are dropped.
+
+            The captcha and its first variant are always read, the other variants only
+            when the two readings disagree or are not valid, unless the variants are
+            enabled for every captcha. The confidence of a candidate is the share of the
+            readings agreeing with each of its characters, a reading no other one agrees
+            with is at most half sure.
+        """
+        def clean(reading: str) -> str:
+            return "".join(char for char in reading.lower() if char in charset)
+        variants = cls.__variants(image)
+        futures = [cls.submit(image), cls.submit(variants[0])]
+        readings = [clean(future.result(timeout)) for future in futures]
+        with cls.__lock:
+            variants_enabled = cls.__variants_enabled
+        if variants_enabled or readings[0] != readings[1] or len(readings[0]) != length:
+            futures = [cls.submit(variant) for variant in variants[1:]]
+            readings.extend(clean(future.result(timeout)) for future in futures)
+        valid_readings = [reading for reading in readings if len(reading) == length]
+        if not valid_readings:
+            return []
+        # votes of every position over the valid readings, a wrong length reading votes for nothing
+        votes = [
+            Counter(reading[index] for reading in valid_readings)
+            for index in range(length)
+        ]
+        consensus = "".join(vote.most_common(1)[0][0] for vote in votes)
+        voters = max(2, len(valid_readings))
+        candidates = []
+        for text in dict.fromkeys([consensus, *valid_readings]):
+            confidence = sum(votes[index][char] for index, char in enumerate(text))/(length*voters)
+            candidates.append((text, confidence))
+        candidates.sort(key=lambda candidate: candidate[1], reverse=True)
+        with cls.__lock:
+            top_k, min_confidence = cls.__top_k, cls.__min_confidence
+        return [candidate for candidate in candidates[:top_k] if candidate[1] >= min_confidence]
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+
+class PageReadiness:
+
+    """
+        The conditions a page must meet before it is used, waited for together.
+
+        All the conditions are checked by one script in the page, which re-checks
+        them on every DOM mutation until they are all met or the deadline passes,
+        so the wait costs one driver round trip instead of one per condition.
+
+        e.g.
+            login_page = PageReadiness().title("首页").present("[name='username']", "用户名输入框")
+            missing = login_page.wait(driver, 2)
+    """
+
+    __WAIT_SCRIPT = """
+        const [conditions, timeout, done] = arguments;
+        const isVisible = (element) => {
+            const style = window.getComputedStyle(element);
+            return style.visibility !== "hidden" && style.display !== "none" &&
+                !!(element.offsetWidth || element.offsetHeight || element.getClientRects().length);
+        };
+        const missing = () => conditions.filter((condition) => {
+            if (condition.kind === "title") {
+                return !document.title.includes(condition.text);
+            }
+            const element = document.querySelector(condition.selector);
+            if (!element) {
+                return true;
+            }
+            if (condition.kind === "visible") {
+                return !isVisible(element);
+            }
+            if (condition.kind === "clickable") {
+                return !isVisible(element) || element.disabled;
+            }
+            return false;
+        }).map((condition) => condition.label);
+        if (missing().length === 0) {
+            done([]);
+            return;
+        }
+        const deadline = Date.now() + timeout;
+        let finished = false;
+        let observer = null;
+        let poll = null;
+        const check = () => {
+            if (finished) {
+                return;
+            }
+            const left = missing();
+            if (left.length && Date.now() < deadline) {
+                return;
+            }
+            finished = true;
+            observer.disconnect();
+            clearInterval(poll);
+            done(left);
+        };
+        observer = new MutationObserver(check);
+        observer.observe(document.documentElement, {
+            childList: true, subtree: true, attributes: true, characterData: true
+        });
+        // the visibility may change by a style sheet without any mutation
+        poll = setInterval(check, 100);
+    """
+
+    def __init__(
+        self
+    ):
+
+        self.__conditions = []
+
+
+    def __add(
+        self,
+        condition: dict
+    ) -> "PageReadiness":
+
+        self.__conditions.append(condition)
+        return self
+
+
+    def title(
+        self,
+        text: str,
+        label: str = None
+    ) -> "PageReadiness":
+
+        return self.__add({"kind": "title", "text": text, "label": label or f"标题 '{text}'"})
+
+
+    def present(
+        self,
+        selector: str,
+        label: str = None
+    ) -> "PageReadiness":
+
+        return self.__add({"kind": "present", "selector": selector, "label": label or selector})
+
+
+    def visible(
+        self,
+        selector: str,
+        label: str = None
+    ) -> "PageReadiness":
+
+        return self.__add({"kind": "visible", "selector": selector, "label": label or selector})
+
+
+    def clickable(
+        self,
+        selector: str,
+        label: str = None
+    ) -> "PageReadiness":
+
+        return self.__add({"kind": "clickable", "selector": selector, "label": label or selector})
+
+
+    def wait(
+        self,
+        driver: any,
+        timeout: float = 2
+    ) -> list:
+
+        """
+            Returns the labels of the conditions not met before the deadline,
+            an empty list means the page is ready.
+        """
+        deadline = time.monotonic() + timeout
+        missing = [condition["label"] for condition in self.__conditions]
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                return driver.execute_async_script(
+                    self.__WAIT_SCRIPT,
+                    self.__conditions,
+                    max(0, int(remaining*1000))
+                )
+            except WebDriverException:
+                # the page is navigating away, the script is dropped with the old document
+                if remaining <= 0:
+                    return missing
+                time.sleep(min(0.1, remaining))
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import os
+import sys
+import sqlite3
+import threading
+
+from contextlib import closing
+from datetime import datetime
+
+
+class ReserveHistoryStore:
+
+    """
+        Local SQLite copy of the reservation history of every user.
+
+        A reservation is identified by (username, date, begin, end, location),
+        its status is updated on every sync until it reaches a final status.
+    """
+
+    FINAL_STATUSES = ("已完成", "已结束使用", "已取消", "失约")
+    ACTIVE_STATUSES = ("已预约", "使用中")
+    # the seat was really used
+    USED_STATUSES = ("使用中", "已完成", "已结束使用")
+
+    __lock = threading.Lock()
+
+    def __init__(
+        self,
+        db_path: str
+    ):
+
+        self.__db_path = db_path
+        # username -> updated time of the last sync of the user by this store
+        self.__synced_times = {}
+        with self.__lock, closing(self.__connect()) as connection, connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS reservations (
+                    username TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    begin_time TEXT NOT NULL,
+                    end_time TEXT NOT NULL,
+                    location TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    updated_time TEXT NOT NULL,
+                    PRIMARY KEY (username, date, begin_time, end_time, location)
+                )
+            """)
+            connection.execute("""
+                CREATE INDEX IF NOT EXISTS reservations_status
+                ON reservations (username, status, date)
+            """)
+
+    @staticmethod
+    def fromConfig(
+        run_config: dict
+    ) -> "ReserveHistoryStore":
+
+        store_config = run_config.get("history_store", {})
+        if not store_config.get("enabled", False):
+            return None
+        db_path = store_config.get("path", "")
+        if not db_path:
+            db_path = os.path.join(os.path.dirname(sys.executable), "reserve_history.db")
+        return ReserveHistoryStore(db_path)
+
+    @staticmethod
+    def __isValid(
+        record: dict
+    ) -> bool:
+
+        return bool(record and record["date"] and record["time"]["begin"] and record["time"]["end"])
+
+    @staticmethod
+    def recordKey(
+        record: dict
+    ) -> tuple:
+
+        """
+            (date, begin, end, location) of the record, None for a placeholder record.
+        """
+        if not ReserveHistoryStore.__isValid(record):
+            return None
+        # the page may give a date without zero padding, which breaks the ordering
+        date = datetime.strptime(record["date"], "%Y-%m-%d").strftime("%Y-%m-%d")
+        return (date, record["time"]["begin"], record["time"]["end"], record["info"]["location"])
+
+    @staticmethod
+    def __toRecord(
+        row: tuple
+    ) -> dict:
+
+        return {
+            "date": row[0],
+            "time": {"begin": row[1], "end": row[2]},
+            "info": {"location": row[3], "status": row[4]}
+        }
+
+
+    def __connect(
+        self
+    ) -> sqlite3.Connection:
+
+        # several runner processes may write the same file
+        return sqlite3.connect(self.__db_path, timeout=10)
+
+
+    def __query(
+        self,
+        sql: str,
+        params: tuple
+    ) -> list:
+
+        with self.__lock, closing(self.__connect()) as connection, connection:
+            return connection.execute(sql, params).fetchall()
+
+
+    def sync(
+        self,
+        username: str,
+        records: list
+    ) -> int:
+
+        """
+            Insert the new records and update the status of the known ones,
+            returns the number of the new records.
+        """
+        records = [record for record in records if self.__isValid(record)]
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        new_count = 0
+        with self.__lock, closing(self.__connect()) as connection, connection:
+            for record in records:
+                key = (username, *self.recordKey(record))
+                cursor = connection.execute(
+                    "UPDATE reservations SET status = ?, updated_time = ? "
+                    "WHERE username = ? AND date = ? AND begin_time = ? AND end_time = ? AND location = ?",
+                    (record["info"]["status"], now, *key)
+                )
+                if cursor.rowcount == 0:
+                    connection.execute(
+                        "INSERT INTO reservations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (*key, record["info"]["status"], now)
+                    )
+                    new_count += 1
+            self.__synced_times[username] = now
+        return new_count
+
+
+    def isFinalStored(
+        self,
+        username: str,
+        record: dict
+    ) -> bool:
+
+        # a finished record never changes, the records older than it are stored as well
+        if not self.__isValid(record) or record["info"]["status"] not in self.FINAL_STATUSES:
+            return False
+        return bool(self.__query(
+            "SELECT 1 FROM reservations "
+            "WHERE username = ? AND date = ? AND begin_time = ? AND end_time = ? AND location = ? AND status = ?",
+            (username, *self.recordKey(record), record["info"]["status"])
+        ))
+
+
+    def records(
+        self,
+        username: str,
+        until_date: str
+    ) -> list:
+
+        # the finished records on and before the date, from the latest to the earliest
+        rows = self.__query(
+            "SELECT date, begin_time, end_time, location, status FROM reservations "
+            f"WHERE username = ? AND date <= ? AND status IN ({", ".join("?"*len(self.FINAL_STATUSES))}) "
+            "ORDER BY date DESC, begin_time DESC",
+            (username, until_date, *self.FINAL_STATUSES)
+        )
+        return [self.__toRecord(row) for row in rows]
+
+
+    def activeRecord(
+        self,
+        username: str,
+        date: str
+    ) -> dict:
+
+        """
+            The reservation of the user on the date which is not finished yet, None if
+            there is none. Only the records refreshed by the last sync of the user are
+            answered, an older row may still hold a status the page has since changed.
+        """
+        synced_time = self.__synced_times.get(username)
+        if synced_time is None:
+            return None
+        rows = self.__query(
+            "SELECT date, begin_time, end_time, location, status FROM reservations "
+            f"WHERE username = ? AND status IN ({", ".join("?"*len(self.ACTIVE_STATUSES))}) "
+            "AND date = ? AND updated_time = ? ORDER BY begin_time DESC LIMIT 1",
+            (username, *self.ACTIVE_STATUSES, date, synced_time)
+        )
+        return self.__toRecord(rows[0]) if rows else None
+
+
+    def lastUsedSeat(
+        self,
+        username: str
+    ) -> dict:
+
+        # the latest record whose seat was really used, None if there is none
+        rows = self.__query(
+            "SELECT date, begin_time, end_time, location, status FROM reservations "
+            f"WHERE username = ? AND status IN ({", ".join("?"*len(self.USED_STATUSES))}) "
+            "ORDER BY date DESC, begin_time DESC LIMIT 1",
+            (username, *self.USED_STATUSES)
+        )
+        return self.__toRecord(rows[0]) if rows else None
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import re
+
+from datetime import datetime, timedelta
+
+from utils.HtmlTree import HtmlTree
+
+
+class ReserveRecordParser:
+
+    @staticmethod
+    def decodeTime(
+        time_str: str
+    ) -> dict:
+
+        time_str = time_str.strip()
+        today = datetime.now().date()
+        if "明天" in time_str:
+            target_date = today + timedelta(days=1)
+            date = target_date.strftime("%Y-%m-%d")
+        elif "今天" in time_str:
+            target_date = today
+            date = target_date.strftime("%Y-%m-%d")
+        elif "昨天" in time_str:
+            target_date = today - timedelta(days=1)
+            date = target_date.strftime("%Y-%m-%d")
+        else:
+            date_match = re.search(r"(\d{4}-\d{1,2}-\d{1,2})", time_str)
+            if date_match:
+                date = date_match.group(1)
+            else:
+                date = ""
+        time_match = re.search(r"(\d{1,2}:\d{2}) -- (\d{1,2}:\d{2})", time_str)
+        if time_match:
+            begin_time = time_match.group(1)
+            end_time = time_match.group(2)
+        else:
+            begin_time = ""
+            end_time = ""
+        return {
+            "date": date,
+            "time": {
+                "begin": begin_time,
+                "end": end_time
+            }
+        }
+
+    @staticmethod
+    def decodeInfo(
+        info_texts: list
+    ) -> dict:
+
+        location = ""
+        status = ""
+        for text in info_texts:
+            if "已预约" in text:
+                status = "已预约"
+            elif "使用中" in text:
+                status = "使用中"
+            elif "已完成" in text:
+                status = "已完成"
+            elif "已结束使用" in text:
+                status = "已结束使用"
+            elif "已取消" in text:
+                status = "已取消"
+            elif "失约" in text:
+                status = "失约"
+            elif "图书馆" in text:
+                location = text.strip()
+        return {
+            "location": location,
+            "status": status,
+        }
+
+    @staticmethod
+    def decodeRecord(
+        time_str: str,
+        info_texts: list
+    ) -> dict:
+
+        time = ReserveRecordParser.decodeTime(time_str)
+        info = ReserveRecordParser.decodeInfo(info_texts)
+        return {
+            "date": time["date"],
+            "time": time["time"],
+            "info": info
+        }
+
+    @staticmethod
+    def parseRecords(
+        html: str
+    ) -> list:
+
+        """
+            Parse the records of the '.myReserveList' element in the reservation history page.
+
+            Returns None if the page has no record list at all.
+        """
+        root = HtmlTree.parse(html)
+        record_list = root.find(cls="myReserveList")
+        if record_list is None:
+            return None
+        records = []
+        for reservation in record_list.children:
+            if reservation.tag != "dl" or reservation.attr("id") == "moreBlock":
+                continue
+            time_element = reservation.find("dt")
+            info_elements = reservation.findAll("a")
+            records.append(ReserveRecordParser.decodeRecord(
+                time_element.text() if time_element else "",
+                [info.text() for info in info_elements]
+            ))
+        return records
+
+    @staticmethod
+    def hasMoreRecords(
+        html: str
+    ) -> bool:
+
+        return HtmlTree.parse(html).find(id="moreBtn") is not None
+
+    @staticmethod
+    def findRecord(
+        records: list,
+        wanted_date: str,
+        wanted_status: str
+    ) -> tuple:
+
+        """
+            Find the wanted record in the records sorted from the latest to the earliest.
+
+            Returns (record, index, finished), 'finished' is True when a record earlier
+            than the wanted date is reached, so that the older records need not to be loaded.
+        """
+        wanted = datetime.strptime(wanted_date, "%Y-%m-%d").date()
+        for index, record in enumerate(records):
+            if record is None:
+                continue
+            if record["date"] == "":
+                continue
+            if record["time"] == {"begin": "", "end": ""}:
+                continue
+            record_date = datetime.strptime(record["date"], "%Y-%m-%d").date()
+            # record date is later than the given date, check the next one
+            if record_date > wanted:
+                continue
+            # record date is earlier than the given date, so there is no wanted record
+            if record_date < wanted:
+                return None, index, True
+            if record["info"]["status"] == wanted_status:
+                return record, index, True
+        return None, len(records), False
+
+    @staticmethod
+    def coversDate(
+        records: list,
+        wanted_date: str
+    ) -> bool:
+
+        """
+            Whether the records reach back before the wanted date, then all the
+            records of the date are in them and no older record is needed.
+        """
+        wanted = datetime.strptime(wanted_date, "%Y-%m-%d").date()
+        for record in records:
+            if record is None or record["date"] == "":
+                continue
+            if datetime.strptime(record["date"], "%Y-%m-%d").date() < wanted:
+                return True
+        return False
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import threading
+
+
+class RoomCache:
+
+    """
+        What the users of one run have learned about a room, keyed by
+        (date, floor, room): the seat element ids, the room snapshot and the
+        time options of the seats (named by the seat, as they depend on the
+        bookings of the seat), so that the later users decide before reading the page.
+
+        Shared by all the runner threads of the run, an entry is dropped when
+        a reservation in the room succeeds.
+    """
+
+    def __init__(
+        self
+    ):
+
+        self.__lock = threading.Lock()
+        self.__rooms = {}
+
+    @staticmethod
+    def keyOf(
+        reserve_info: dict
+    ) -> tuple:
+
+        return (reserve_info.get("date"), reserve_info.get("floor"), reserve_info.get("room"))
+
+
+    def get(
+        self,
+        key: tuple,
+        name: any
+    ) -> any:
+
+        with self.__lock:
+            return self.__rooms.get(key, {}).get(name)
+
+
+    def put(
+        self,
+        key: tuple,
+        name: any,
+        value: any
+    ):
+
+        with self.__lock:
+            self.__rooms.setdefault(key, {})[name] = value
+
+
+    def invalidate(
+        self,
+        key: tuple
+    ):
+
+        with self.__lock:
+            self.__rooms.pop(key, None)
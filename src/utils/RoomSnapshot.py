@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+from utils.SeatTopology import SeatTopology
+
+
+class RoomSnapshot:
+
+    """
+        The state of every seat of a room at one moment, one byte per seat
+        in the order of the seat indices of the SeatTopology of the room.
+    """
+
+    MISSING = 0     # not in the page
+    FREE = 1
+    OCCUPIED = 2
+    RESERVED = 3
+    UNKNOWN = 4     # in the page, but neither the class nor the title tells the state
+
+    STATE_NAMES = ("missing", "free", "occupied", "reserved", "unknown")
+
+    def __init__(
+        self,
+        topology: SeatTopology,
+        states: bytes
+    ):
+
+        self.__topology = topology
+        self.__states = bytes(states)
+
+    @classmethod
+    def fromCodes(
+        cls,
+        topology: SeatTopology,
+        codes: list
+    ) -> "RoomSnapshot":
+
+        # the codes are read by the page script in the order of the seat indices
+        if len(codes) != len(topology):
+            raise ValueError(f"座位状态数量 {len(codes)} 与座位图 {len(topology)} 不一致")
+        return cls(topology, bytes(codes))
+
+
+    def __len__(
+        self
+    ) -> int:
+
+        return len(self.__states)
+
+
+    def topology(
+        self
+    ) -> SeatTopology:
+
+        return self.__topology
+
+
+    def codes(
+        self
+    ) -> bytes:
+
+        return self.__states
+
+
+    def state(
+        self,
+        seat_id: str
+    ) -> str:
+
+        index = self.__topology.indexOf(seat_id)
+        return self.STATE_NAMES[self.__states[index] if index != -1 else self.MISSING]
+
+
+    def isAvailable(
+        self,
+        seat_id: str
+    ) -> bool:
+
+        # a seat of unknown state is still worth a try
+        index = self.__topology.indexOf(seat_id)
+        return index != -1 and self.__states[index] in (self.FREE, self.UNKNOWN)
+
+
+    def availableMask(
+        self
+    ) -> list:
+
+        return [code in (self.FREE, self.UNKNOWN) for code in self.__states]
+
+
+    def counts(
+        self
+    ) -> dict:
+
+        return {name: self.__states.count(code) for code, name in enumerate(self.STATE_NAMES)}
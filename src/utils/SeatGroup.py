@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+from utils.RoomSnapshot import RoomSnapshot
+from utils.SeatGroupSolver import SeatGroupSolver
+from utils.SeatTopology import SeatTopology
+
+
+class SeatGroup:
+
+    """
+        The seats of a group of users reserving together in one room.
+
+        The users reserve one after another, each one asks for its seat with the
+        latest seat states of the room. The block is solved again, around the seats
+        already reserved by the group, as soon as a planned seat is taken.
+    """
+
+    def __init__(
+        self,
+        usernames: list,
+        room: str,
+        anchor_seat: str = None
+    ):
+
+        topology = SeatTopology.forRoom(room)
+        self.__solver = SeatGroupSolver(topology) if topology else None
+        self.__usernames = list(usernames)
+        self.__anchor_seat = anchor_seat
+        self.__assigned = {}
+        self.__reserved = {}
+        self.__taken = set()
+
+
+    def usernames(
+        self
+    ) -> list:
+
+        return list(self.__usernames)
+
+
+    def __isPlanValid(
+        self,
+        snapshot: RoomSnapshot
+    ) -> bool:
+
+        if len(self.__assigned) != len(self.__usernames):
+            return False
+        return all(
+            seat not in self.__taken and (snapshot is None or snapshot.isAvailable(seat))
+            for username, seat in self.__assigned.items()
+            if username not in self.__reserved
+        )
+
+
+    def assign(
+        self,
+        username: str,
+        snapshot: RoomSnapshot = None
+    ) -> str:
+
+        """
+            Returns the seat planned for the user, None if the group does not fit
+            in the room any more, then the user keeps the seat of its own.
+
+            'snapshot' is the latest state of the room, None if unknown.
+        """
+        if self.__solver is None or username not in self.__usernames:
+            return None
+        if not self.__isPlanValid(snapshot):
+            # the seats reserved by the group are taken in the page, the solver keeps them
+            if snapshot is not None:
+                free = snapshot.availableMask()
+            else:
+                free = [True]*len(self.__solver.seats())
+            for index, seat in enumerate(self.__solver.seats()):
+                if seat in self.__taken:
+                    free[index] = False
+            block = self.__solver.solve(
+                len(self.__usernames), free, self.__anchor_seat, list(self.__reserved.values())
+            )
+            if block is None:
+                return None
+            left = [seat for seat in block if seat not in self.__reserved.values()]
+            self.__assigned = dict(self.__reserved)
+            for member in self.__usernames:
+                if member not in self.__reserved:
+                    self.__assigned[member] = left.pop(0)
+        return self.__assigned[username]
+
+
+    def confirm(
+        self,
+        username: str
+    ):
+
+        if username in self.__assigned:
+            self.__reserved[username] = self.__assigned[username]
+
+
+    def release(
+        self,
+        username: str
+    ):
+
+        # the seat failed, it must not be planned again,
+        # and the user is done, the rest of the group is planned without it
+        seat = self.__assigned.pop(username, None)
+        if seat is not None:
+            self.__taken.add(seat)
+        if username in self.__usernames and username not in self.__reserved:
+            self.__usernames.remove(username)
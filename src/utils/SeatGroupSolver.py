@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import math
+
+from utils.SeatTopology import SeatTopology
+
+
+class SeatGroupSolver:
+
+    """
+        Find a block of adjacent free seats in a room for a group of 2-4 users.
+
+        Two seats are adjacent when their cells in the seat map touch by a side,
+        so the seats of a table are side by side or facing each other, and the
+        seats of two tables are only adjacent when there is no aisle between them.
+    """
+
+    MAX_GROUP_SIZE = 4
+
+    def __init__(
+        self,
+        topology: SeatTopology
+    ):
+
+        self.__topology = topology
+        self.__seats = topology.seats()
+        self.__positions = [topology.cellAt(index) for index in range(len(topology))]
+        self.__tables = [topology.tableAt(index) for index in range(len(topology))]
+        self.__neighbours = [topology.neighboursAt(index) for index in range(len(topology))]
+
+
+    def __connectedSets(
+        self,
+        size: int,
+        free: list
+    ) -> list:
+
+        """
+            Every connected set of 'size' free seats, each one found once by
+            growing it from its smallest seat index with larger indices only.
+        """
+        found = []
+        def extend(subset: list, extension: set, root: int):
+            if len(subset) == size:
+                found.append(tuple(subset))
+                return
+            extension = set(extension)
+            while extension:
+                seat = extension.pop()
+                grown = extension | {
+                    neighbour for neighbour in self.__neighbours[seat]
+                    if neighbour > root and free[neighbour] and neighbour not in subset
+                    and all(neighbour not in self.__neighbours[member] for member in subset)
+                }
+                extend(subset + [seat], grown, root)
+        for root, is_free in enumerate(free):
+            if is_free:
+                extend([root], {
+                    neighbour for neighbour in self.__neighbours[root]
+                    if neighbour > root and free[neighbour]
+                }, root)
+        return found
+
+
+    def __score(
+        self,
+        block: tuple,
+        anchor: tuple
+    ) -> tuple:
+
+        # fewer tables, then more touching pairs, then closer to the wanted seat
+        tables = len({self.__tables[seat] for seat in block})
+        edges = sum(1 for seat in block for neighbour in self.__neighbours[seat] if neighbour in block)//2
+        distance = 0.
+        if anchor is not None:
+            distance = min(
+                math.hypot(self.__positions[seat][0] - anchor[0], self.__positions[seat][1] - anchor[1])
+                for seat in block
+            )
+        return (tables, -edges, distance, block)
+
+
+    def seats(
+        self
+    ) -> list:
+
+        return list(self.__seats)
+
+
+    def solve(
+        self,
+        size: int,
+        free: list,
+        anchor_seat: str = None,
+        fixed_seats: list = None
+    ) -> list:
+
+        """
+            Returns the seat numbers of the best block, None if there is no such block.
+
+            The block contains all the 'fixed_seats' (already reserved by the group)
+            and is as close as possible to 'anchor_seat'.
+        """
+        if not 1 <= size <= self.MAX_GROUP_SIZE:
+            return None
+        fixed = set()
+        for seat in fixed_seats or []:
+            index = self.__topology.indexOf(seat)
+            if index == -1:
+                return None
+            fixed.add(index)
+        free = list(free)
+        for index in fixed:
+            free[index] = True
+        anchor = None
+        if anchor_seat is not None:
+            anchor = self.__topology.position(anchor_seat)
+        blocks = [block for block in self.__connectedSets(size, free) if fixed.issubset(block)]
+        if not blocks:
+            return None
+        best = min(blocks, key=lambda block: self.__score(block, anchor))
+        return [self.__seats[index] for index in sorted(best)]
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import os
+import sys
+import json
+import math
+import hashlib
+import tempfile
+import threading
+
+from array import array
+
+from gui.ALSeatMapTable import seats_maps
+
+
+class SeatTopology:
+
+    """
+        Geometry of the seats of a room, parsed once from the seat map table.
+
+        The seats are kept in parallel arrays by the seat index, in the order of
+        the table from the top left to the bottom right:
+            rows, cols - the cell of the seat, the empty cells are aisles
+            seats      - the canonical seat number, e.g. '39A'
+            tables     - the table of the seat, e.g. '39'
+            neighbours - the indices of the seats touching the seat by a side
+        The parsed rooms are cached on disk along with the hash of their table.
+    """
+
+    CACHE_VERSION = 1
+
+    # room -> SeatTopology, every room is parsed once in the process
+    __rooms = {}
+    __disk_cache = None
+    __lock = threading.Lock()
+
+    def __init__(
+        self,
+        topology: dict
+    ):
+
+        self.__shape = tuple(topology["shape"])
+        self.__rows = array("H", topology["rows"])
+        self.__cols = array("H", topology["cols"])
+        self.__seats = list(topology["seats"])
+        self.__tables = list(topology["tables"])
+        self.__neighbours = [tuple(neighbours) for neighbours in topology["neighbours"]]
+        self.__index = {seat: index for index, seat in enumerate(self.__seats)}
+
+    @staticmethod
+    def canonicalSeat(
+        seat_id: str
+    ) -> str:
+
+        # same as the seat number in the page, '039a' -> '39A'
+        return (seat_id or "").strip().lstrip('0').upper()
+
+    @staticmethod
+    def displaySeat(
+        seat_id: str
+    ) -> str:
+
+        # same as the seat number in the seat map table, '39a' -> '039A'
+        seat = SeatTopology.canonicalSeat(seat_id)
+        number = seat.rstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        return number.zfill(3) + seat[len(number):]
+
+    @staticmethod
+    def tableOf(
+        seat_id: str
+    ) -> str:
+
+        # the seats of a table share the number, '39A' -> '39'
+        return SeatTopology.canonicalSeat(seat_id).rstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+    @staticmethod
+    def parse(
+        layout: str
+    ) -> dict:
+
+        rows, cols, seats = [], [], []
+        lines = layout.strip().split("\n")
+        for row, line in enumerate(lines):
+            for col, cell in enumerate(line.split(",")):
+                if cell.strip():
+                    rows.append(row)
+                    cols.append(col)
+                    seats.append(SeatTopology.canonicalSeat(cell))
+        cells = {(row, col): index for index, (row, col) in enumerate(zip(rows, cols))}
+        neighbours = [
+            [
+                cells[cell]
+                for cell in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                if cell in cells
+            ]
+            for row, col in zip(rows, cols)
+        ]
+        return {
+            "shape": [len(lines), max((len(line.split(",")) for line in lines), default=0)],
+            "rows": rows,
+            "cols": cols,
+            "seats": seats,
+            "tables": [SeatTopology.tableOf(seat) for seat in seats],
+            "neighbours": neighbours
+        }
+
+    @staticmethod
+    def __layoutHash(
+        layout: str
+    ) -> str:
+
+        return hashlib.sha1(f"{SeatTopology.CACHE_VERSION}|{layout}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def __cachePath(
+    ) -> str:
+
+        # next to the executable when frozen, else next to the sources rather than the interpreter
+        if getattr(sys, "frozen", False):
+            base_dir = os.path.dirname(sys.executable)
+        else:
+            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return os.path.join(base_dir, "seat_topology.json")
+
+    @classmethod
+    def __loadDiskCache(
+        cls
+    ) -> dict:
+
+        """
+            The topologies of all the rooms of the seat map table, the rooms whose
+            table changed are parsed again and the cache is written once for them.
+        """
+        if cls.__disk_cache is not None:
+            return cls.__disk_cache
+        cache_path = cls.__cachePath()
+        disk_cache = {}
+        try:
+            with open(cache_path, "r", encoding="utf-8") as file:
+                disk_cache = json.load(file)
+        except Exception:
+            # a missing or broken cache only costs a parsing
+            pass
+        topologies = {}
+        for rooms in seats_maps.values():
+            for room, layout in rooms.items():
+                layout_hash = cls.__layoutHash(layout)
+                cached = disk_cache.get(room)
+                if not isinstance(cached, dict) or cached.get("hash") != layout_hash:
+                    cached = {"hash": layout_hash, "topology": cls.parse(layout)}
+                topologies[room] = cached
+        # the rooms removed from the table are dropped as well
+        if topologies != disk_cache:
+            cls.__saveDiskCache(cache_path, topologies)
+        cls.__disk_cache = topologies
+        return cls.__disk_cache
+
+    @staticmethod
+    def __saveDiskCache(
+        cache_path: str,
+        disk_cache: dict
+    ):
+
+        cache_dir = os.path.dirname(cache_path)
+        if not os.access(cache_dir, os.W_OK):
+            return
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix="seat_topology.", suffix=".tmp", dir=cache_dir)
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(disk_cache, file, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+        except Exception:
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    @classmethod
+    def forRoom(
+        cls,
+        room: str
+    ) -> "SeatTopology":
+
+        with cls.__lock:
+            if room in cls.__rooms:
+                return cls.__rooms[room]
+            cached = cls.__loadDiskCache().get(room)
+            if cached is None:
+                cls.__rooms[room] = None
+                return None
+            cls.__rooms[room] = cls(cached["topology"])
+            return cls.__rooms[room]
+
+
+    def __len__(
+        self
+    ) -> int:
+
+        return len(self.__seats)
+
+
+    def shape(
+        self
+    ) -> tuple:
+
+        # (rows, cols) of the seat map table
+        return self.__shape
+
+
+    def seats(
+        self
+    ) -> list:
+
+        return list(self.__seats)
+
+
+    def indexOf(
+        self,
+        seat_id: str
+    ) -> int:
+
+        # -1 if the seat is not in the room
+        return self.__index.get(self.canonicalSeat(seat_id), -1)
+
+
+    def contains(
+        self,
+        seat_id: str
+    ) -> bool:
+
+        return self.indexOf(seat_id) != -1
+
+
+    def seatAt(
+        self,
+        index: int
+    ) -> str:
+
+        return self.__seats[index]
+
+
+    def tableAt(
+        self,
+        index: int
+    ) -> str:
+
+        return self.__tables[index]
+
+
+    def cellAt(
+        self,
+        index: int
+    ) -> tuple:
+
+        return self.__rows[index], self.__cols[index]
+
+
+    def neighboursAt(
+        self,
+        index: int
+    ) -> tuple:
+
+        return self.__neighbours[index]
+
+
+    def position(
+        self,
+        seat_id: str
+    ) -> tuple:
+
+        index = self.indexOf(seat_id)
+        return self.cellAt(index) if index != -1 else None
+
+
+    def nearestSeats(
+        self,
+        seat_id: str,
+        radius: float
+    ) -> list:
+
+        """
+            The other seats within the radius of the seat, from the nearest to the farthest.
+        """
+        origin = self.position(seat_id)
+        if origin is None:
+            return []
+        distances = []
+        for index, seat in enumerate(self.__seats):
+            row, col = self.__rows[index], self.__cols[index]
+            distance = math.hypot(row - origin[0], col - origin[1])
+            if 0 < distance <= radius:
+                distances.append((distance, row, col, seat))
+        return [seat for *_, seat in sorted(distances)]
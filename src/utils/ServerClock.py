@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import time
+import statistics
+import threading
+
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+
+from utils.HttpSession import HttpSession
+
+
+class ServerClock:
+
+    """
+        Estimate the offset between the library server clock and the local clock.
+
+        The 'Date' header only has a resolution of one second, so the samples are
+        spread over a second and every sample bounds the offset by
+        [server - local_after, server + 1 - local_before], the intersection of
+        all the bounds gives an offset much finer than one second.
+    """
+
+    __lock = threading.Lock()
+    __offset = 0.0 # server time - local time, in seconds
+    __error = 0.0 # half width of the offset bound, in seconds
+    __jitter = 0.0 # standard deviation of the round trip time, in seconds
+    __synced = False
+
+    @staticmethod
+    def __sample(
+        session: HttpSession
+    ) -> tuple:
+
+        local_before = time.time()
+        response = session.request("HEAD", "/")
+        local_after = time.time()
+        date = response.headers.get("Date")
+        if not date:
+            raise Exception("服务器响应中没有 Date 字段")
+        server = parsedate_to_datetime(date).timestamp()
+        return local_before, local_after, server
+
+    @classmethod
+    def sync(
+        cls,
+        host_url: str,
+        samples: int = 8,
+        timeout: float = 3.0
+    ) -> bool:
+
+        # at least one sample, the bounds of no sample say nothing
+        samples = max(1, int(samples))
+        session = HttpSession(host_url, timeout, pool_size=1)
+        bounds = []
+        round_trips = []
+        try:
+            # warm up the connection, the first request pays the handshake
+            cls.__sample(session)
+            for _ in range(samples):
+                local_before, local_after, server = cls.__sample(session)
+                bounds.append((server - local_after, server + 1 - local_before))
+                round_trips.append(local_after - local_before)
+                # move the sampling phase across one second
+                time.sleep(1/samples)
+        except Exception:
+            return False
+        finally:
+            session.close()
+        lower = max(bound[0] for bound in bounds)
+        upper = min(bound[1] for bound in bounds)
+        if lower > upper:
+            # inconsistent bounds (e.g. the local clock is stepped), use the middle of each
+            offset = statistics.median((bound[0] + bound[1])/2 for bound in bounds)
+            error = 0.5 + max(round_trips)/2
+        else:
+            offset = (lower + upper)/2
+            error = (upper - lower)/2
+        with cls.__lock:
+            cls.__offset = offset
+            cls.__error = error
+            cls.__jitter = statistics.pstdev(round_trips)
+            cls.__synced = True
+        return True
+
+    @classmethod
+    def now(
+        cls
+    ) -> datetime:
+
+        # naive local datetime corrected to the server clock
+        with cls.__lock:
+            offset = cls.__offset
+        return datetime.now() + timedelta(seconds=offset)
+
+    @classmethod
+    def status(
+        cls
+    ) -> dict:
+
+        with cls.__lock:
+            return {
+                "synced": cls.__synced,
+                "offset": cls.__offset,
+                "error": cls.__error,
+                "jitter": cls.__jitter
+            }
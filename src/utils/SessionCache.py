@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import os
+import json
+import tempfile
+import threading
+
+from datetime import datetime
+
+
+class SessionCache:
+
+    # the cache file is shared by all the runners in the process
+    __lock = threading.Lock()
+
+    def __init__(
+        self,
+        cache_path: str
+    ):
+
+        self.__cache_path = cache_path
+
+    @staticmethod
+    def __key(
+        host_url: str,
+        username: str
+    ) -> str:
+
+        return f"{host_url.rstrip("/")}|{username}"
+
+
+    def __read(
+        self
+    ) -> dict:
+
+        if not os.path.exists(self.__cache_path):
+            return {}
+        try:
+            with open(self.__cache_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except Exception:
+            # a broken cache only costs a full login
+            return {}
+
+
+    def __write(
+        self,
+        sessions: dict
+    ) -> bool:
+
+        # a temp file of its own per write, so the processes sharing the cache never
+        # write into the same file, and a failed write only costs a full login later
+        cache_dir = os.path.dirname(os.path.abspath(self.__cache_path))
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=f"{os.path.basename(self.__cache_path)}.", suffix=".tmp", dir=cache_dir
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(sessions, file, ensure_ascii=False, indent=4)
+            os.replace(tmp_path, self.__cache_path)
+            return True
+        except Exception:
+            if tmp_path and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return False
+
+
+    def load(
+        self,
+        host_url: str,
+        username: str
+    ) -> list:
+
+        with self.__lock:
+            session = self.__read().get(self.__key(host_url, username))
+        return session["cookies"] if session else None
+
+
+    def save(
+        self,
+        host_url: str,
+        username: str,
+        cookies: list
+    ):
+
+        if not cookies:
+            return
+        with self.__lock:
+            sessions = self.__read()
+            sessions[self.__key(host_url, username)] = {
+                "cookies": cookies,
+                "saved_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            self.__write(sessions)
+
+
+    def remove(
+        self,
+        host_url: str,
+        username: str
+    ):
+
+        with self.__lock:
+            sessions = self.__read()
+            if sessions.pop(self.__key(host_url, username), None) is not None:
+                self.__write(sessions)
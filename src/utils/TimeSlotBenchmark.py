@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import sys
+import time
+import random
+import argparse
+
+from utils.TimeSlots import TimeSlots
+
+
+class TimeSlotBenchmark:
+
+    """
+        Benchmark of the time option choice against the plain per option loop.
+
+        Run from the 'src' directory:
+            python -m utils.TimeSlotBenchmark --options 30 --rounds 10000
+    """
+
+    @staticmethod
+    def nearestLoop(
+        time_values: list,
+        target_time: int,
+        max_time_diff: int,
+        prefer_earlier: bool
+    ) -> int:
+
+        # the per option loop the operators used before, kept as the reference of the benchmark
+        best_index = -1
+        best_time_diff = max_time_diff
+        for index, time_val in enumerate(time_values):
+            actual_diff = time_val - target_time
+            abs_diff = abs(actual_diff)
+            if abs_diff < best_time_diff or (
+                abs_diff == best_time_diff and (
+                    (prefer_earlier and actual_diff <= 0) or
+                    (not prefer_earlier and actual_diff >= 0)
+                )
+            ):
+                best_time_diff = abs_diff
+                best_index = index
+        return best_index
+
+    @staticmethod
+    def generateCases(
+        rounds: int,
+        options: int,
+        seed: int = 0
+    ) -> list:
+
+        # (option attributes, target time, max time diff, prefer earlier) of each round
+        rng = random.Random(seed)
+        cases = []
+        for _ in range(rounds):
+            # the options of the page are every half an hour from a random start
+            begin = rng.randrange(7*60, 22*60, 30)
+            attrs = [str(mins) for mins in range(begin, 23*60 + 31, 30)][:options]
+            cases.append((attrs, rng.randrange(7*60, 23*60), rng.choice((0, 15, 30, 60)), rng.random() < 0.5))
+        return cases
+
+
+    @staticmethod
+    def run(
+        cases: list
+    ) -> dict:
+
+        begin = time.perf_counter()
+        expected = [
+            TimeSlotBenchmark.nearestLoop([int(attr) for attr in attrs], target, max_diff, prefer)
+            for attrs, target, max_diff, prefer in cases
+        ]
+        loop_cost = time.perf_counter() - begin
+        begin = time.perf_counter()
+        chosen = [
+            TimeSlots.nearest(TimeSlots.values(attrs), target, max_diff, prefer)
+            for attrs, target, max_diff, prefer in cases
+        ]
+        vector_cost = time.perf_counter() - begin
+        # duplicated options are the only case where the two may pick different indices
+        mismatches = sum(
+            1 for (attrs, *_), loop_index, index in zip(cases, expected, chosen)
+            if (loop_index == -1) != (index == -1) or (index != -1 and attrs[loop_index] != attrs[index])
+        )
+        return {
+            "rounds": len(cases),
+            "loop": loop_cost/len(cases),
+            "vector": vector_cost/len(cases),
+            "mismatches": mismatches
+        }
+
+
+    @staticmethod
+    def formatReport(
+        report: dict,
+        options: int
+    ) -> str:
+
+        return "\n".join([
+            f"测试组数: {report["rounds"]}, 每组选项数量: {options}",
+            f"逐项比较: 每组 {report["loop"]*1e6:.2f} 微秒",
+            f"向量化选择: 每组 {report["vector"]*1e6:.2f} 微秒",
+            f"选择结果不一致: {report["mismatches"]} 组"
+        ])
+
+
+def main(
+    argv: list = None
+) -> int:
+
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.TimeSlotBenchmark",
+        description="时间选项选择基准测试"
+    )
+    parser.add_argument("--options", type=int, default=30, help="每组时间选项的数量")
+    parser.add_argument("--rounds", type=int, default=10000, help="测试的组数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args(argv)
+
+    if args.rounds <= 0:
+        print("测试组数必须大于 0")
+        return 1
+    report = TimeSlotBenchmark.run(
+        TimeSlotBenchmark.generateCases(args.rounds, args.options, args.seed)
+    )
+    print(TimeSlotBenchmark.formatReport(report, args.options))
+    return 1 if report["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+import numpy as np
+
+from datetime import datetime
+
+
+class TimeSlots:
+
+    """
+        The time options of the reserve and renew pages as minutes of the day,
+        and the choice of the option nearest to the wanted time.
+    """
+
+    INVALID = -1
+    LATEST_END = 23*60 + 30
+    MAX_DURATION = 8*60
+
+    @staticmethod
+    def toMins(
+        time_str: str
+    ) -> int:
+
+        hour, minute = map(int, time_str.split(":"))
+        return hour*60 + minute
+
+    @staticmethod
+    def toTime(
+        mins: int
+    ) -> str:
+
+        hour, minute = divmod(int(mins), 60)
+        return f"{hour:02d}:{minute:02d}"
+
+    @staticmethod
+    def values(
+        time_attrs: list
+    ) -> np.ndarray:
+
+        """
+            The minutes of the 'time' (or 'id') attributes of the options, 'now' is the
+            current time and the attributes which are not a time are INVALID.
+        """
+        now = datetime.now()
+        now_mins = now.hour*60 + now.minute
+        return np.fromiter(
+            (
+                now_mins if attr == "now" else int(attr) if attr and attr.isdigit() else TimeSlots.INVALID
+                for attr in time_attrs
+            ),
+            dtype=np.int32,
+            count=len(time_attrs)
+        )
+
+    @staticmethod
+    def __window(
+        time_values: np.ndarray,
+        target_time: any,
+        max_time_diff: int,
+        prefer_earlier: bool
+    ) -> tuple:
+
+        # (valid, key) of the times, the key is the distance to the target doubled,
+        # plus one off the preferred side, so the smaller key is the better time
+        actual_diff = time_values - target_time
+        abs_diff = np.abs(actual_diff)
+        preferred = actual_diff <= 0 if prefer_earlier else actual_diff >= 0
+        valid = (time_values != TimeSlots.INVALID) & (
+            (abs_diff < max_time_diff) | ((abs_diff == max_time_diff) & preferred)
+        )
+        return valid, abs_diff*2. + ~preferred
+
+    @staticmethod
+    def nearest(
+        time_values: np.ndarray,
+        target_time: int,
+        max_time_diff: int = 30,
+        prefer_earlier: bool = True
+    ) -> int:
+
+        """
+            Returns the index of the time nearest to the target time
+            within the max time diff, or -1 if there is no such time.
+
+            Of two times as far from the target, the earlier one is chosen if
+            'prefer_earlier', else the later one, a time exactly 'max_time_diff'
+            away is only chosen on the preferred side.
+        """
+        time_values = np.asarray(time_values, dtype=np.int32)
+        if time_values.size == 0:
+            return -1
+        valid, key = TimeSlots.__window(time_values, target_time, max_time_diff, prefer_earlier)
+        if not valid.any():
+            return -1
+        return int(np.argmin(np.where(valid, key, np.inf)))
+
+    @staticmethod
+    def candidates(
+        time_values: np.ndarray,
+        target_time: int,
+        max_time_diff: int = 30,
+        prefer_earlier: bool = True
+    ) -> list:
+
+        # the indices of the times within the max time diff, the nearest first
+        time_values = np.asarray(time_values, dtype=np.int32)
+        valid, key = TimeSlots.__window(time_values, target_time, max_time_diff, prefer_earlier)
+        indices = np.flatnonzero(valid)
+        return indices[np.argsort(key[indices], kind="stable")].tolist()
+
+    @staticmethod
+    def achievable(
+        begin_val: int,
+        duration: int
+    ) -> int:
+
+        # the longest part of 'duration' a period from the begin time can satisfy
+        return max(0, min(duration, TimeSlots.MAX_DURATION, TimeSlots.LATEST_END - int(begin_val)))
+
+    @staticmethod
+    def bestPeriod(
+        begin_values: np.ndarray,
+        end_values: list,
+        begin_target: int,
+        end_target: int,
+        duration: int,
+        begin_window: tuple,
+        end_window: tuple
+    ) -> tuple:
+
+        """
+            Returns (begin index, end index, satisfied minutes) of the best period,
+            None if no pair of times meets both windows.
+
+            'end_values' are the end times offered for each begin time, None for a
+            begin time whose end times are not read. 'end_target' None means the
+            end follows the begin time by 'duration', at the latest 23:30.
+            The windows are (max time diff, prefer earlier) of the begin and the end.
+
+            The periods longer than 8 hours or ending after 23:30 are left out, the
+            rest are ranked by the satisfied part of 'duration', then by the begin
+            time and last by the end time as 'nearest' ranks them.
+        """
+        begin_values = np.asarray(begin_values, dtype=np.int32)
+        probed = [index for index, ends in enumerate(end_values) if ends is not None and len(ends)]
+        if not probed:
+            return None
+        # the end times of the begin times in rows, padded with INVALID
+        ends = np.full(
+            (len(probed), max(len(end_values[index]) for index in probed)),
+            TimeSlots.INVALID,
+            dtype=np.int32
+        )
+        for row, index in enumerate(probed):
+            ends[row, :len(end_values[index])] = end_values[index]
+        begins = begin_values[probed][:, None]
+        if end_target is None:
+            end_target = np.minimum(begins + duration, TimeSlots.LATEST_END)
+        begin_valid, begin_key = TimeSlots.__window(begins, begin_target, *begin_window)
+        end_valid, end_key = TimeSlots.__window(ends, end_target, *end_window)
+        length = ends - begins
+        valid = begin_valid & end_valid & (length > 0) &\
+            (length <= TimeSlots.MAX_DURATION) & (ends <= TimeSlots.LATEST_END)
+        if not valid.any():
+            return None
+        satisfied = np.minimum(length, duration)
+        rows, cols = np.nonzero(valid)
+        best = np.lexsort((
+            end_key[rows, cols],
+            np.broadcast_to(begin_key, ends.shape)[rows, cols],
+            -satisfied[rows, cols]
+        ))[0]
+        return probed[rows[best]], int(cols[best]), int(satisfied[rows[best], cols[best]])
+
+    @staticmethod
+    def probePeriod(
+        begin_values: np.ndarray,
+        candidates: list,
+        load_end_values: callable,
+        begin_target: int,
+        end_target: int,
+        duration: int,
+        begin_window: tuple,
+        end_window: tuple
+    ) -> tuple:
+
+        """
+            Loads the end times of the candidate begin times, the nearest first, with
+            'load_end_values(index)' (None if they can not be loaded), until none of
+            the later begin times can satisfy more of the duration.
+
+            Returns (best, end_values), 'best' as 'bestPeriod' returns it and
+            'end_values' the loaded end times of each begin time.
+        """
+        begin_values = np.asarray(begin_values, dtype=np.int32)
+        end_values = [None]*len(begin_values)
+        best = None
+        for position, index in enumerate(candidates):
+            end_values[index] = load_end_values(index)
+            if end_values[index] is None:
+                continue
+            best = TimeSlots.bestPeriod(
+                begin_values, end_values, begin_target, end_target, duration, begin_window, end_window
+            )
+            # the later begin times are farther from the target and none of them
+            # can satisfy more of the duration, late ones are cut at 23:30
+            if best is not None and all(
+                best[2] >= TimeSlots.achievable(begin_values[rest], duration)
+                for rest in candidates[position + 1:]
+            ):
+                break
+        return best, end_values
@@ -2,6 +2,24 @@
     Utils module for the AutoLibrary project.
 
     Here are the classes and modules in this package:
+    - CaptchaBenchmark: Offline captcha recognition benchmark for the AutoLibrary project.
+    - CaptchaPreprocessor: NumPy captcha cleaning before recognition for the AutoLibrary project.
     - ConfigReader: Configuration reader class for the AutoLibrary project.
     - ConfigWriter: Configuration writer class for the AutoLibrary project.
+    - DriverFactory: Browser driver factory for the AutoLibrary project.
+    - HtmlTree: Minimal HTML tree parser for the AutoLibrary project.
+    - HttpSession: Keep-alive HTTP session with cookies for the AutoLibrary project.
+    - OcrService: Process-wide shared captcha recognizer for the AutoLibrary project.
+    - PageReadiness: Composite in-page readiness wait for the AutoLibrary project.
+    - ReserveHistoryStore: Local SQLite reservation history store for the AutoLibrary project.
+    - ReserveRecordParser: Reservation record parser for the AutoLibrary project.
+    - RoomCache: Run-scoped room layout and time option cache for the AutoLibrary project.
+    - RoomSnapshot: Seat state bitmap of a library room for the AutoLibrary project.
+    - SeatGroup: Seat assignment of the users reserving together for the AutoLibrary project.
+    - SeatGroupSolver: Adjacent free seat block solver for the AutoLibrary project.
+    - SeatTopology: Precomputed seat map index of the library rooms for the AutoLibrary project.
+    - ServerClock: Library server clock offset estimator for the AutoLibrary project.
+    - SessionCache: On-disk user session cookie cache for the AutoLibrary project.
+    - TimeSlotBenchmark: Time option choice benchmark for the AutoLibrary project.
+    - TimeSlots: Vectorised time option selection for the AutoLibrary project.
 """
\ No newline at end of file
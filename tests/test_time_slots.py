@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2025 KenanZhu.
+All rights reserved.
+
+This software is provided "as is", without any warranty of any kind.
+You may use, modify, and distribute this file under the terms of the MIT License.
+See the LICENSE file for details.
+"""
+from datetime import datetime
+
+from utils.TimeSlots import TimeSlots
+
+
+def test_nearest_max_diff_on_the_preferred_side():
+
+    # 07:30 and 08:30 are both 30 minutes from 08:00
+    assert TimeSlots.nearest([450, 510], 480, 30, prefer_earlier=True) == 0
+    assert TimeSlots.nearest([450, 510], 480, 30, prefer_earlier=False) == 1
+
+
+def test_nearest_max_diff_off_the_preferred_side():
+
+    assert TimeSlots.nearest([510], 480, 30, prefer_earlier=True) == -1
+    assert TimeSlots.nearest([510], 480, 30, prefer_earlier=False) == 0
+    assert TimeSlots.nearest([450], 480, 30, prefer_earlier=True) == 0
+    assert TimeSlots.nearest([450], 480, 30, prefer_earlier=False) == -1
+
+
+def test_nearest_within_max_diff_ignores_the_side():
+
+    assert TimeSlots.nearest([450, 500], 480, 30, prefer_earlier=True) == 1
+    assert TimeSlots.nearest([460, 510], 480, 30, prefer_earlier=False) == 0
+
+
+def test_values_of_now():
+
+    before = datetime.now()
+    values = TimeSlots.values(["now", "600"])
+    after = datetime.now()
+    assert values[0] in (before.hour*60 + before.minute, after.hour*60 + after.minute)
+    assert values[1] == 600
+
+
+def test_values_of_invalid_options():
+
+    values = TimeSlots.values(["", "abc", None, "600"])
+    assert values.tolist() == [TimeSlots.INVALID]*3 + [600]
+
+
+def test_invalid_options_are_never_chosen():
+
+    # the INVALID option is 1 minute from the target, it is still skipped
+    values = TimeSlots.values(["x", "600"])
+    assert TimeSlots.nearest(values, 0, 30) == -1
+    assert TimeSlots.nearest(values, 590, 30) == 1
+    assert TimeSlots.candidates(values, 0, 30) == []
+
+
+def test_empty_options():
+
+    assert TimeSlots.nearest([], 480) == -1
+    assert TimeSlots.candidates([], 480) == []
+    assert TimeSlots.bestPeriod([], [], 480, None, 240, (30, True), (30, False)) is None
+
+
+def test_candidates_nearest_first():
+
+    assert TimeSlots.candidates([420, 450, 480, 510, 540], 480, 60, prefer_earlier=True) == [2, 1, 3, 0]
+    assert TimeSlots.candidates([420, 450, 480, 510, 540], 480, 60, prefer_earlier=False) == [2, 3, 1, 4]
+
+
+def test_best_period_takes_another_begin_time():
+
+    # the end times of 08:00 are too early, 08:30 - 12:30 meets both windows
+    begin_values = [480, 510]
+    end_values = [[540], [750]]
+    assert TimeSlots.bestPeriod(
+        begin_values, end_values, 480, None, 240, (60, True), (30, False)
+    ) == (1, 0, 240)
+
+
+def test_best_period_leaves_out_periods_past_the_limits():
+
+    # 22:00 - 23:45 ends after 23:30 and 08:00 - 17:00 is longer than 8 hours
+    assert TimeSlots.bestPeriod([1320], [[1425]], 1320, None, 120, (30, True), (30, True)) is None
+    assert TimeSlots.bestPeriod([480], [[1020]], 480, 1020, 540, (30, True), (30, True)) is None
+
+
+def test_probe_period_stops_once_the_duration_is_met():
+
+    begin_values = [480, 510, 540]
+    ends = {0: [720], 1: [750], 2: [780]}
+    loaded = []
+
+    def load(index):
+        loaded.append(index)
+        return ends[index]
+
+    candidates = TimeSlots.candidates(begin_values, 480, 60)
+    best, end_values = TimeSlots.probePeriod(
+        begin_values, candidates, load, 480, None, 240, (60, True), (30, False)
+    )
+    assert best == (0, 0, 240)
+    assert loaded == [0]
+    assert end_values[1] is None